@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Create (or, with --dry-run, just list) the MongoDB indexes declared in
+server.MONGO_INDEXES for the database named by MONGO_URL / DB_NAME.
+
+    python ensure_indexes.py --dry-run
+    python ensure_indexes.py --json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+
+import server
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="only report indexes that are missing")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args()
+
+    await server.connect_to_mongo(warm_connections=1)
+    report = await server.ensure_indexes(server.db, dry_run=args.dry_run)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        server.log_index_report(report, dry_run=args.dry_run)
+    await server.close_mongo()
+
+    # Non-zero exit when something still needs attention, so CI can gate on it
+    pending = {"missing", "failed", "conflict"}
+    return 1 if any(entry["status"] in pending for entry in report) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+CPU cost versus bytes saved for response compression on representative payloads.
+
+Payloads are real response bodies rendered the way the API renders them:
+
+    assignments_1000      GET /api/assignments for a teacher with 1,000 assignments
+    student_assignments   GET /api/student/assignments with 60 assigned items
+    lesson_plans_50       GET /api/lesson-plans with 50 long generated plans
+    small_reward_list     GET /api/rewards with the 5 default rewards
+
+Each is compressed with gzip and (if installed) brotli across levels. The
+report gives median compression time, output size, ratio, throughput and
+KiB saved per CPU millisecond. The row matching the server's current
+COMPRESSION_* settings is marked with *.
+
+    python perf/bench_compression.py --repeat 15
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "keystone_bench")
+
+import server  # noqa: E402
+from bench_serialization import stored_assignment  # noqa: E402
+
+WORDS = (
+    "students will explore the water cycle through hands-on experiments and discussion "
+    "evaporation condensation precipitation collection observe record compare explain "
+    "materials include clear cups plastic wrap ice cubes markers worksheets timer "
+    "assessment rubric partner share reflection journal vocabulary extension activity "
+    "differentiate support advanced learners small groups whole class review objective"
+).split()
+
+
+def lesson_plan_text(rng: random.Random, sections: int = 5, paragraphs: int = 6) -> str:
+    titles = ["Learning Objectives", "Materials Needed", "Lesson Activities", "Assessment Methods", "Extension Activities"]
+    parts = []
+    for n in range(sections):
+        parts.append(f"## {n + 1}. {titles[n % len(titles)]}")
+        for _ in range(paragraphs):
+            sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(18, 40)))
+            parts.append(f"- {sentence.capitalize()}.")
+    return "\n\n".join(parts)
+
+
+def payloads() -> dict:
+    rng = random.Random(7)
+    teacher_id = str(uuid.UUID(int=1))
+    start = datetime(2024, 9, 1, 8, 0, 0)
+    assignments = [stored_assignment(n, teacher_id, start + timedelta(minutes=n)) for n in range(1000)]
+
+    student_items = [
+        {
+            "student_assignment_id": str(uuid.UUID(int=10_000 + n)),
+            "assignment": server.trusted_dump(server.Assignment, assignments[n]),
+            "completed": n % 3 == 0,
+            "score": 80.0 if n % 3 == 0 else None,
+            "submitted_at": None,
+            "assigned_at": start + timedelta(days=n),
+        }
+        for n in range(60)
+    ]
+    lesson_plans = [
+        {
+            "id": str(uuid.UUID(int=20_000 + n)),
+            "title": f"Science - Topic {n}",
+            "subject": "Science",
+            "grade_level": "4th Grade",
+            "topic": f"Topic {n}",
+            "content": lesson_plan_text(rng),
+            "teacher_id": teacher_id,
+            "created_at": start + timedelta(hours=n),
+        }
+        for n in range(50)
+    ]
+    rewards = [
+        {"id": str(uuid.UUID(int=30_000 + n)), "title": f"Reward {n}", "description": "Play games for 1 hour",
+         "points_cost": 50 * (n + 1), "teacher_id": teacher_id, "active": True, "created_at": start}
+        for n in range(5)
+    ]
+    return {
+        "assignments_1000": server.trusted_response(server.Assignment, assignments).body,
+        "student_assignments": server.ORJSONResponse(student_items).body,
+        "lesson_plans_50": server.trusted_response(server.LessonPlan, lesson_plans).body,
+        "small_reward_list": server.trusted_response(server.Reward, rewards).body,
+    }
+
+
+def codecs() -> list:
+    rows = [(f"gzip-{level}", "gzip", level, lambda body, level=level: gzip.compress(body, compresslevel=level, mtime=0))
+            for level in (1, 6, 9)]
+    if server.brotli:
+        rows += [(f"br-{quality}", "br", quality, lambda body, quality=quality: server.brotli.compress(body, quality=quality))
+                 for quality in (1, 4, 6, 9)]
+    return rows
+
+
+def measure(compress, body: bytes, repeat: int) -> dict:
+    durations = []
+    output = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = compress(body)
+        durations.append(time.perf_counter() - started)
+    median = statistics.median(durations)
+    saved = len(body) - len(output)
+    return {
+        "median_ms": round(median * 1000, 3),
+        "bytes_out": len(output),
+        "ratio": round(len(output) / len(body), 3),
+        "mb_per_s": round(len(body) / median / 1_000_000, 1),
+        "kib_saved_per_cpu_ms": round(saved / 1024 / (median * 1000), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    configured = {("gzip", server.COMPRESSION_GZIP_LEVEL), ("br", server.COMPRESSION_BROTLI_QUALITY)}
+    results = {}
+    for name, body in payloads().items():
+        results[name] = {"bytes_in": len(body), "codecs": {}}
+        for label, encoding, level, compress in codecs():
+            results[name]["codecs"][label] = measure(compress, body, args.repeat)
+            results[name]["codecs"][label]["configured"] = (encoding, level) in configured
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"threshold: {server.COMPRESSION_MIN_BYTES} bytes; brotli {'available' if server.brotli else 'not installed'}")
+    for name, result in results.items():
+        below = " (below threshold: sent uncompressed)" if result["bytes_in"] < server.COMPRESSION_MIN_BYTES else ""
+        print(f"\n== {name}: {result['bytes_in']} bytes{below}")
+        print(f"{'codec':<10}{'ms':>10}{'bytes out':>12}{'ratio':>8}{'MB/s':>9}{'KiB saved/ms':>14}")
+        for label, row in result["codecs"].items():
+            mark = "*" if row["configured"] else " "
+            print(f"{label:<9}{mark}{row['median_ms']:>10.3f}{row['bytes_out']:>12}{row['ratio']:>8.3f}"
+                  f"{row['mb_per_s']:>9.1f}{row['kib_saved_per_cpu_ms']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
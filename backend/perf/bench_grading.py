@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for server.grade_submission, the scoring half of
+submit_assignment.
+
+Grades large synthetic submissions of every content type (MCQ, coding,
+drag-drop, learn-to-read, spelling practice and test), plus pathological
+ones: multi-megabyte coding answers, spelling practice dicts far larger
+than the word list, and answer lists much longer than the assignment.
+Reports ops/sec and peak traced allocation per call.
+
+    python perf/bench_grading.py
+    python perf/bench_grading.py --save perf/grading_baseline.json
+    python perf/bench_grading.py --compare perf/grading_baseline.json --tolerance 0.25
+
+--compare exits non-zero when a case is slower or allocates more than the
+baseline by more than the tolerance.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "keystone_bench")
+
+import server  # noqa: E402
+
+SubmissionRequest = server.SubmissionRequest
+
+
+def mcq_case(count: int, extra_answers: int = 0):
+    questions = [
+        {"question": f"Q{n}?", "options": ["A", "B", "C", "D"], "correct_answer": n % 4}
+        for n in range(count)
+    ]
+    answers = [(n * 7) % 4 for n in range(count + extra_answers)]
+    return {"questions": questions}, SubmissionRequest(student_assignment_id="bench", answers=answers)
+
+
+def coding_case(count: int, answer_size: int):
+    body = "for i in range(10):\n    print(i)\n"
+    code = (body * (answer_size // len(body) + 1))[:answer_size]
+    exercises = [
+        {"prompt": "Print numbers", "language": "python", "starter_code": "", "correct_answer": code, "explanation": ""}
+        for _ in range(count)
+    ]
+    # Same code with different spacing, so every answer is normalised in full
+    answers = [code.replace("    ", "  ") for _ in range(count)]
+    assignment = {"questions": [], "coding_exercises": exercises}
+    return assignment, SubmissionRequest(student_assignment_id="bench", coding_answers=answers)
+
+
+def drag_drop_case(zones: int):
+    puzzle = {
+        "prompt": "Order the items",
+        "items": [{"id": f"item{n}", "content": str(n)} for n in range(zones)],
+        "zones": [{"id": f"zone{n}", "label": str(n), "correct_item_id": f"item{n}"} for n in range(zones)],
+        "explanation": "",
+    }
+    answer = {f"zone{n}": f"item{n if n % 3 else n + 1}" for n in range(zones)}
+    return {"questions": [], "drag_drop_puzzle": puzzle}, SubmissionRequest(student_assignment_id="bench", drag_drop_answer=answer)
+
+
+def learn_to_read_case(activities: int):
+    content = {
+        "story": ["The cat can run."] * 5,
+        "activities": [
+            {"instruction": "Click the word", "target_word": f"Word{n}", "sentence_index": n % 5}
+            for n in range(activities)
+        ],
+    }
+    clicks = [f"word{n}" if n % 4 else "miss" for n in range(activities)]
+    assignment = {"questions": [], "learn_to_read_content": content}
+    return assignment, SubmissionRequest(student_assignment_id="bench", interactive_word_answers=clicks)
+
+
+def spelling_practice_case(words: int, extra_keys: int = 0):
+    word_list = [f"word{n}" for n in range(words)]
+    answers = {word: [word, f" {word.upper()} ", word if n % 5 else "wrod"] for n, word in enumerate(word_list)}
+    for n in range(extra_keys):
+        answers[f"junk{n}"] = ["junk"] * 3
+    assignment = {"questions": [], "spelling_type": "practice", "spelling_words": word_list}
+    return assignment, SubmissionRequest(student_assignment_id="bench", spelling_practice_answers=answers)
+
+
+def spelling_test_case(words: int, extra_answers: int = 0):
+    word_list = [f"word{n}" for n in range(words)]
+    answers = [f" Word{n} " if n % 6 else "wrong" for n in range(words + extra_answers)]
+    assignment = {"questions": [], "spelling_type": "test", "spelling_words": word_list}
+    return assignment, SubmissionRequest(student_assignment_id="bench", spelling_test_answers=answers)
+
+
+def mixed_case():
+    assignment, submission = mcq_case(20)
+    coding, coding_submission = coding_case(4, 400)
+    assignment["coding_exercises"] = coding["coding_exercises"]
+    submission.coding_answers = coding_submission.coding_answers
+    return assignment, submission
+
+
+CASES = {
+    "mcq_1k": lambda: mcq_case(1000),
+    "coding_50x1k": lambda: coding_case(50, 1_000),
+    "drag_drop_500": lambda: drag_drop_case(500),
+    "learn_to_read_1k": lambda: learn_to_read_case(1000),
+    "spelling_practice_2k": lambda: spelling_practice_case(2000),
+    "spelling_test_2k": lambda: spelling_test_case(2000),
+    "typical_mixed": mixed_case,
+    # Pathological inputs a client can send
+    "mcq_answers_100k_over": lambda: mcq_case(10, extra_answers=100_000),
+    "coding_huge_answers_4x2mb": lambda: coding_case(4, 2_000_000),
+    "spelling_practice_200k_keys": lambda: spelling_practice_case(50, extra_keys=200_000),
+    "spelling_test_100k_over": lambda: spelling_test_case(50, extra_answers=100_000),
+}
+
+
+def measure(assignment: dict, submission, min_seconds: float) -> dict:
+    server.grade_submission(assignment, submission)  # warm up
+
+    iterations = 0
+    started = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_seconds or iterations < 3:
+        server.grade_submission(assignment, submission)
+        iterations += 1
+        elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        server.grade_submission(assignment, submission)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / elapsed, 2),
+        "mean_us": round(elapsed / iterations * 1_000_000, 2),
+        "peak_alloc_kib": round((peak - baseline) / 1024, 2),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("cases", {}).get(name)
+        if not previous:
+            continue
+        if current["ops_per_sec"] < previous["ops_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: {previous['ops_per_sec']} -> {current['ops_per_sec']} ops/s")
+        # Ignore noise on cases that barely allocate
+        if current["peak_alloc_kib"] > max(previous["peak_alloc_kib"] * (1 + tolerance), previous["peak_alloc_kib"] + 4):
+            regressions.append(f"{name}: {previous['peak_alloc_kib']} -> {current['peak_alloc_kib']} KiB peak")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", nargs="*", choices=sorted(CASES), help="cases to run (default: all)")
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="minimum timing window per case")
+    parser.add_argument("--save", help="write results to this baseline file")
+    parser.add_argument("--compare", help="baseline file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression fraction")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'case':<30}{'ops/s':>12}{'mean us':>12}{'peak KiB':>12}")
+    for name in args.cases or CASES:
+        assignment, submission = CASES[name]()
+        results[name] = measure(assignment, submission, args.min_seconds)
+        row = results[name]
+        print(f"{name:<30}{row['ops_per_sec']:>12.2f}{row['mean_us']:>12.2f}{row['peak_alloc_kib']:>12.2f}")
+
+    if args.save:
+        document = {"python": platform.python_version(), "machine": platform.machine(), "cases": results}
+        Path(args.save).write_text(json.dumps(document, indent=2, sort_keys=True) + "\n")
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        regressions = compare(results, json.loads(Path(args.compare).read_text()), args.tolerance)
+        if regressions:
+            print("\nRegressions beyond tolerance:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions beyond tolerance.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Login storm benchmark for password hashing.
+
+Fires a burst of concurrent bcrypt verifications (what login_teacher and
+login_student do per request) while a probe coroutine stands in for
+unrelated requests and records how late the event loop wakes it up.
+
+Runs the burst twice: inline bcrypt on the event loop (the old behaviour)
+and through server.password_hasher.
+
+    python perf/bench_login_storm.py --logins 40 --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "keystone_bench")
+
+import server  # noqa: E402
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def probe(stop: asyncio.Event, interval: float, lags: list):
+    """Stand-in for unrelated requests: wake every `interval` and record lateness."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - expected) * 1000)
+
+
+async def run_storm(mode: str, logins: int, hashed: str, hasher, interval: float) -> dict:
+    async def login():
+        if mode == "inline":
+            return server.verify_password("SecurePass123!", hashed)
+        return await hasher.verify("SecurePass123!", hashed)
+
+    stop = asyncio.Event()
+    lags = []
+    probe_task = asyncio.create_task(probe(stop, interval, lags))
+    await asyncio.sleep(interval * 2)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe_task
+    assert all(results)
+
+    return {
+        "mode": mode,
+        "logins": logins,
+        "seconds": round(elapsed, 3),
+        "logins_per_second": round(logins / elapsed, 2),
+        "probe_samples": len(lags),
+        "probe_lag_ms_p50": round(percentile(lags, 50), 2),
+        "probe_lag_ms_p99": round(percentile(lags, 99), 2),
+        "probe_lag_ms_max": round(max(lags, default=0.0), 2),
+        "probe_lag_ms_mean": round(statistics.fmean(lags), 2) if lags else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40, help="concurrent logins in the storm")
+    parser.add_argument("--workers", type=int, default=server.PASSWORD_HASH_CONCURRENCY, help="password pool size")
+    parser.add_argument("--probe-interval-ms", type=float, default=10.0)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    hashed = server.hash_password("SecurePass123!")
+    hasher = server.PasswordHasher(args.workers)
+    interval = args.probe_interval_ms / 1000
+
+    results = []
+    for mode in ("inline", "pool"):
+        results.append(await run_storm(mode, args.logins, hashed, hasher, interval))
+    hasher.shutdown()
+
+    if args.json:
+        print(json.dumps({"workers": args.workers, "cpu_count": os.cpu_count(), "results": results}, indent=2))
+        return
+
+    print(f"Login storm: {args.logins} logins, {args.workers} hash workers, {os.cpu_count()} CPUs")
+    print(f"{'mode':<8}{'logins/s':>10}{'probe p50 ms':>14}{'probe p99 ms':>14}{'probe max ms':>14}")
+    for r in results:
+        print(f"{r['mode']:<8}{r['logins_per_second']:>10}{r['probe_lag_ms_p50']:>14}{r['probe_lag_ms_p99']:>14}{r['probe_lag_ms_max']:>14}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
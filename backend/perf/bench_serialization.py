@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Before/after benchmark for the read-path serialization of GET /api/assignments.
+
+Builds the documents a teacher with 1,000 assignments gets back from Mongo
+(a mix of reading, coding, drag-drop and learn-to-read content) and renders
+the response body both ways:
+
+    validated   Assignment(**doc) per document, then FastAPI's response_model
+                validation/serialization and the stdlib JSONResponse
+                (what the route did before)
+    trusted     server.trusted_response: field projection without
+                validation, rendered by orjson (what the route does now)
+
+Both bodies are decoded and compared before timing, so the fast path is
+checked to produce the same JSON. No database is needed.
+
+    python perf/bench_serialization.py --assignments 1000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "keystone_bench")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+
+import server  # noqa: E402
+
+
+def stored_assignment(n: int, teacher_id: str, created_at: datetime) -> dict:
+    """A document shaped like what generate_assignment inserts, as Mongo returns it."""
+    questions = [
+        {"question": f"Question {q} for assignment {n}?", "options": ["Alpha", "Beta", "Gamma", "Delta"], "correct_answer": q % 4}
+        for q in range(6)
+    ]
+    document = {
+        "_id": uuid.UUID(int=n).hex[:24],
+        "id": str(uuid.UUID(int=n)),
+        "title": f"Assignment {n}",
+        "subject": ["Reading", "Learn to Code", "Critical Thinking Skills", "Learn to Read"][n % 4],
+        "grade_level": "3rd Grade",
+        "topic": f"Topic {n}",
+        "questions": questions,
+        "reading_passage": None,
+        "coding_exercises": [],
+        "drag_drop_puzzle": None,
+        "learn_to_read_content": None,
+        "coding_level": None,
+        "youtube_url": None,
+        "spelling_type": None,
+        "spelling_words": [],
+        "teacher_id": teacher_id,
+        # Mongo hands datetimes back naive, at millisecond precision
+        "created_at": created_at.replace(microsecond=(n % 1000) * 1000),
+    }
+    kind = n % 4
+    if kind == 0:
+        document["reading_passage"] = "The fox ran across the field to find its friends. " * 20
+    elif kind == 1:
+        document["coding_level"] = 3
+        document["coding_exercises"] = [{
+            "prompt": "Write a loop that prints 1 to 10",
+            "language": "javascript",
+            "starter_code": "// your code here",
+            "correct_answer": "for (let i = 1; i <= 10; i++) { console.log(i); }",
+            "explanation": "A for loop counts from 1 to 10.",
+        }]
+    elif kind == 2:
+        document["drag_drop_puzzle"] = {
+            "prompt": "Order the numbers",
+            "items": [{"id": f"item{i}", "content": str(i)} for i in range(1, 5)],
+            "zones": [{"id": f"zone{i}", "label": f"Position {i}", "correct_item_id": f"item{i}"} for i in range(1, 5)],
+            "explanation": "Smallest to largest.",
+        }
+    else:
+        document["learn_to_read_content"] = {
+            "story": ["The cat is big.", "The cat can run.", "The dog can sit.", "The sun is hot.", "We like to play."],
+            "activities": [{"instruction": "Click on the word 'cat'", "target_word": "cat", "sentence_index": 0}],
+        }
+    return document
+
+
+def route_field(path: str):
+    for route in server.app.routes:
+        if getattr(route, "path", None) == path and "GET" in route.methods:
+            return route.response_field
+    raise SystemExit(f"route {path} not found")
+
+
+async def validated_body(documents, field) -> bytes:
+    content = [server.Assignment(**document) for document in documents]
+    serialized = await serialize_response(field=field, response_content=content, is_coroutine=True)
+    return JSONResponse(serialized).body
+
+
+async def trusted_body(documents, field) -> bytes:
+    return server.trusted_response(server.Assignment, documents).body
+
+
+async def time_path(render, documents, field, repeat: int) -> dict:
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = await render(documents, field)
+        durations.append((time.perf_counter() - started) * 1000)
+    return {
+        "median_ms": round(statistics.median(durations), 2),
+        "min_ms": round(min(durations), 2),
+        "body_bytes": len(body),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assignments", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    teacher_id = str(uuid.uuid4())
+    start = datetime(2024, 9, 1, 8, 0, 0)
+    documents = [stored_assignment(n, teacher_id, start + timedelta(minutes=n)) for n in range(args.assignments)]
+    field = route_field("/api/assignments")
+
+    before = json.loads(await validated_body(documents, field))
+    after = json.loads(await trusted_body(documents, field))
+    if before != after:
+        raise SystemExit("trusted path produced a different response body")
+
+    results = {}
+    for name, render in (("validated", validated_body), ("trusted", trusted_body)):
+        await render(documents, field)  # warm up
+        results[name] = await time_path(render, documents, field, args.repeat)
+
+    if args.json:
+        print(json.dumps({"assignments": args.assignments, "results": results}, indent=2))
+        return
+    print(f"GET /api/assignments body for {args.assignments} assignments, {args.repeat} runs")
+    print(f"{'path':<12}{'median ms':>12}{'min ms':>10}{'bytes':>12}")
+    for name, row in results.items():
+        print(f"{name:<12}{row['median_ms']:>12.2f}{row['min_ms']:>10.2f}{row['body_bytes']:>12}")
+    speedup = results["validated"]["median_ms"] / max(results["trusted"]["median_ms"], 1e-9)
+    print(f"speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
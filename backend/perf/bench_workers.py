@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Throughput scaling of serve.py from 1 to N worker processes.
+
+Builds the load-test school once (same fixtures as loadtest.py, in
+LOADTEST_DB_NAME), then for each worker count starts `serve.py --workers N`
+as a subprocess, waits for /api/health/ready, and runs loadtest scenarios
+against it over real HTTP. Each run reports req/s, the worst per-route p99 latency and the error rate, and
+the speedup is taken against the smallest worker count.
+
+    python perf/bench_workers.py --workers 1 2 4 --scenario gradebook_refresh
+    python perf/bench_workers.py --scenario login_storm --vus 100 --duration 20
+
+The load generator runs on the same machine, so leave it a core: on a box
+with C usable CPUs, workers beyond C - 1 mostly measure contention.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+import loadtest  # sets DB_NAME / LLM_PROVIDER for this process and the workers it starts
+import serve  # noqa: E402
+import server  # noqa: E402
+
+SERVE = Path(__file__).resolve().parent.parent / "serve.py"
+
+
+async def wait_ready(base_url: str, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url, timeout=2.0) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise SystemExit(f"serve.py exited with code {process.returncode}")
+            try:
+                if (await client.get("/api/health/ready")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit(f"serve.py not ready after {timeout}s")
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ, LLM_PROVIDER="fake", MONGO_INDEX_BOOTSTRAP="off")
+    return subprocess.Popen(
+        [sys.executable, str(SERVE), "--workers", str(workers), "--port", str(port),
+         "--host", "127.0.0.1", "--log-level", "warning"],
+        env=env,
+    )
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def reset_database() -> None:
+    await server.connect_to_mongo(warm_connections=1)
+    try:
+        for name in await server.db.list_collection_names():
+            await server.db[name].drop()
+        await server.ensure_indexes(server.db)
+    finally:
+        await server.close_mongo()
+
+
+async def run(args) -> dict:
+    await reset_database()
+    base_url = f"http://127.0.0.1:{args.port}"
+    limits = httpx.Limits(max_connections=args.vus, max_keepalive_connections=args.vus)
+    school = None
+    results = {}
+    for workers in args.workers:
+        process = start_server(workers, args.port)
+        try:
+            await wait_ready(base_url, process, args.startup_timeout)
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+                if school is None:
+                    print(f"Building school: {args.teachers} teachers x {args.students_per_teacher} students")
+                    school = await loadtest.build_school(client, args)
+                results[workers] = {}
+                for name in args.scenario:
+                    report = await loadtest.run_scenario(name, client, school, args)
+                    results[workers][name] = {key: report[key] for key in ("requests", "rps", "error_rate")}
+                    results[workers][name]["p99_ms_worst_route"] = max(
+                        (route["p99_ms"] for route in report["routes"].values()), default=0.0)
+                    print(f"workers={workers:<3}{name:<20}{report['rps']:>10.1f} req/s "
+                          f"{report['error_rate'] * 100:>6.2f}% errors")
+        finally:
+            stop_server(process)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cpus = serve.usable_cpus()
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, *[n for n in (2, 4, 8, 16) if n <= cpus], cpus}))
+    parser.add_argument("--scenario", nargs="+", choices=sorted(loadtest.SCENARIOS),
+                        default=["gradebook_refresh", "login_storm"])
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--vus", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--ramp-up", type=float, default=1.0)
+    parser.add_argument("--think-time", type=float, default=0.0)
+    parser.add_argument("--iterations", type=int, default=0)
+    parser.add_argument("--teachers", type=int, default=4)
+    parser.add_argument("--students-per-teacher", type=int, default=20)
+    parser.add_argument("--assignments-per-teacher", type=int, default=5)
+    parser.add_argument("--starting-points", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps({"usable_cpus": cpus, "results": results}, indent=2, sort_keys=True))
+        return
+    baseline_workers = min(results)
+    print(f"\nusable CPUs: {cpus}")
+    print(f"{'scenario':<20}{'workers':>8}{'req/s':>10}{'speedup':>9}{'p99 ms':>10}{'err%':>7}")
+    for name in args.scenario:
+        baseline = results[baseline_workers][name]["rps"] or 1e-9
+        for workers, scenarios in results.items():
+            row = scenarios[name]
+            print(f"{name:<20}{workers:>8}{row['rps']:>10.1f}{row['rps'] / baseline:>8.2f}x"
+                  f"{row['p99_ms_worst_route']:>10.1f}{row['error_rate'] * 100:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
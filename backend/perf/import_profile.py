@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Cold-start profile for a worker process: time and memory to import server.py.
+
+Imports server in a fresh interpreter under `python -X importtime` and
+reports:
+
+    import_ms       wall time of `import server`
+    rss_mib         resident memory once the import finishes
+    packages        self import time per top-level package (top --top)
+    modules         slowest modules by cumulative import time
+    deferred        packages that must not load at import (the LLM SDK stack),
+                    with how long the SDK takes to load on first use and the
+                    memory it adds
+
+    python perf/import_profile.py
+    python perf/import_profile.py --save perf/import_baseline.json
+    python perf/import_profile.py --compare perf/import_baseline.json --tolerance 0.25
+
+Exits non-zero if a deferred package was imported at startup, or with
+--compare when import time or RSS grew beyond the tolerance.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+# Loaded by llm_sdk on the first live generation, never at import
+DEFERRED_PACKAGES = ("emergentintegrations", "google.genai", "google.generativeai", "grpc", "litellm")
+
+PROBE = """
+import json, os, sys, time
+sys.path.insert(0, {backend!r})
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "keystone_bench")
+
+def rss_mib():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+baseline_rss = rss_mib()
+started = time.perf_counter()
+import server
+import_ms = (time.perf_counter() - started) * 1000
+rss = rss_mib()
+loaded = sorted(name for name in sys.modules if name.split(".")[0] in {roots!r} or name in {deferred!r})
+result = {{"import_ms": import_ms, "baseline_rss_mib": baseline_rss, "rss_mib": rss, "loaded_at_import": loaded}}
+if {load_sdk!r}:
+    sys.stderr.write("--- llm sdk ---\\n")
+    try:
+        server.llm_sdk.load()
+        result["sdk_load_ms"] = server.llm_sdk.import_ms
+        result["sdk_rss_mib"] = rss_mib() - rss
+    except ImportError as exc:
+        result["sdk_error"] = str(exc)
+print(json.dumps(result))
+"""
+
+
+def deferred_packages(loaded: list) -> list:
+    return [package for package in DEFERRED_PACKAGES
+            if any(name == package or name.startswith(package + ".") for name in loaded)]
+
+
+def parse_importtime(stderr: str) -> list:
+    """(module, self_us, cumulative_us) rows for `import server`, excluding the SDK load."""
+    rows = []
+    for line in stderr.split("--- llm sdk ---")[0].splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((name, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def profile(load_sdk: bool) -> dict:
+    roots = sorted({name.split(".")[0] for name in DEFERRED_PACKAGES})
+    probe = PROBE.format(backend=str(BACKEND_DIR), roots=roots, deferred=list(DEFERRED_PACKAGES), load_sdk=load_sdk)
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", probe],
+                               capture_output=True, text=True, cwd=BACKEND_DIR, env=os.environ.copy())
+    if completed.returncode != 0:
+        raise SystemExit(completed.stderr[-4000:])
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    rows = parse_importtime(completed.stderr)
+
+    packages = {}
+    for name, self_us, _ in rows:
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + self_us
+    result["module_count"] = len(rows)
+    result["packages"] = {name: round(us / 1000, 2) for name, us in sorted(packages.items(), key=lambda item: -item[1])}
+    result["modules"] = {name: round(cumulative / 1000, 2)
+                         for name, _, cumulative in sorted(rows, key=lambda row: -row[2])}
+    result["deferred_loaded_at_import"] = deferred_packages(result.pop("loaded_at_import"))
+    return result
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for key, slack in (("import_ms", 20.0), ("rss_mib", 4.0)):
+        previous, current = baseline.get(key), results[key]
+        # Absolute slack keeps run-to-run noise on small numbers from failing the check
+        if previous is not None and current > max(previous * (1 + tolerance), previous + slack):
+            regressions.append(f"{key}: {previous:.1f} -> {current:.1f}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to take the median from")
+    parser.add_argument("--top", type=int, default=15, help="rows to show per table")
+    parser.add_argument("--skip-sdk", action="store_true", help="don't measure the deferred LLM SDK load")
+    parser.add_argument("--save", help="write results to this baseline file")
+    parser.add_argument("--compare", help="baseline file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression fraction")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    runs = sorted((profile(load_sdk=not args.skip_sdk) for _ in range(args.runs)), key=lambda run: run["import_ms"])
+    results = runs[len(runs) // 2]
+    results["import_ms"] = round(results["import_ms"], 1)
+    results["rss_mib"] = round(results["rss_mib"], 1)
+    results["baseline_rss_mib"] = round(results["baseline_rss_mib"], 1)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"import server: {results['import_ms']:.1f} ms (median of {args.runs}), {results['module_count']} modules, "
+              f"RSS {results['rss_mib']:.1f} MiB (interpreter {results['baseline_rss_mib']:.1f} MiB)")
+        print(f"\n{'package':<32}{'self ms':>10}")
+        for name, ms in list(results["packages"].items())[:args.top]:
+            print(f"{name:<32}{ms:>10.2f}")
+        print(f"\n{'module':<48}{'cumulative ms':>14}")
+        for name, ms in list(results["modules"].items())[:args.top]:
+            print(f"{name:<48}{ms:>14.2f}")
+        if "sdk_load_ms" in results:
+            print(f"\nLLM SDK on first use: {results['sdk_load_ms']:.1f} ms, +{results['sdk_rss_mib']:.1f} MiB RSS")
+        elif "sdk_error" in results:
+            print(f"\nLLM SDK not importable here: {results['sdk_error']}")
+
+    status = 0
+    if results["deferred_loaded_at_import"]:
+        print(f"\nDeferred packages imported at startup: {', '.join(results['deferred_loaded_at_import'])}")
+        status = 1
+
+    if args.save:
+        document = {"python": platform.python_version(), "machine": platform.machine(),
+                    **{key: results[key] for key in ("import_ms", "rss_mib", "module_count", "packages")}}
+        Path(args.save).write_text(json.dumps(document, indent=2, sort_keys=True) + "\n")
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        regressions = compare(results, json.loads(Path(args.compare).read_text()), args.tolerance)
+        if regressions:
+            print("\nRegressions beyond tolerance:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions beyond tolerance.")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Load-test harness that drives the FastAPI app in-process.
+
+Virtual users send requests straight to `server.app` through httpx's ASGI
+transport. They use the real Mongo at MONGO_URL, in a dedicated database
+(LOADTEST_DB_NAME, default keystone_loadtest) that is dropped before each
+run, and the fake LLM provider (LLM_PROVIDER=fake), so nothing leaves the
+machine. Each scenario models one real traffic pattern:
+
+    login_storm         students log in and load their dashboard
+    submission_burst    a whole class opens and submits assignments at once
+    gradebook_refresh   teachers keep reloading gradebook and points pages
+    messaging_chatter   teachers and students send and read messages
+    reward_redemption   students check points and redeem rewards
+
+The report gives throughput, per-route p50/p95/p99 latency and error rates.
+--json-out writes the same report as stable, diffable JSON, and `compare`
+diffs two of those files.
+
+    python perf/loadtest.py run submission_burst --vus 50 --duration 30
+    python perf/loadtest.py run all --json-out before.json
+    python perf/loadtest.py compare before.json after.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# Always use a dedicated database: fixtures are rebuilt by dropping it
+os.environ["DB_NAME"] = os.environ.get("LOADTEST_DB_NAME", "keystone_loadtest")
+os.environ["LLM_PROVIDER"] = "fake"
+
+import httpx  # noqa: E402
+
+import server  # noqa: E402
+
+PASSWORD = "LoadTest123!"
+SUBJECTS = ["Math", "Reading", "Science", "Critical Thinking Skills", "Learn to Read"]
+
+
+def percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.statuses = {}
+
+    def record(self, route: str, status_code: int, seconds: float, ok: bool) -> None:
+        self.samples.setdefault(route, []).append(seconds)
+        codes = self.statuses.setdefault(route, {})
+        codes[str(status_code)] = codes.get(str(status_code), 0) + 1
+        if not ok:
+            self.errors[route] = self.errors.get(route, 0) + 1
+
+    def report(self, elapsed: float) -> dict:
+        routes = {}
+        for route in sorted(self.samples):
+            ordered = sorted(self.samples[route])
+            count = len(ordered)
+            routes[route] = {
+                "requests": count,
+                "errors": self.errors.get(route, 0),
+                "error_rate": round(self.errors.get(route, 0) / count, 4),
+                "rps": round(count / elapsed, 2),
+                "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+                "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+                "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+                "max_ms": round(ordered[-1] * 1000, 2),
+                "status_codes": dict(sorted(self.statuses[route].items())),
+            }
+        total = sum(r["requests"] for r in routes.values())
+        errors = sum(r["errors"] for r in routes.values())
+        return {
+            "elapsed_seconds": round(elapsed, 2),
+            "requests": total,
+            "errors": errors,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "routes": routes,
+        }
+
+
+class VirtualUser:
+    def __init__(self, index: int, client: httpx.AsyncClient, recorder: Recorder, school: dict, seed: int):
+        self.index = index
+        self.client = client
+        self.recorder = recorder
+        self.school = school
+        self.rng = random.Random(seed * 100003 + index)
+        teacher = school["teachers"][index % len(school["teachers"])]
+        self.teacher = teacher
+        self.student = teacher["students"][(index // len(school["teachers"])) % len(teacher["students"])]
+
+    async def call(self, route: str, method: str, url: str, token: str = None, expected=(200,), **kwargs):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=headers, **kwargs)
+        except Exception:
+            self.recorder.record(route, 599, time.perf_counter() - started, False)
+            return None
+        self.recorder.record(route, response.status_code, time.perf_counter() - started,
+                             response.status_code in expected)
+        return response
+
+
+async def login_storm(vu: VirtualUser):
+    response = await vu.call("POST /api/auth/student/login", "POST", "/api/auth/student/login",
+                             json={"username": vu.student["username"], "password": PASSWORD})
+    if response is None or response.status_code != 200:
+        return
+    token = response.json()["access_token"]
+    await vu.call("GET /api/student/assignments", "GET", "/api/student/assignments", token)
+    await vu.call("GET /api/student/points", "GET", "/api/student/points", token)
+    await vu.call("GET /api/rewards", "GET", "/api/rewards", token)
+
+
+def _answers_for(assignment: dict, rng: random.Random) -> dict:
+    submission = {"answers": [rng.randint(0, 3) for _ in assignment.get("questions") or []]}
+    if assignment.get("coding_exercises"):
+        submission["coding_answers"] = [ex["correct_answer"] for ex in assignment["coding_exercises"]]
+    if assignment.get("drag_drop_puzzle"):
+        submission["drag_drop_answer"] = {
+            zone["id"]: zone["correct_item_id"] for zone in assignment["drag_drop_puzzle"]["zones"]
+        }
+    if assignment.get("learn_to_read_content"):
+        submission["interactive_word_answers"] = [
+            activity["target_word"] for activity in assignment["learn_to_read_content"]["activities"]
+        ]
+    return submission
+
+
+async def submission_burst(vu: VirtualUser):
+    token = vu.student["token"]
+    response = await vu.call("GET /api/student/assignments", "GET", "/api/student/assignments", token)
+    if response is None or response.status_code != 200:
+        return
+    pending = [item for item in response.json() if not item["completed"]]
+    if not pending:
+        return
+    item = vu.rng.choice(pending)
+    detail = await vu.call("GET /api/student/assignments/{student_assignment_id}", "GET",
+                           f"/api/student/assignments/{item['student_assignment_id']}", token)
+    if detail is None or detail.status_code != 200:
+        return
+    submission = _answers_for(detail.json()["assignment"], vu.rng)
+    submission["student_assignment_id"] = item["student_assignment_id"]
+    # Another virtual user on the same student may have submitted it first
+    await vu.call("POST /api/student/assignments/submit", "POST", "/api/student/assignments/submit", token,
+                  expected=(200, 400), json=submission)
+
+
+async def gradebook_refresh(vu: VirtualUser):
+    token = vu.teacher["token"]
+    await vu.call("GET /api/gradebook", "GET", "/api/gradebook", token)
+    await vu.call("GET /api/teacher/student-points", "GET", "/api/teacher/student-points", token)
+    await vu.call("GET /api/students", "GET", "/api/students", token)
+    await vu.call("GET /api/assignments", "GET", "/api/assignments", token)
+
+
+async def messaging_chatter(vu: VirtualUser):
+    teacher, student = vu.teacher, vu.student
+    if vu.index % 2 == 0:
+        sender_token, contact_id = teacher["token"], student["id"]
+    else:
+        sender_token, contact_id = student["token"], teacher["id"]
+    await vu.call("POST /api/messages", "POST", "/api/messages", sender_token,
+                  json={"recipient_id": contact_id, "content": f"Load test message {vu.rng.random():.6f}"})
+    await vu.call("GET /api/messages", "GET", "/api/messages", sender_token)
+    await vu.call("GET /api/messages/{contact_id}", "GET", f"/api/messages/{contact_id}", sender_token)
+
+
+async def reward_redemption(vu: VirtualUser):
+    token = vu.student["token"]
+    await vu.call("GET /api/student/points", "GET", "/api/student/points", token)
+    response = await vu.call("GET /api/rewards", "GET", "/api/rewards", token)
+    if response is None or response.status_code != 200 or not response.json():
+        return
+    reward = min(response.json(), key=lambda r: r["points_cost"])
+    # 400 means the student ran out of points, which is an expected outcome
+    await vu.call("POST /api/student/redeem", "POST", "/api/student/redeem", token, expected=(200, 400),
+                  params={"reward_id": reward["id"]})
+
+
+SCENARIOS = {
+    "login_storm": login_storm,
+    "submission_burst": submission_burst,
+    "gradebook_refresh": gradebook_refresh,
+    "messaging_chatter": messaging_chatter,
+    "reward_redemption": reward_redemption,
+}
+
+
+async def build_school(client: httpx.AsyncClient, args) -> dict:
+    """Create teachers, students, assignments, submissions-to-be and points through the API."""
+    teachers = []
+    run_id = f"{int(time.time())}{os.getpid()}"
+    for t in range(args.teachers):
+        response = await client.post("/api/auth/teacher/register", json={
+            "email": f"loadtest{run_id}t{t}@example.com", "password": PASSWORD,
+            "first_name": "Load", "last_name": f"Teacher{t}",
+        })
+        response.raise_for_status()
+        teacher = {"id": response.json()["user"]["id"], "token": response.json()["access_token"], "students": []}
+        headers = {"Authorization": f"Bearer {teacher['token']}"}
+
+        roster = [{"first_name": "Load", "last_name": f"Student{s}", "username": f"lt{run_id}t{t}s{s}",
+                   "password": PASSWORD} for s in range(args.students_per_teacher)]
+        response = await client.post("/api/students/bulk", json={"students": roster}, headers=headers)
+        response.raise_for_status()
+        for row in response.json()["results"]:
+            student = row["student"]
+            # Mint tokens directly so setup doesn't pay a bcrypt verify per student
+            claims = server.token_claims("student", student)
+            token = server.create_access_token(claims, server.timedelta(hours=2))
+            teacher["students"].append({"id": student["id"], "username": student["username"], "token": token})
+
+        student_ids = [s["id"] for s in teacher["students"]]
+        for n in range(args.assignments_per_teacher):
+            response = await client.post("/api/assignments/generate", headers=headers, json={
+                "subject": SUBJECTS[n % len(SUBJECTS)], "grade_level": "4th Grade", "topic": f"Topic {n}",
+            })
+            response.raise_for_status()
+            await client.post("/api/assignments/assign", headers=headers,
+                              json={"assignment_id": response.json()["id"], "student_ids": student_ids})
+
+        await client.post("/api/teacher/initialize-rewards", headers=headers)
+        for student_id in student_ids:
+            await client.post("/api/teacher/points", headers=headers, json={
+                "student_id": student_id, "points": args.starting_points, "description": "Load test balance",
+            })
+        teachers.append(teacher)
+    return {"teachers": teachers}
+
+
+async def run_scenario(name: str, client: httpx.AsyncClient, school: dict, args) -> dict:
+    recorder = Recorder()
+    step = SCENARIOS[name]
+    deadline = time.perf_counter() + args.duration
+
+    async def virtual_user(index: int):
+        vu = VirtualUser(index, client, recorder, school, args.seed)
+        # Spread the arrival of virtual users over the ramp-up period
+        await asyncio.sleep(vu.rng.uniform(0, args.ramp_up))
+        iterations = 0
+        while time.perf_counter() < deadline and (not args.iterations or iterations < args.iterations):
+            await step(vu)
+            iterations += 1
+            # Always yield so one user can't monopolise the loop when every await completes immediately
+            await asyncio.sleep(vu.rng.uniform(0, args.think_time) if args.think_time else 0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(virtual_user(i) for i in range(args.vus)))
+    return recorder.report(time.perf_counter() - started)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       cwd=Path(__file__).resolve().parent, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_report(name: str, report: dict) -> None:
+    print(f"\n== {name}: {report['requests']} requests in {report['elapsed_seconds']}s "
+          f"({report['rps']} req/s, {report['error_rate'] * 100:.2f}% errors)")
+    print(f"{'route':<58}{'reqs':>7}{'err%':>7}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for route, stats in report["routes"].items():
+        print(f"{route:<58}{stats['requests']:>7}{stats['error_rate'] * 100:>7.2f}"
+              f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}")
+
+
+async def run(args) -> None:
+    server.FAKE_LLM_LATENCY_MS = args.llm_latency_ms
+
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    transport = httpx.ASGITransport(app=server.app)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with server.app.router.lifespan_context(server.app):
+        if not args.keep_db:
+            for name in await server.db.list_collection_names():
+                await server.db[name].drop()
+            await server.ensure_indexes(server.db)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", limits=limits,
+                                     timeout=args.timeout) as client:
+            print(f"Building school: {args.teachers} teachers x {args.students_per_teacher} students, "
+                  f"{args.assignments_per_teacher} assignments each")
+            school = await build_school(client, args)
+            results = {}
+            for name in names:
+                results[name] = await run_scenario(name, client, school, args)
+                print_report(name, results[name])
+
+    if args.json_out:
+        document = {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "config": {key: value for key, value in sorted(vars(args).items()) if key not in ("func", "json_out")},
+            "scenarios": results,
+        }
+        Path(args.json_out).write_text(json.dumps(document, indent=2, sort_keys=True) + "\n")
+        print(f"\nWrote {args.json_out}")
+
+
+def compare(args) -> None:
+    before = json.loads(Path(args.before).read_text())
+    after = json.loads(Path(args.after).read_text())
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    for name, new in after["scenarios"].items():
+        old = before["scenarios"].get(name)
+        if not old:
+            continue
+        print(f"\n== {name}: {old['rps']} -> {new['rps']} req/s")
+        print(f"{'route':<58}{'p50 ms':>16}{'p99 ms':>16}{'err%':>14}")
+        for route, stats in new["routes"].items():
+            prev = old["routes"].get(route)
+            if not prev:
+                continue
+            print(f"{route:<58}{prev['p50_ms']:>7.1f} ->{stats['p50_ms']:>7.1f}"
+                  f"{prev['p99_ms']:>7.1f} ->{stats['p99_ms']:>7.1f}"
+                  f"{prev['error_rate'] * 100:>6.2f} ->{stats['error_rate'] * 100:>6.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run one scenario or all of them")
+    run_parser.add_argument("scenario", choices=["all", *SCENARIOS])
+    run_parser.add_argument("--vus", type=int, default=50, help="concurrent virtual users")
+    run_parser.add_argument("--duration", type=float, default=30.0, help="seconds per scenario")
+    run_parser.add_argument("--iterations", type=int, default=0, help="stop each user after N iterations (0 = no limit)")
+    run_parser.add_argument("--ramp-up", type=float, default=1.0, help="seconds over which users start")
+    run_parser.add_argument("--think-time", type=float, default=0.0, help="max random pause between iterations")
+    run_parser.add_argument("--teachers", type=int, default=5)
+    run_parser.add_argument("--students-per-teacher", type=int, default=20)
+    run_parser.add_argument("--assignments-per-teacher", type=int, default=10)
+    run_parser.add_argument("--starting-points", type=int, default=1000)
+    run_parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="fake LLM response delay")
+    run_parser.add_argument("--timeout", type=float, default=60.0)
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--keep-db", action="store_true", help="don't drop the load-test database before building fixtures")
+    run_parser.add_argument("--json-out", help="write the report as JSON")
+    run_parser.set_defaults(func=lambda args: asyncio.run(run(args)))
+
+    compare_parser = commands.add_parser("compare", help="diff two --json-out reports")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
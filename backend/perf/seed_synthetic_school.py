@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Synthetic school generator for performance testing.
+
+Fills the database named by MONGO_URL / DB_NAME with teachers, students,
+assignments, submissions, points, rewards, messages and spelling word lists
+built from the real models in server.py. Output is fully determined by
+--seed, and documents are written with concurrent unordered insert_many
+batches.
+
+Every generated account uses the password given by --password, so the load
+test harness can log in as any of them. Teachers are
+teacher<N>@seed.example.com and students are t<N>_s<M>.
+
+    # default: 2,000 teachers, 40,000 students, 2,000,000 submissions
+    python perf/seed_synthetic_school.py --drop
+
+    # small local dataset
+    python perf/seed_synthetic_school.py --teachers 20 --drop
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+from server import (  # noqa: E402
+    Assignment,
+    CodingExercise,
+    DragDropItem,
+    DragDropPuzzle,
+    DragDropZone,
+    InteractiveWordActivity,
+    LearnToReadContent,
+    Message,
+    PointTransaction,
+    Question,
+    Reward,
+    RewardRedemption,
+    SpellingWordList,
+    Student,
+    StudentAssignment,
+    User,
+)
+
+SEED_EPOCH = datetime(2025, 1, 6, 8, 0, tzinfo=timezone.utc)
+SEED_SPAN_SECONDS = 180 * 24 * 3600
+
+GRADES = ["1st Grade", "2nd Grade", "3rd Grade", "4th Grade", "5th Grade", "6th Grade",
+          "7th Grade", "8th Grade", "9th Grade", "10th Grade", "11th Grade", "12th Grade"]
+TOPICS = ["Fractions", "Photosynthesis", "The Solar System", "Ancient Egypt", "Volcanoes",
+          "Multiplication", "The Water Cycle", "Simple Machines", "Poetry", "Maps and Globes"]
+WORDS = ["apple", "bridge", "castle", "dragon", "engine", "forest", "garden", "harbor", "island",
+         "jungle", "kettle", "lantern", "meadow", "needle", "orange", "pepper", "quiver", "rocket",
+         "saddle", "turtle", "velvet", "wagon", "yellow", "zipper"]
+FIRST_NAMES = ["Ava", "Ben", "Cora", "Dev", "Eli", "Fay", "Gus", "Hana", "Ivan", "Jade", "Kai", "Lena"]
+LAST_NAMES = ["Adams", "Brooks", "Chen", "Diaz", "Evans", "Fischer", "Garcia", "Hughes", "Ito", "Jensen"]
+DEFAULT_REWARDS = [
+    ("1 Hour of Game Time", "Play games for 1 hour", 50),
+    ("2 Hours of Game Time", "Play games for 2 hours", 100),
+    ("12oz Coke", "Enjoy a cold 12oz Coke", 250),
+    ("TV at Night", "Watch TV at night for one night", 300),
+    ("One Day Off School", "Take a break! One day off from school", 400),
+]
+
+
+class Generator:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+
+    def uuid(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def timestamp(self, after: datetime = SEED_EPOCH, span: int = SEED_SPAN_SECONDS) -> datetime:
+        return after + timedelta(seconds=self.rng.randint(0, span))
+
+    def questions(self, count: int, topic: str):
+        return [
+            Question(
+                question=f"Question {n + 1} about {topic}?",
+                options=[f"{topic} option {c}" for c in "ABCD"],
+                correct_answer=self.rng.randint(0, 3),
+            )
+            for n in range(count)
+        ]
+
+    def assignment(self, teacher_id: str) -> Assignment:
+        rng = self.rng
+        topic = rng.choice(TOPICS)
+        grade = rng.choice(GRADES)
+        kind = rng.choices(
+            ["general", "reading", "code", "critical", "learn_to_read", "spelling"],
+            weights=[35, 20, 20, 10, 10, 5],
+        )[0]
+        fields = dict(
+            id=self.uuid(),
+            grade_level=grade,
+            topic=topic,
+            teacher_id=teacher_id,
+            created_at=self.timestamp(),
+        )
+
+        if kind == "reading":
+            paragraphs = rng.randint(2, 6)
+            passage = "\n\n".join(
+                " ".join(f"Sentence {s} of paragraph {p} about {topic}." for s in range(6))
+                for p in range(paragraphs)
+            )
+            return Assignment(title=f"Reading - {topic}", subject="Reading", questions=self.questions(4, topic),
+                              reading_passage=passage, **fields)
+        if kind == "code":
+            level = rng.randint(1, 4)
+            language = {1: None, 2: "html", 3: "javascript", 4: "python"}[level]
+            exercises = [] if language is None else [
+                CodingExercise(
+                    prompt=f"Exercise {n + 1}: write {language} for {topic}",
+                    language=language,
+                    starter_code=f"// starter {n}\n" * 3,
+                    correct_answer=f"print('{topic} {n}')",
+                    explanation="Prints the topic.",
+                )
+                for n in range(rng.randint(1, 2))
+            ]
+            return Assignment(title=f"Learn to Code - {topic} (Level {level})", subject="Learn to Code",
+                              questions=self.questions(rng.randint(2, 6), topic), coding_level=level,
+                              coding_exercises=exercises, **fields)
+        if kind == "critical":
+            size = rng.randint(3, 10)
+            items = [DragDropItem(id=f"item{n}", content=f"{topic} step {n}") for n in range(size)]
+            order = list(range(size))
+            rng.shuffle(order)
+            zones = [DragDropZone(id=f"zone{n}", label=f"Position {n + 1}", correct_item_id=f"item{order[n]}")
+                     for n in range(size)]
+            puzzle = DragDropPuzzle(prompt=f"Put the {topic} steps in order", items=items, zones=zones,
+                                    explanation="Follow the sequence.")
+            return Assignment(title=f"Critical Thinking Skills - {topic}", subject="Critical Thinking Skills",
+                              questions=[], drag_drop_puzzle=puzzle, **fields)
+        if kind == "learn_to_read":
+            story = [f"The {word} is big." for word in rng.sample(WORDS, rng.randint(5, 7))]
+            activities = [
+                InteractiveWordActivity(instruction=f"Click on the word '{story[i].split()[1]}'",
+                                        target_word=story[i].split()[1], sentence_index=i)
+                for i in range(rng.randint(3, 4))
+            ]
+            return Assignment(title=f"Learn to Read - {topic}", subject="Learn to Read", questions=[],
+                              learn_to_read_content=LearnToReadContent(story=story, activities=activities), **fields)
+        if kind == "spelling":
+            spelling_type = rng.choice(["practice", "test"])
+            return Assignment(title=f"Spelling {spelling_type.capitalize()} - {topic}", subject="Spelling",
+                              questions=[], spelling_type=spelling_type, spelling_word_list_id=self.uuid(),
+                              spelling_words=rng.sample(WORDS, 10), **fields)
+        return Assignment(title=f"Math - {topic}", subject="Math", questions=self.questions(rng.randint(5, 8), topic),
+                          **fields)
+
+    def answers_for(self, assignment: Assignment, accuracy: float) -> dict:
+        """Submission fields shaped like SubmissionRequest, right with probability `accuracy`."""
+        rng = self.rng
+
+        def pick(correct, wrong):
+            return correct if rng.random() < accuracy else wrong
+
+        answers = {"answers": [pick(q.correct_answer, (q.correct_answer + 1) % 4) for q in assignment.questions]}
+        if assignment.coding_exercises:
+            answers["coding_answers"] = [pick(ex.correct_answer, "") for ex in assignment.coding_exercises]
+        if assignment.drag_drop_puzzle:
+            answers["drag_drop_answer"] = {
+                zone.id: pick(zone.correct_item_id, "item-wrong") for zone in assignment.drag_drop_puzzle.zones
+            }
+        if assignment.learn_to_read_content:
+            answers["interactive_word_answers"] = [
+                pick(activity.target_word, "the") for activity in assignment.learn_to_read_content.activities
+            ]
+        if assignment.spelling_type == "practice":
+            answers["spelling_practice_answers"] = {
+                word: [pick(word, word[:-1]) for _ in range(3)] for word in assignment.spelling_words
+            }
+        elif assignment.spelling_type == "test":
+            answers["spelling_test_answers"] = [pick(word, word[::-1]) for word in assignment.spelling_words]
+        return answers
+
+
+class BatchWriter:
+    """Buffers documents per collection and flushes them with bounded concurrent insert_many calls."""
+
+    def __init__(self, database, batch_size: int, concurrency: int):
+        self.database = database
+        self.batch_size = batch_size
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.buffers = {}
+        self.counts = {}
+        self.pending = set()
+
+    async def add(self, collection: str, document: dict) -> None:
+        buffer = self.buffers.setdefault(collection, [])
+        buffer.append(document)
+        if len(buffer) >= self.batch_size:
+            self.buffers[collection] = []
+            await self._flush(collection, buffer)
+
+    async def _flush(self, collection: str, documents: list) -> None:
+        await self.semaphore.acquire()
+
+        async def insert():
+            try:
+                await self.database[collection].insert_many(documents, ordered=False)
+                self.counts[collection] = self.counts.get(collection, 0) + len(documents)
+            finally:
+                self.semaphore.release()
+
+        task = asyncio.create_task(insert())
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def close(self) -> None:
+        for collection, buffer in list(self.buffers.items()):
+            if buffer:
+                await self._flush(collection, buffer)
+        self.buffers.clear()
+        if self.pending:
+            await asyncio.gather(*self.pending)
+
+
+async def seed_teacher(gen: Generator, writer: BatchWriter, args, teacher_index: int, password_hash: str) -> None:
+    rng = gen.rng
+    teacher = User(
+        id=gen.uuid(),
+        email=f"teacher{teacher_index}@seed.example.com",
+        first_name=rng.choice(FIRST_NAMES),
+        last_name=rng.choice(LAST_NAMES),
+        role="teacher",
+        created_at=gen.timestamp(span=3600),
+    )
+    await writer.add("users", {**teacher.dict(), "password": password_hash})
+
+    rewards = []
+    for title, description, cost in DEFAULT_REWARDS:
+        reward = Reward(id=gen.uuid(), title=title, description=description, points_cost=cost,
+                        teacher_id=teacher.id, created_at=teacher.created_at)
+        rewards.append(reward)
+        await writer.add("rewards", reward.dict())
+
+    assignments = [gen.assignment(teacher.id) for _ in range(args.assignments_per_teacher)]
+    for assignment in assignments:
+        await writer.add("assignments", assignment.dict())
+
+    for student_index in range(args.students_per_teacher):
+        student = Student(
+            id=gen.uuid(),
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            username=f"t{teacher_index}_s{student_index}",
+            teacher_id=teacher.id,
+            created_at=gen.timestamp(span=7200),
+        )
+        await writer.add("students", {**student.dict(), "password": password_hash})
+
+        for list_index in range(args.word_lists_per_student):
+            word_list = SpellingWordList(
+                id=gen.uuid(), teacher_id=teacher.id, student_id=student.id, name=f"Week {list_index + 1} Words",
+                words=rng.sample(WORDS, 10), created_at=gen.timestamp(),
+                active=list_index == args.word_lists_per_student - 1,
+            )
+            await writer.add("spelling_word_lists", word_list.dict())
+
+        accuracy = rng.uniform(0.4, 1.0)
+        points = 0
+        for n in range(args.submissions_per_student):
+            # Cycle through the teacher's assignments so every student gets a spread of content types
+            assignment = assignments[(student_index + n) % len(assignments)] if assignments else None
+            if assignment is None:
+                break
+            assigned_at = gen.timestamp()
+            completed = rng.random() < args.completion_rate
+            fields = dict(id=gen.uuid(), assignment_id=assignment.id, student_id=student.id,
+                          teacher_id=teacher.id, assigned_at=assigned_at)
+            if completed:
+                score = round(rng.uniform(0, 100) * 0.3 + accuracy * 70, 2)
+                submitted_at = assigned_at + timedelta(hours=rng.randint(1, 72))
+                student_assignment = StudentAssignment(
+                    **fields, **gen.answers_for(assignment, accuracy), score=score, completed=True,
+                    submitted_at=submitted_at,
+                )
+                document = student_assignment.dict()
+                # submit_assignment stores submitted_at as an ISO string
+                document["submitted_at"] = submitted_at.isoformat()
+                if score >= 85:
+                    points += 5
+                    transaction = PointTransaction(
+                        id=gen.uuid(), student_id=student.id, points=5, transaction_type="earned",
+                        reference_id=assignment.id, description=f"Earned 5 points for scoring {round(score)}% on assignment",
+                        created_at=submitted_at,
+                    )
+                    await writer.add("point_transactions", transaction.dict())
+            else:
+                document = StudentAssignment(**fields).dict()
+            await writer.add("student_assignments", document)
+
+        affordable = [reward for reward in rewards if reward.points_cost <= points]
+        if affordable and rng.random() < 0.5:
+            reward = rng.choice(affordable)
+            redemption = RewardRedemption(
+                id=gen.uuid(), student_id=student.id, reward_id=reward.id, reward_title=reward.title,
+                reward_description=reward.description, points_spent=reward.points_cost, redeemed_at=gen.timestamp(),
+            )
+            await writer.add("reward_redemptions", redemption.dict())
+            await writer.add("point_transactions", PointTransaction(
+                id=gen.uuid(), student_id=student.id, points=-reward.points_cost, transaction_type="redeemed",
+                reference_id=redemption.id, description=f"Redeemed: {reward.title}", created_at=redemption.redeemed_at,
+            ).dict())
+
+        sent_at = gen.timestamp()
+        for n in range(args.messages_per_student):
+            sender, recipient = (teacher.id, student.id) if n % 2 == 0 else (student.id, teacher.id)
+            sent_at += timedelta(minutes=rng.randint(1, 600))
+            message = Message(id=gen.uuid(), sender_id=sender, recipient_id=recipient,
+                              content=f"Message {n} about {rng.choice(TOPICS)}", sent_at=sent_at,
+                              read=n < args.messages_per_student - 2)
+            await writer.add("messages", message.dict())
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teachers", type=int, default=2000)
+    parser.add_argument("--students-per-teacher", type=int, default=20)
+    parser.add_argument("--assignments-per-teacher", type=int, default=60)
+    parser.add_argument("--submissions-per-student", type=int, default=50)
+    parser.add_argument("--completion-rate", type=float, default=0.8)
+    parser.add_argument("--messages-per-student", type=int, default=10)
+    parser.add_argument("--word-lists-per-student", type=int, default=2)
+    parser.add_argument("--password", default="password123", help="password for every generated account")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=4, help="insert_many batches in flight")
+    parser.add_argument("--drop", action="store_true", help="drop the seeded collections first")
+    parser.add_argument("--no-indexes", action="store_true", help="skip building indexes after loading")
+    args = parser.parse_args()
+
+    await server.connect_to_mongo(warm_connections=args.concurrency)
+    database = server.db
+    collections = ["users", "students", "assignments", "student_assignments", "point_transactions",
+                   "rewards", "reward_redemptions", "messages", "spelling_word_lists"]
+    if args.drop:
+        for name in collections:
+            await database[name].drop()
+
+    print(f"Seeding {server.MONGO_DB_NAME}: {args.teachers} teachers x {args.students_per_teacher} students, "
+          f"{args.submissions_per_student} submissions per student (seed {args.seed})")
+    password_hash = server.hash_password(args.password)
+    gen = Generator(args.seed)
+    writer = BatchWriter(database, args.batch_size, args.concurrency)
+
+    started = time.perf_counter()
+    report_every = max(1, args.teachers // 20)
+    for teacher_index in range(args.teachers):
+        await seed_teacher(gen, writer, args, teacher_index, password_hash)
+        if (teacher_index + 1) % report_every == 0:
+            print(f"  {teacher_index + 1}/{args.teachers} teachers ({time.perf_counter() - started:.1f}s)")
+    await writer.close()
+    load_seconds = time.perf_counter() - started
+
+    total = sum(writer.counts.values())
+    print(f"Inserted {total:,} documents in {load_seconds:.1f}s ({total / load_seconds:,.0f} docs/s)")
+    for name in collections:
+        print(f"  {name:<22}{writer.counts.get(name, 0):>12,}")
+
+    if not args.no_indexes:
+        # Building indexes once after the bulk load is much faster than maintaining them per insert
+        report = await server.ensure_indexes(database)
+        server.log_index_report(report)
+
+    await server.close_mongo()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
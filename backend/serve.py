@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Production entry point: runs server:app under uvicorn with one worker process per CPU.
+
+Each worker builds its own Mongo client, password-hashing pool, caches and
+monitors in the app's lifespan handler and closes them on shutdown. Nothing
+is shared between workers. This supervisor never imports server.py, so no
+client or thread exists before the workers start.
+
+    python serve.py                      # workers = usable CPUs
+    python serve.py --workers 4 --port 8001
+    WEB_CONCURRENCY=2 python serve.py
+
+Every worker opens its own pool, so Mongo sees up to
+workers x MONGO_MAX_POOL_SIZE connections. Per-process state such as
+/metrics, /api/stats, the principal cache and the LLM circuit breaker is
+also per worker.
+
+gunicorn works the same way if you prefer its process management:
+
+    gunicorn server:app -k uvicorn.workers.UvicornWorker -w "$(nproc)" --preload
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import uvicorn
+
+
+def usable_cpus() -> int:
+    # Honour CPU affinity (taskset, container cpusets) where the platform exposes it
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def default_workers() -> int:
+    configured = os.environ.get("WEB_CONCURRENCY")
+    if configured:
+        return max(1, int(configured))
+    return max(1, usable_cpus())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8001")))
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="worker processes (default: WEB_CONCURRENCY, else usable CPUs)")
+    parser.add_argument("--log-level", default=os.environ.get("LOG_LEVEL", "info"))
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.environ.get("GRACEFUL_TIMEOUT", "30")),
+                        help="seconds to let in-flight requests finish on shutdown")
+    args = parser.parse_args()
+
+    # Workers import server.py by module path, so it must be importable from here
+    backend_dir = str(Path(__file__).resolve().parent)
+    sys.path.insert(0, backend_dir)
+    os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [backend_dir, os.environ.get("PYTHONPATH")]))
+
+    print(f"Starting {args.workers} worker(s) on {args.host}:{args.port} ({usable_cpus()} usable CPUs)", flush=True)
+    uvicorn.run(
+        "server:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+        proxy_headers=True,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,154 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.datastructures import MutableHeaders
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, IndexModel, ReturnDocument, UpdateOne, monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
 import os
+import asyncio
 import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, ValidationError
 from typing import List, Optional
 import uuid
 from datetime import datetime, timezone, timedelta
 import bcrypt
+from cachetools import TTLCache
 from jose import JWTError, jwt
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+import importlib
 import json
+import orjson
+import csv
+import io
+import hashlib
+import secrets
+import gzip
+import base64
+import binascii
+import functools
+import random
+import re
+from bisect import bisect_left
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection (the client is created by connect_to_mongo in the lifespan handler)
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+MONGO_DB_NAME = os.environ['DB_NAME']
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '10000'))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+MONGO_WARM_CONNECTIONS = int(os.environ.get('MONGO_WARM_CONNECTIONS', '4'))
+client = None
+db = None
+
+# Per-request database operation accounting
+DB_QUERY_BUDGET = int(os.environ.get('DB_QUERY_BUDGET', '50'))
+DB_QUERY_DEBUG_HEADERS = os.environ.get('DB_QUERY_DEBUG_HEADERS', 'false').lower() == 'true'
+
+# Response compression: bodies below the threshold, or on excluded path
+# prefixes, go out as-is
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '4'))
+COMPRESSION_EXCLUDED_PATHS = tuple(
+    path for path in os.environ.get('COMPRESSION_EXCLUDED_PATHS', '/metrics,/api/health,/api/auth').split(',') if path
+)
+
+# Index bootstrap at startup: "create" (default), "dry-run" (only report missing) or "off"
+MONGO_INDEX_BOOTSTRAP = os.environ.get('MONGO_INDEX_BOOTSTRAP', 'create').lower()
 
 # JWT Settings
 SECRET_KEY = "homeschool_hub_secret_key_2024"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.environ.get('REFRESH_TOKEN_EXPIRE_DAYS', '14'))
+
+# Principal cache settings (resolved teacher/student documents keyed by token `sub`)
+PRINCIPAL_CACHE_MAX_SIZE = int(os.environ.get('PRINCIPAL_CACHE_MAX_SIZE', '10000'))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.environ.get('PRINCIPAL_CACHE_TTL_SECONDS', '60'))
+
+# Password hashing pool: bcrypt work runs here so it never blocks the event loop
+PASSWORD_HASH_CONCURRENCY = int(os.environ.get('PASSWORD_HASH_CONCURRENCY', str(min(4, os.cpu_count() or 1))))
+
+# LLM provider: "gemini" (live) or "fake" (local stand-in, replays recordings when available)
+LLM_PROVIDER = os.environ.get('LLM_PROVIDER', 'gemini').lower()
+LLM_RECORDINGS_DIR = Path(os.environ.get('LLM_RECORDINGS_DIR', str(ROOT_DIR / 'llm_recordings')))
+LLM_RECORD = os.environ.get('LLM_RECORD', 'false').lower() == 'true'
+FAKE_LLM_LATENCY_MS = float(os.environ.get('FAKE_LLM_LATENCY_MS', '0'))
+FAKE_LLM_LATENCY_JITTER_MS = float(os.environ.get('FAKE_LLM_LATENCY_JITTER_MS', '0'))
+FAKE_LLM_ERROR_RATE = float(os.environ.get('FAKE_LLM_ERROR_RATE', '0'))
+# Import the LLM SDK at worker startup instead of on the first live generation
+LLM_PRELOAD = os.environ.get('LLM_PRELOAD', 'false').lower() == 'true'
+
+# Generated assignment content cache (db.generation_cache), shared by all workers
+GENERATION_CACHE_ENABLED = os.environ.get('GENERATION_CACHE_ENABLED', 'true').lower() == 'true'
+GENERATION_CACHE_TTL_SECONDS = int(os.environ.get('GENERATION_CACHE_TTL_SECONDS', str(30 * 24 * 3600)))
+GENERATION_CACHE_MAX_ENTRIES = int(os.environ.get('GENERATION_CACHE_MAX_ENTRIES', '10000'))
+
+# Background generation jobs (db.generation_jobs): runner tasks per worker process,
+# how long a claimed job is leased, and how long finished jobs are kept
+GENERATION_JOB_WORKERS = int(os.environ.get('GENERATION_JOB_WORKERS', '4'))
+GENERATION_JOB_LEASE_SECONDS = float(os.environ.get('GENERATION_JOB_LEASE_SECONDS', '120'))
+GENERATION_JOB_POLL_SECONDS = float(os.environ.get('GENERATION_JOB_POLL_SECONDS', '1.0'))
+GENERATION_JOB_MAX_ATTEMPTS = int(os.environ.get('GENERATION_JOB_MAX_ATTEMPTS', '3'))
+GENERATION_JOB_RETENTION_SECONDS = int(os.environ.get('GENERATION_JOB_RETENTION_SECONDS', str(7 * 24 * 3600)))
+GENERATION_JOB_SSE_KEEPALIVE_SECONDS = float(os.environ.get('GENERATION_JOB_SSE_KEEPALIVE_SECONDS', '15'))
+
+# How long shutdown waits for background work, such as saving a streamed lesson plan
+BACKGROUND_TASK_DRAIN_SECONDS = float(os.environ.get('BACKGROUND_TASK_DRAIN_SECONDS', '30'))
+
+# LLM circuit breaker: stop calling the provider after repeated failures
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('LLM_CIRCUIT_FAILURE_THRESHOLD', '5'))
+LLM_CIRCUIT_RESET_SECONDS = float(os.environ.get('LLM_CIRCUIT_RESET_SECONDS', '60'))
+
+# Readiness thresholds
+READINESS_MONGO_TIMEOUT_MS = float(os.environ.get('READINESS_MONGO_TIMEOUT_MS', '2000'))
+READINESS_MONGO_DEGRADED_MS = float(os.environ.get('READINESS_MONGO_DEGRADED_MS', '100'))
+READINESS_LOOP_LAG_DEGRADED_MS = float(os.environ.get('READINESS_LOOP_LAG_DEGRADED_MS', '100'))
+READINESS_LOOP_LAG_UNHEALTHY_MS = float(os.environ.get('READINESS_LOOP_LAG_UNHEALTHY_MS', '1000'))
+READINESS_EXECUTOR_QUEUE_DEGRADED = int(os.environ.get('READINESS_EXECUTOR_QUEUE_DEGRADED', '20'))
+READINESS_EXECUTOR_QUEUE_UNHEALTHY = int(os.environ.get('READINESS_EXECUTOR_QUEUE_UNHEALTHY', '100'))
+READINESS_DEGRADED_STATUS_CODE = int(os.environ.get('READINESS_DEGRADED_STATUS_CODE', '200'))
+EVENT_LOOP_LAG_SAMPLE_SECONDS = float(os.environ.get('EVENT_LOOP_LAG_SAMPLE_SECONDS', '0.5'))
+
+# Bulk roster import
+BULK_STUDENT_IMPORT_MAX_ROWS = int(os.environ.get('BULK_STUDENT_IMPORT_MAX_ROWS', '1000'))
+
+# Trust role-typed token claims on read-only routes instead of loading the principal
+STATELESS_READ_AUTH = os.environ.get('STATELESS_READ_AUTH', 'false').lower() == 'true'
+
+# List pagination: page size bounds, and whether requests without limit/cursor
+# keep the old unpaginated response (up to 1000 rows) for the current frontend
+PAGE_SIZE_DEFAULT = int(os.environ.get('PAGE_SIZE_DEFAULT', '50'))
+PAGE_SIZE_MAX = int(os.environ.get('PAGE_SIZE_MAX', '200'))
+LEGACY_LIST_RESPONSES = os.environ.get('LEGACY_LIST_RESPONSES', 'true').lower() == 'true'
 
 # Security
 security = HTTPBearer()
 
+def app_lifespan(app: FastAPI):
+    # lifespan() is defined at the end of the module, after everything it
+    # starts and stops; it is looked up when the app starts, not here
+    return lifespan(app)
+
 # Create the main app without a prefix
-app = FastAPI(title="Homeschool Hub API")
+app = FastAPI(title="Homeschool Hub API", default_response_class=ORJSONResponse, lifespan=app_lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -84,6 +200,7 @@ class AssignmentGenerate(BaseModel):
     youtube_url: Optional[str] = None
     spelling_type: Optional[str] = None  # "practice" or "test" for Spelling assignments
     student_ids: Optional[List[str]] = None  # For spelling, need to know which students
+    force_regenerate: bool = False  # Skip the generation cache and replace its entry
 
 class Question(BaseModel):
     question: str
@@ -121,6 +238,14 @@ class LearnToReadContent(BaseModel):
     story: List[str]  # List of 5-7 short sentences
     activities: List[InteractiveWordActivity]  # Interactive word-click activities
 
+class GeneratedAssignmentContent(BaseModel):
+    """The parts of an Assignment that generate_assignment_with_ai produces."""
+    questions: List[Question]
+    reading_passage: Optional[str] = None
+    coding_exercises: List[CodingExercise] = []
+    drag_drop_puzzle: Optional[DragDropPuzzle] = None
+    learn_to_read_content: Optional[LearnToReadContent] = None
+
 class SpellingWordList(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     teacher_id: str
@@ -245,6 +370,20 @@ class LessonPlan(BaseModel):
     teacher_id: str
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+# Generation Job Models
+class GenerationJob(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    kind: str  # "assignment" or "lesson_plan"
+    status: str = "queued"  # queued -> running -> succeeded | failed (running -> queued on retry)
+    params: dict  # The AssignmentGenerate / LessonPlanGenerate request
+    teacher_id: str
+    attempts: int = 0
+    error: Optional[str] = None
+    result_id: Optional[str] = None  # Assignment or lesson plan id once succeeded
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
 # Message Models
 class MessageCreate(BaseModel):
     recipient_id: str
@@ -263,6 +402,199 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     user: dict
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class TokenRefresh(BaseModel):
+    access_token: str
+    token_type: str
+    refresh_token: str
+
+# Response serialization
+# Documents read back from Mongo were written from these models, so read
+# routes skip re-validating them and render straight through orjson.
+@functools.lru_cache(maxsize=None)
+def _model_fields(model_cls):
+    return tuple(model_cls.model_fields.items())
+
+def trusted_dump(model_cls, document: dict) -> dict:
+    """Equivalent of model_cls(**document).dict() for stored documents, without validation.
+
+    Keeps only the model's fields (so `_id` and secrets such as the stored
+    `password` hash never leak) and fills defaults for missing ones.
+    """
+    return {
+        name: document[name] if name in document else (None if field.is_required() else field.get_default(call_default_factory=True))
+        for name, field in _model_fields(model_cls)
+    }
+
+def trusted_response(model_cls, documents: List[dict], next_cursor: Optional[str] = None) -> ORJSONResponse:
+    return ORJSONResponse([trusted_dump(model_cls, document) for document in documents], headers=page_headers(next_cursor))
+
+# Read projections: every find/find_one names only the fields its caller uses
+def model_projection(model_cls, *extra_fields: str) -> dict:
+    projection = {name: 1 for name in model_cls.model_fields}
+    projection.update({name: 1 for name in extra_fields})
+    projection["_id"] = 0
+    return projection
+
+# Existence checks only need a match, not the document
+EXISTS_PROJECTION = {"_id": 1}
+TEACHER_PRINCIPAL_PROJECTION = {"_id": 0, "id": 1}
+STUDENT_PRINCIPAL_PROJECTION = {"_id": 0, "id": 1, "teacher_id": 1}
+TEACHER_LOGIN_PROJECTION = model_projection(User, "password")
+STUDENT_LOGIN_PROJECTION = model_projection(Student, "password")
+REFRESH_ROTATION_PROJECTION = {"_id": 0, "claims": 1, "family_id": 1}
+REFRESH_FAMILY_PROJECTION = {"_id": 0, "family_id": 1}
+USERNAME_PROJECTION = {"_id": 0, "username": 1}
+STUDENT_PROJECTION = model_projection(Student)
+CONTACT_PROJECTION = {"_id": 0, "id": 1, "first_name": 1, "last_name": 1}
+STUDENT_POINTS_SUMMARY_PROJECTION = {"_id": 0, "id": 1, "first_name": 1, "last_name": 1, "username": 1}
+ASSIGNMENT_PROJECTION = model_projection(Assignment)
+GRADEBOOK_ASSIGNMENT_PROJECTION = {"_id": 0, "title": 1, "subject": 1}
+# Only what grade_submission reads; content and prompts stay on the server
+GRADING_ASSIGNMENT_PROJECTION = {
+    "_id": 0,
+    "questions.correct_answer": 1,
+    "coding_exercises.correct_answer": 1,
+    "drag_drop_puzzle.zones": 1,
+    "learn_to_read_content.activities.target_word": 1,
+    "spelling_type": 1,
+    "spelling_words": 1
+}
+STUDENT_ASSIGNMENT_SUMMARY_PROJECTION = {
+    "_id": 0, "id": 1, "assignment_id": 1, "completed": 1, "score": 1, "submitted_at": 1, "assigned_at": 1
+}
+STUDENT_ASSIGNMENT_DETAIL_PROJECTION = {
+    **STUDENT_ASSIGNMENT_SUMMARY_PROJECTION,
+    "answers": 1,
+    "coding_answers": 1,
+    "drag_drop_answer": 1,
+    "interactive_word_answers": 1,
+    "spelling_practice_answers": 1,
+    "spelling_test_answers": 1
+}
+SUBMISSION_STATE_PROJECTION = {"_id": 0, "assignment_id": 1, "completed": 1}
+GRADEBOOK_ENTRY_PROJECTION = {"_id": 0, "assignment_id": 1, "score": 1, "submitted_at": 1}
+LESSON_PLAN_PROJECTION = model_projection(LessonPlan)
+MESSAGE_PROJECTION = model_projection(Message)
+REWARD_PROJECTION = model_projection(Reward)
+REDEEMABLE_REWARD_PROJECTION = {"_id": 0, "id": 1, "title": 1, "description": 1, "points_cost": 1}
+POINT_TRANSACTION_PROJECTION = model_projection(PointTransaction)
+POINTS_ONLY_PROJECTION = {"_id": 0, "points": 1}
+REWARD_REDEMPTION_PROJECTION = model_projection(RewardRedemption)
+SPELLING_WORD_LIST_PROJECTION = model_projection(SpellingWordList)
+SPELLING_WORDS_PROJECTION = {"_id": 0, "id": 1, "words": 1}
+VERSION_PROJECTION = {"_id": 0, "version": 1}
+GENERATION_CACHE_PROJECTION = {"_id": 0, "content": 1, "generation_ms": 1}
+GENERATION_JOB_PROJECTION = model_projection(GenerationJob)
+GENERATION_JOB_CLAIM_PROJECTION = {"_id": 0, "id": 1, "kind": 1, "params": 1, "teacher_id": 1, "attempts": 1}
+
+# List pagination
+# Pages are ordered by (sort field, id) ascending. The cursor is an opaque
+# token holding the last row's position; the next page resumes after it.
+class PageRequest:
+    __slots__ = ("limit", "cursor")
+
+    def __init__(self, limit: int, cursor: Optional[str] = None):
+        self.limit = limit
+        self.cursor = cursor
+
+def page_params(
+    limit: Optional[int] = Query(None, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = Query(None)
+) -> Optional[PageRequest]:
+    """List route dependency; None means the legacy unpaginated response."""
+    if limit is None and cursor is None and LEGACY_LIST_RESPONSES:
+        return None
+    return PageRequest(limit or PAGE_SIZE_DEFAULT, cursor)
+
+def encode_cursor(sort_field: str, document: dict) -> str:
+    position = json.dumps([sort_field, document[sort_field].isoformat(), document["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_field: str) -> tuple:
+    try:
+        field, value, document_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if field != sort_field:
+            raise ValueError("cursor belongs to another list")
+        return datetime.fromisoformat(value), str(document_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+async def fetch_page(collection, query: dict, projection: dict, sort_field: str, page: Optional[PageRequest]):
+    """Return (documents, next_cursor) for one page of `query`.
+
+    With no page request this is the legacy read of up to 1000 documents,
+    in the same stable order.
+    """
+    order = [(sort_field, ASCENDING), ("id", ASCENDING)]
+    if page is None:
+        return await collection.find(query, projection).sort(order).to_list(1000), None
+    
+    if page.cursor:
+        after_value, after_id = decode_cursor(page.cursor, sort_field)
+        query = {"$and": [query, {"$or": [
+            {sort_field: {"$gt": after_value}},
+            {sort_field: after_value, "id": {"$gt": after_id}}
+        ]}]}
+    
+    # One extra row tells us whether another page exists
+    documents = await collection.find(query, projection).sort(order).limit(page.limit + 1).to_list(page.limit + 1)
+    if len(documents) > page.limit:
+        documents = documents[:page.limit]
+        return documents, encode_cursor(sort_field, documents[-1])
+    return documents, None
+
+def page_headers(next_cursor: Optional[str]) -> Optional[dict]:
+    return {"X-Next-Cursor": next_cursor} if next_cursor else None
+
+# Conditional GET
+# collection_versions holds one counter per (list, owner), e.g.
+# "assignments:<teacher_id>". Write handlers bump it after changing the data,
+# so a read that sees version N also sees every write up to N. ETags derive
+# from the counter, which lets If-None-Match be answered before any list query.
+NOT_MODIFIED_HEADERS = {"Cache-Control": "private, no-cache"}
+
+async def bump_versions(scope: str, *owner_ids: str) -> None:
+    now = datetime.now(timezone.utc)
+    await db.collection_versions.bulk_write([
+        UpdateOne({"_id": f"{scope}:{owner_id}"}, {"$inc": {"version": 1}, "$set": {"updated_at": now}}, upsert=True)
+        for owner_id in set(owner_ids)
+    ], ordered=False)
+
+async def collection_version(scope: str, owner_id: str) -> int:
+    document = await db.collection_versions.find_one({"_id": f"{scope}:{owner_id}"}, VERSION_PROJECTION)
+    return document["version"] if document else 0
+
+def make_etag(scope: str, owner_id: str, version: int, request: Request, variant: str = "") -> str:
+    # The query string (limit/cursor) and list settings change the body too
+    representation = f"{scope}:{owner_id}:{version}:{variant}:{request.url.query}:{LEGACY_LIST_RESPONSES}:{PAGE_SIZE_DEFAULT}"
+    return '"' + hashlib.sha256(representation.encode()).hexdigest()[:32] + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"; compressed
+    # responses carry the tag with an encoding suffix, e.g. "x-gzip"
+    return any(_strip_encoding_suffix(tag.strip().removeprefix("W/")) == etag for tag in header.split(","))
+
+async def check_not_modified(request: Request, scope: str, owner_id: str, variant: str = ""):
+    """Return (etag, 304 response or None) for a versioned list read."""
+    etag = make_etag(scope, owner_id, await collection_version(scope, owner_id), request, variant)
+    if etag_matches(request, etag):
+        return etag, Response(status_code=304, headers={"ETag": etag, **NOT_MODIFIED_HEADERS})
+    return etag, None
+
+def with_etag(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers.update(NOT_MODIFIED_HEADERS)
+    return response
 
 # Auth Helper Functions
 def hash_password(password: str) -> str:
@@ -271,6 +603,77 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+class PasswordHasher:
+    """Runs bcrypt hashing/verification on a bounded thread pool.
+
+    Admission is controlled by a semaphore on the event loop, so the executor
+    never queues work internally and all counters are only touched from the
+    loop thread. `queue_depth` is the number of callers waiting for a slot.
+    The pool is created by start() (the lifespan handler, once per worker
+    process) or lazily on first use, never at import.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = None
+        self._semaphore = None
+        self.queue_depth = 0
+        self.peak_queue_depth = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+
+    async def _run(self, func, *args):
+        self.start()
+        enqueued = time.perf_counter()
+        self.queue_depth += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, self.queue_depth)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queue_depth -= 1
+        started = time.perf_counter()
+        self.total_wait_seconds += started - enqueued
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self.total_run_seconds += time.perf_counter() - started
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(verify_password, password, hashed)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._semaphore = None
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "queue_depth": self.queue_depth,
+            "peak_queue_depth": self.peak_queue_depth,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "avg_wait_ms": (self.total_wait_seconds / self.completed * 1000) if self.completed else 0.0,
+            "avg_run_ms": (self.total_run_seconds / self.completed * 1000) if self.completed else 0.0,
+        }
+
+password_hasher = PasswordHasher(PASSWORD_HASH_CONCURRENCY)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -281,41 +684,495 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    credentials_exception = HTTPException(
+def _hash_refresh_token(refresh_token: str) -> str:
+    # Refresh tokens are high-entropy random strings, so a fast hash is enough
+    return hashlib.sha256(refresh_token.encode('utf-8')).hexdigest()
+
+async def issue_refresh_token(claims: dict, family_id: Optional[str] = None, token_id: Optional[str] = None) -> str:
+    refresh_token = secrets.token_urlsafe(48)
+    now = datetime.now(timezone.utc)
+    await db.refresh_tokens.insert_one({
+        "id": token_id or str(uuid.uuid4()),
+        "token_hash": _hash_refresh_token(refresh_token),
+        "family_id": family_id or str(uuid.uuid4()),
+        "user_id": claims["sub"],
+        "claims": {key: value for key, value in claims.items() if key != "exp"},
+        "created_at": now,
+        "expires_at": now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        "revoked": False,
+        "revoked_at": None,
+        "replaced_by": None
+    })
+    return refresh_token
+
+async def revoke_refresh_tokens(query: dict) -> None:
+    await db.refresh_tokens.update_many(
+        {**query, "revoked": False},
+        {"$set": {"revoked": True, "revoked_at": datetime.now(timezone.utc)}}
+    )
+
+class PrincipalCache:
+    """Bounded TTL/LRU cache of resolved principals, keyed by the token `sub`.
+
+    Entries must be invalidated whenever the underlying user or student
+    document changes or is removed, otherwise a stale principal can keep
+    authenticating until its TTL runs out.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id: str) -> Optional[dict]:
+        principal = self._cache.get(user_id)
+        if principal is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return principal
+
+    def set(self, user_id: str, principal: dict) -> None:
+        self._cache[user_id] = principal
+
+    def invalidate(self, user_id: str) -> None:
+        if self._cache.pop(user_id, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "max_size": self._cache.maxsize,
+            "ttl_seconds": self._cache.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_MAX_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
+
+def token_claims(principal_type: str, data: dict) -> dict:
+    """Claims for an access token; the role lets resolution go straight to one collection."""
+    claims = {"sub": data["id"], "role": principal_type}
+    if principal_type == "student":
+        claims["teacher_id"] = data["teacher_id"]
+    return claims
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def decode_access_token(token: str) -> dict:
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        raise credentials_exception()
+    if payload.get("sub") is None:
+        raise credentials_exception()
+    return payload
+
+async def resolve_principal(payload: dict) -> dict:
+    user_id: str = payload["sub"]
+    role = payload.get("role")
+    
+    principal = principal_cache.get(user_id)
+    if principal:
+        return principal
     
-    # Check if it's a teacher or student
-    user = await db.users.find_one({"id": user_id})
-    if user:
-        return {"type": "teacher", "data": user}
+    # Role-typed tokens hit exactly one collection; tokens issued before the
+    # role claim existed fall back to probing teachers first, then students
+    if role in (None, "teacher"):
+        user = await db.users.find_one({"id": user_id}, TEACHER_PRINCIPAL_PROJECTION)
+        if user:
+            principal = {"type": "teacher", "data": user}
+            principal_cache.set(user_id, principal)
+            return principal
     
-    student = await db.students.find_one({"id": user_id})
-    if student:
-        return {"type": "student", "data": student}
+    if role in (None, "student"):
+        student = await db.students.find_one({"id": user_id}, STUDENT_PRINCIPAL_PROJECTION)
+        if student:
+            principal = {"type": "student", "data": student}
+            principal_cache.set(user_id, principal)
+            return principal
     
-    raise credentials_exception
+    raise credentials_exception()
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    payload = decode_access_token(credentials.credentials)
+    return await resolve_principal(payload)
+
+async def get_current_user_readonly(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Principal for read-only routes.
+
+    With STATELESS_READ_AUTH enabled, role-typed tokens are trusted as-is and
+    no database lookup is made; `data` then only carries `id` (and
+    `teacher_id` for students). A deleted account keeps read access until its
+    token expires, so the mode is off by default.
+    """
+    payload = decode_access_token(credentials.credentials)
+    role = payload.get("role")
+    if STATELESS_READ_AUTH and role in ("teacher", "student"):
+        data = {"id": payload["sub"]}
+        if role == "student":
+            if not payload.get("teacher_id"):
+                return await resolve_principal(payload)
+            data["teacher_id"] = payload["teacher_id"]
+        return {"type": role, "data": data}
+    return await resolve_principal(payload)
 
 # AI Helper Function
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures.
+
+    While open, calls are refused until `reset_seconds` have passed; then a
+    single trial call is let through (half-open) and its outcome closes or
+    re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.total_failures = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self.total_failures += 1
+        if self.trial_in_flight or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.trial_in_flight = False
+
+    def record_abandoned(self) -> None:
+        # Cancelled or closed before an outcome: not a provider failure, but
+        # the trial slot must be freed or every later call is refused
+        self.trial_in_flight = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "total_failures": self.total_failures,
+            "rejected": self.rejected,
+        }
+
+llm_circuit = CircuitBreaker(LLM_CIRCUIT_FAILURE_THRESHOLD, LLM_CIRCUIT_RESET_SECONDS)
+
+def llm_recording_key(subject: str, coding_level: Optional[int] = None) -> str:
+    """Recording bucket for a generation, e.g. "reading" or "learn-to-code-3"."""
+    key = re.sub(r"[^a-z0-9]+", "-", subject.lower()).strip("-") or "general"
+    if key == "learn-to-code" and coding_level:
+        key = f"{key}-{coding_level}"
+    return key
+
+def _fake_questions(count: int) -> List[dict]:
+    return [
+        {
+            "question": f"Practice question {n + 1}?",
+            "options": ["Option A", "Option B", "Option C", "Option D"],
+            "correct_answer": n % 4
+        }
+        for n in range(count)
+    ]
+
+def _fake_llm_response(recording_key: str) -> str:
+    """Canned response in the shape each prompt asks for."""
+    if recording_key == "lesson-plan":
+        sections = ["Learning Objectives", "Materials Needed", "Lesson Activities", "Assessment Methods", "Extension Activities"]
+        return "\n\n".join(f"## {n + 1}. {title}\n- Step one\n- Step two\n- Step three" for n, title in enumerate(sections))
+    if recording_key == "reading":
+        return json.dumps({"reading_passage": "Once upon a time there was a curious fox.\n\nThe fox learned something new every day.", "questions": _fake_questions(4)})
+    if recording_key == "critical-thinking-skills":
+        return json.dumps({
+            "drag_drop_puzzle": {
+                "prompt": "Put the numbers in order from smallest to largest",
+                "items": [{"id": f"item{n}", "content": str(n * 2)} for n in range(1, 5)],
+                "zones": [{"id": f"zone{n}", "label": f"Position {n}", "correct_item_id": f"item{n}"} for n in range(1, 5)],
+                "explanation": "Each number is two more than the last."
+            },
+            "questions": []
+        })
+    if recording_key == "learn-to-read":
+        story = ["The cat is big.", "The cat can run.", "The dog can sit.", "The sun is hot.", "We like to play."]
+        activities = [
+            {"instruction": "Click on the word 'cat'", "target_word": "cat", "sentence_index": 0},
+            {"instruction": "Find and click the word 'run'", "target_word": "run", "sentence_index": 1},
+            {"instruction": "Click on the word 'sun'", "target_word": "sun", "sentence_index": 3}
+        ]
+        return json.dumps({"learn_to_read_content": {"story": story, "activities": activities}, "questions": []})
+    if recording_key.startswith("learn-to-code-") and recording_key != "learn-to-code-1":
+        language = {"learn-to-code-2": "html", "learn-to-code-3": "javascript"}.get(recording_key, "python")
+        return json.dumps({
+            "questions": _fake_questions(3),
+            "coding_exercises": [{
+                "prompt": f"Write a short {language} program",
+                "language": language,
+                "starter_code": "",
+                "correct_answer": "print('Hello World!')",
+                "explanation": "Prints a greeting."
+            }]
+        })
+    return json.dumps({"questions": _fake_questions(6)})
+
+class FakeLlmChat:
+    """Local LlmChat stand-in with configurable latency and error rate.
+
+    Replays a recorded response from LLM_RECORDINGS_DIR/<recording_key>/
+    when there is one, otherwise returns canned content for the subject.
+    Recordings are read the first time a key is used; restart the process
+    to pick up new ones.
+    stream_message yields the same response line by line, spreading the
+    latency across the lines.
+    """
+
+    _rng = random.Random()
+    # recording_key -> recorded responses, read from disk once per process
+    _recordings = {}
+
+    def __init__(self, recording_key: str):
+        self.recording_key = recording_key
+        if recording_key not in self._recordings:
+            self._recordings[recording_key] = [
+                path.read_text() for path in sorted((LLM_RECORDINGS_DIR / recording_key).glob("*.txt"))
+            ]
+        self.recordings = self._recordings[recording_key]
+
+    def _response(self) -> str:
+        if self.recordings:
+            return self._rng.choice(self.recordings)
+        return _fake_llm_response(self.recording_key)
+
+    def _latency_seconds(self) -> float:
+        return max(0.0, FAKE_LLM_LATENCY_MS + self._rng.uniform(0, FAKE_LLM_LATENCY_JITTER_MS)) / 1000
+
+    async def send_message(self, message) -> str:
+        delay = self._latency_seconds()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self._rng.random() < FAKE_LLM_ERROR_RATE:
+            raise RuntimeError("Fake LLM provider error")
+        return self._response()
+
+    async def stream_message(self, message):
+        chunks = self._response().splitlines(keepends=True) or [""]
+        delay = self._latency_seconds() / len(chunks)
+        fail_at = self._rng.randrange(len(chunks)) if self._rng.random() < FAKE_LLM_ERROR_RATE else None
+        for index, chunk in enumerate(chunks):
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if index == fail_at:
+                raise RuntimeError("Fake LLM provider error")
+            yield chunk
+
+class RecordingLlmChat:
+    """Wraps a live chat and saves each response for later replay by FakeLlmChat."""
+
+    def __init__(self, chat, recording_key: str):
+        self._chat = chat
+        self.recording_key = recording_key
+
+    def _save(self, response: str) -> None:
+        directory = LLM_RECORDINGS_DIR / self.recording_key
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}_{uuid.uuid4().hex[:8]}.txt").write_text(response)
+
+    async def send_message(self, message) -> str:
+        response = await self._chat.send_message(message)
+        self._save(response)
+        return response
+
+    async def stream_message(self, message):
+        if not hasattr(self._chat, "stream_message"):
+            yield await self.send_message(message)
+            return
+        chunks = []
+        async for chunk in self._chat.stream_message(message):
+            chunks.append(chunk)
+            yield chunk
+        self._save("".join(chunks))
+
+class LlmSdk:
+    """Deferred import of an LLM SDK module (emergentintegrations.llm.chat, google.genai).
+
+    The SDKs pull in the Google GenAI and gRPC stack, which costs start-up
+    time and memory in every worker, while most workers (and the fake
+    provider) never call them. The first live generation imports the module
+    on a thread, so the event loop keeps serving other requests meanwhile.
+    """
+
+    def __init__(self, module: str):
+        self.module = module
+        self._module = None
+        self._lock = threading.Lock()
+        self.import_ms = None
+
+    def load(self):
+        with self._lock:
+            if self._module is None:
+                started = time.perf_counter()
+                self._module = importlib.import_module(self.module)
+                self.import_ms = (time.perf_counter() - started) * 1000
+                logger.info(f"Loaded {self.module} in {self.import_ms:.1f}ms")
+        return self._module
+
+    async def load_async(self):
+        if self._module is not None:
+            return self._module
+        return await asyncio.to_thread(self.load)
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self._module is not None,
+            "import_ms": round(self.import_ms, 1) if self.import_ms is not None else None
+        }
+
+llm_sdk = LlmSdk("emergentintegrations.llm.chat")
+genai_sdk = LlmSdk("google.genai")
+
+GEMINI_MODEL = "gemini-2.5-pro"
+
+class GeminiStreamingChat:
+    """Gemini chat on google-genai, for callers that stream the response.
+
+    The emergentintegrations LlmChat only returns whole responses. This
+    talks to the same model through generate_content_stream, so text
+    reaches the caller as Gemini produces it. One SDK client per process
+    is shared by every chat.
+    """
+
+    _client = None
+
+    def __init__(self, system_message: str):
+        if GeminiStreamingChat._client is None:
+            GeminiStreamingChat._client = genai_sdk.load().Client(api_key=os.environ['GEMINI_API_KEY'])
+        self.config = {"system_instruction": system_message}
+
+    async def send_message(self, message: str) -> str:
+        response = await self._client.aio.models.generate_content(model=GEMINI_MODEL, contents=message, config=self.config)
+        return response.text or ""
+
+    async def stream_message(self, message: str):
+        stream = await self._client.aio.models.generate_content_stream(model=GEMINI_MODEL, contents=message, config=self.config)
+        async for chunk in stream:
+            if chunk.text:
+                yield chunk.text
+
+async def create_llm_chat(session_prefix: str, system_message: str, recording_key: str, streaming: bool = False):
+    if LLM_PROVIDER == "fake":
+        return FakeLlmChat(recording_key)
+    if streaming:
+        await genai_sdk.load_async()
+        chat = GeminiStreamingChat(system_message)
+    else:
+        sdk = await llm_sdk.load_async()
+        chat = sdk.LlmChat(
+            api_key=os.environ['GEMINI_API_KEY'],
+            session_id=f"{session_prefix}_{uuid.uuid4()}",
+            system_message=system_message
+        ).with_model("gemini", GEMINI_MODEL)
+    if LLM_RECORD:
+        return RecordingLlmChat(chat, recording_key)
+    return chat
+
+def _llm_message(chat, prompt: str):
+    # Only the emergentintegrations LlmChat wants a UserMessage; the others take the text
+    inner = chat._chat if isinstance(chat, RecordingLlmChat) else chat
+    if isinstance(inner, (FakeLlmChat, GeminiStreamingChat)):
+        return prompt
+    return llm_sdk.load().UserMessage(text=prompt)
+
+async def send_llm_message(chat, prompt: str) -> str:
+    if not llm_circuit.allow_request():
+        raise RuntimeError("LLM provider circuit is open")
+    try:
+        response = await chat.send_message(_llm_message(chat, prompt))
+    except Exception:
+        llm_circuit.record_failure()
+        raise
+    except BaseException:
+        llm_circuit.record_abandoned()
+        raise
+    llm_circuit.record_success()
+    return response
+
+async def stream_llm_message(chat, prompt: str):
+    """Yield the response in chunks as the provider produces them.
+
+    Pass a chat from create_llm_chat(..., streaming=True). The
+    emergentintegrations LlmChat has no streaming call, so a chat without
+    stream_message yields its whole response as a single chunk.
+    """
+    if not hasattr(chat, "stream_message"):
+        yield await send_llm_message(chat, prompt)
+        return
+    if not llm_circuit.allow_request():
+        raise RuntimeError("LLM provider circuit is open")
+    try:
+        async for chunk in chat.stream_message(_llm_message(chat, prompt)):
+            yield chunk
+    except Exception:
+        llm_circuit.record_failure()
+        raise
+    except BaseException:
+        # CancelledError, or GeneratorExit when the consumer stops early
+        llm_circuit.record_abandoned()
+        raise
+    llm_circuit.record_success()
+
+def fallback_assignment_content(topic: str) -> dict:
+    """Placeholder content used when generation fails; flagged so it is never cached."""
+    return {
+        "questions": [
+            {
+                "question": f"What is an important concept in {topic}?",
+                "options": ["Option A", "Option B", "Option C", "Option D"],
+                "correct_answer": 0
+            }
+        ],
+        "fallback": True
+    }
+
 async def generate_assignment_with_ai(subject: str, grade_level: str, topic: str, coding_level: Optional[int] = None, youtube_url: Optional[str] = None):
     try:
-        # Initialize Gemini chat
-        chat = LlmChat(
-            api_key=os.environ['GEMINI_API_KEY'],
-            session_id=f"assignment_{uuid.uuid4()}",
-            system_message="You are an expert educational content creator for homeschool teachers."
-        ).with_model("gemini", "gemini-2.5-pro")
+        chat = await create_llm_chat(
+            "assignment",
+            "You are an expert educational content creator for homeschool teachers.",
+            llm_recording_key(subject, coding_level)
+        )
         
         if subject.lower() == "learn to code" and coding_level:
             if coding_level == 1:
@@ -648,8 +1505,7 @@ async def generate_assignment_with_ai(subject: str, grade_level: str, topic: str
             Ensure all questions are educational and test understanding of {topic}.
             """
         
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
+        response = await send_llm_message(chat, prompt)
         
         # Parse the AI response
         try:
@@ -660,45 +1516,181 @@ async def generate_assignment_with_ai(subject: str, grade_level: str, topic: str
             end = response_text.rfind('}') + 1
             if start != -1 and end != -1:
                 json_text = response_text[start:end]
-                result = json.loads(json_text)
-                return result
+                # Only content that fits the models leaves here (and so reaches
+                # the cache); unknown keys are dropped, defaults filled in
+                return GeneratedAssignmentContent(**json.loads(json_text)).dict()
             else:
                 raise ValueError("No JSON found in response")
-        except (json.JSONDecodeError, ValueError) as e:
+        except (json.JSONDecodeError, ValueError, TypeError) as e:
             print(f"Error parsing AI response: {e}")
             print(f"Raw response: {response}")
             # Fallback questions
-            return {
-                "questions": [
-                    {
-                        "question": f"What is an important concept in {topic}?",
-                        "options": ["Option A", "Option B", "Option C", "Option D"],
-                        "correct_answer": 0
-                    }
-                ]
-            }
+            return fallback_assignment_content(topic)
     except Exception as e:
         print(f"Error generating assignment: {e}")
         # Return fallback content
+        return fallback_assignment_content(topic)
+
+# Generation cache
+# Generated content is stored in db.generation_cache under a hash of the
+# normalized request, so every worker shares it. Entries expire through a TTL
+# index on expires_at; past GENERATION_CACHE_MAX_ENTRIES the least recently
+# used entries are evicted. Bump ASSIGNMENT_PROMPT_VERSION whenever the
+# prompts in generate_assignment_with_ai or the shape of the content it
+# returns change, so old content is not reused.
+ASSIGNMENT_PROMPT_VERSION = 2
+
+def _normalize_text(value: Optional[str]) -> str:
+    return " ".join((value or "").split()).casefold()
+
+def generation_cache_key(subject: str, grade_level: str, topic: str, coding_level: Optional[int] = None,
+                         youtube_url: Optional[str] = None) -> str:
+    parts = [
+        _normalize_text(subject),
+        _normalize_text(grade_level),
+        _normalize_text(topic),
+        coding_level,
+        (youtube_url or "").strip(),
+        ASSIGNMENT_PROMPT_VERSION,
+        LLM_PROVIDER
+    ]
+    return hashlib.sha256(json.dumps(parts, separators=(",", ":")).encode()).hexdigest()
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the call as its own task; callers that
+    arrive while it runs await the same task and get the same result (or
+    exception). Cancelling any caller, the first included, leaves the call
+    running for the others. Coalescing is per process; across workers the
+    generation cache catches repeats once the first call has stored its result.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, func, *args):
+        task = self._flights.get(key)
+        if task is None:
+            self.calls += 1
+            task = self._flights[key] = asyncio.ensure_future(func(*args))
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Future) -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        # Mark the outcome as retrieved even if every caller has gone away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._flights), "calls": self.calls, "coalesced": self.coalesced}
+
+generation_flights = SingleFlight()
+
+class GenerationCache:
+    """Read-through cache around generate_assignment_with_ai.
+
+    Counters are per process. saved_seconds adds up the original generation
+    time of every entry served from the cache.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stored = 0
+        self.not_stored_fallback = 0
+        self.evicted = 0
+        self.saved_seconds = 0.0
+
+    async def lookup(self, key: str) -> Optional[dict]:
+        now = datetime.now(timezone.utc)
+        entry = await db.generation_cache.find_one_and_update(
+            {"_id": key, "expires_at": {"$gt": now}},
+            {"$set": {"last_used_at": now}, "$inc": {"hits": 1}},
+            projection=GENERATION_CACHE_PROJECTION
+        )
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.saved_seconds += entry["generation_ms"] / 1000
+        return entry["content"]
+
+    async def store(self, key: str, content: dict, generation_ms: float) -> None:
+        if content.get("fallback"):
+            self.not_stored_fallback += 1
+            return
+        now = datetime.now(timezone.utc)
+        await db.generation_cache.replace_one({"_id": key}, {
+            "content": content,
+            "generation_ms": generation_ms,
+            "created_at": now,
+            "last_used_at": now,
+            "expires_at": now + timedelta(seconds=self.ttl_seconds),
+            "hits": 0
+        }, upsert=True)
+        self.stored += 1
+        await self.evict()
+
+    async def evict(self) -> None:
+        # estimated_document_count reads collection metadata, so this stays cheap
+        overflow = await db.generation_cache.estimated_document_count() - self.max_entries
+        if overflow <= 0:
+            return
+        # Free 5% headroom so the next stores don't each trigger another eviction
+        limit = overflow + self.max_entries // 20
+        oldest = await db.generation_cache.find({}, EXISTS_PROJECTION).sort("last_used_at", ASCENDING).limit(limit).to_list(limit)
+        result = await db.generation_cache.delete_many({"_id": {"$in": [entry["_id"] for entry in oldest]}})
+        self.evicted += result.deleted_count
+
+    async def generate(self, subject: str, grade_level: str, topic: str, coding_level: Optional[int] = None,
+                       youtube_url: Optional[str] = None, force_regenerate: bool = False) -> dict:
+        key = generation_cache_key(subject, grade_level, topic, coding_level, youtube_url)
+        if not GENERATION_CACHE_ENABLED:
+            return await generation_flights.run(key, generate_assignment_with_ai, subject, grade_level, topic, coding_level, youtube_url)
+        if force_regenerate:
+            self.bypassed += 1
+        else:
+            content = await self.lookup(key)
+            if content is not None:
+                return content
+        # Identical misses in this process share one LLM call, and only its leader stores the result
+        return await generation_flights.run(key, self._generate_and_store, key, subject, grade_level, topic, coding_level, youtube_url)
+
+    async def _generate_and_store(self, key: str, *params) -> dict:
+        started = time.perf_counter()
+        content = await generate_assignment_with_ai(*params)
+        await self.store(key, content, (time.perf_counter() - started) * 1000)
+        return content
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
         return {
-            "questions": [
-                {
-                    "question": f"What is an important concept in {topic}?",
-                    "options": ["Option A", "Option B", "Option C", "Option D"],
-                    "correct_answer": 0
-                }
-            ]
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "bypassed": self.bypassed,
+            "stored": self.stored,
+            "not_stored_fallback": self.not_stored_fallback,
+            "evicted": self.evicted,
+            "saved_seconds": round(self.saved_seconds, 3),
         }
 
-async def generate_lesson_plan_with_ai(subject: str, grade_level: str, topic: str):
-    try:
-        chat = LlmChat(
-            api_key=os.environ['GEMINI_API_KEY'],
-            session_id=f"lesson_{uuid.uuid4()}",
-            system_message="You are an expert curriculum designer and teacher."
-        ).with_model("gemini", "gemini-2.5-pro")
-        
-        prompt = f"""
+generation_cache = GenerationCache(GENERATION_CACHE_TTL_SECONDS, GENERATION_CACHE_MAX_ENTRIES)
+
+LESSON_PLAN_SYSTEM_MESSAGE = "You are an expert curriculum designer and teacher."
+
+def lesson_plan_prompt(subject: str, grade_level: str, topic: str) -> str:
+    return f"""
         Create a detailed lesson plan for {grade_level} students in {subject} on the topic: {topic}
         
         Include:
@@ -711,24 +1703,29 @@ async def generate_lesson_plan_with_ai(subject: str, grade_level: str, topic: st
         Make it practical and age-appropriate for {grade_level} students.
         Format as a structured lesson plan that a homeschool parent can easily follow.
         """
-        
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
+
+def fallback_lesson_plan_content(subject: str, grade_level: str, topic: str) -> str:
+    return f"Basic lesson plan for {subject} - {topic} at {grade_level} level. This lesson would cover fundamental concepts and include hands-on activities."
+
+async def generate_lesson_plan_with_ai(subject: str, grade_level: str, topic: str):
+    try:
+        chat = await create_llm_chat("lesson", LESSON_PLAN_SYSTEM_MESSAGE, "lesson-plan")
+        response = await send_llm_message(chat, lesson_plan_prompt(subject, grade_level, topic))
         return response
     except Exception as e:
         print(f"Error generating lesson plan: {e}")
-        return f"Basic lesson plan for {subject} - {topic} at {grade_level} level. This lesson would cover fundamental concepts and include hands-on activities."
+        return fallback_lesson_plan_content(subject, grade_level, topic)
 
 # Auth Routes
 @api_router.post("/auth/teacher/register", response_model=Token)
 async def register_teacher(user_data: UserCreate):
     # Check if user already exists
-    existing_user = await db.users.find_one({"email": user_data.email})
+    existing_user = await db.users.find_one({"email": user_data.email}, EXISTS_PROJECTION)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new teacher
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await password_hasher.hash(user_data.password)
     user_dict = user_data.dict()
     user_dict.pop('password')
     user = User(**user_dict)
@@ -740,20 +1737,23 @@ async def register_teacher(user_data: UserCreate):
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    claims = token_claims("teacher", user.dict())
     access_token = create_access_token(
-        data={"sub": user.id}, expires_delta=access_token_expires
+        data=claims, expires_delta=access_token_expires
     )
+    refresh_token = await issue_refresh_token(claims)
     
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": user.dict()
+        "user": user.dict(),
+        "refresh_token": refresh_token
     }
 
 @api_router.post("/auth/teacher/login", response_model=Token)
 async def login_teacher(user_data: UserLogin):
-    user = await db.users.find_one({"email": user_data.email})
-    if not user or not verify_password(user_data.password, user['password']):
+    user = await db.users.find_one({"email": user_data.email}, TEACHER_LOGIN_PROJECTION)
+    if not user or not await password_hasher.verify(user_data.password, user['password']):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -761,9 +1761,11 @@ async def login_teacher(user_data: UserLogin):
         )
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    claims = token_claims("teacher", user)
     access_token = create_access_token(
-        data={"sub": user['id']}, expires_delta=access_token_expires
+        data=claims, expires_delta=access_token_expires
     )
+    refresh_token = await issue_refresh_token(claims)
     
     # Remove password from user data
     user_dict = User(**user).dict()
@@ -771,13 +1773,14 @@ async def login_teacher(user_data: UserLogin):
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": user_dict
+        "user": user_dict,
+        "refresh_token": refresh_token
     }
 
 @api_router.post("/auth/student/login", response_model=Token)
 async def login_student(student_data: StudentLogin):
-    student = await db.students.find_one({"username": student_data.username})
-    if not student or not verify_password(student_data.password, student['password']):
+    student = await db.students.find_one({"username": student_data.username}, STUDENT_LOGIN_PROJECTION)
+    if not student or not await password_hasher.verify(student_data.password, student['password']):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -785,9 +1788,11 @@ async def login_student(student_data: StudentLogin):
         )
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    claims = token_claims("student", student)
     access_token = create_access_token(
-        data={"sub": student['id']}, expires_delta=access_token_expires
+        data=claims, expires_delta=access_token_expires
     )
+    refresh_token = await issue_refresh_token(claims)
     
     # Remove password from student data
     student_dict = Student(**student).dict()
@@ -795,9 +1800,56 @@ async def login_student(student_data: StudentLogin):
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": student_dict
+        "user": student_dict,
+        "refresh_token": refresh_token
+    }
+
+@api_router.post("/auth/refresh", response_model=TokenRefresh)
+async def refresh_access_token(refresh_data: RefreshRequest):
+    token_hash = _hash_refresh_token(refresh_data.refresh_token)
+    now = datetime.now(timezone.utc)
+    replacement_id = str(uuid.uuid4())
+    
+    # Rotate: atomically revoke the presented token and point it at its replacement
+    token_doc = await db.refresh_tokens.find_one_and_update(
+        {"token_hash": token_hash, "revoked": False, "expires_at": {"$gt": now}},
+        {"$set": {"revoked": True, "revoked_at": now, "replaced_by": replacement_id}},
+        projection=REFRESH_ROTATION_PROJECTION
+    )
+    if not token_doc:
+        # A revoked token being presented again means it leaked; kill the whole family
+        reused = await db.refresh_tokens.find_one({"token_hash": token_hash, "revoked": True}, REFRESH_FAMILY_PROJECTION)
+        if reused:
+            await revoke_refresh_tokens({"family_id": reused["family_id"]})
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    claims = token_doc["claims"]
+    access_token = create_access_token(
+        data=claims, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    refresh_token = await issue_refresh_token(claims, token_doc["family_id"], replacement_id)
+    
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token
     }
 
+@api_router.post("/auth/logout")
+async def logout(refresh_data: RefreshRequest):
+    token_doc = await db.refresh_tokens.find_one(
+        {"token_hash": _hash_refresh_token(refresh_data.refresh_token)},
+        REFRESH_FAMILY_PROJECTION
+    )
+    if token_doc:
+        await revoke_refresh_tokens({"family_id": token_doc["family_id"]})
+    
+    return {"message": "Logged out successfully"}
+
 # Student Management Routes
 @api_router.post("/students", response_model=Student)
 async def create_student(student_data: StudentCreate, current_user=Depends(get_current_user)):
@@ -805,12 +1857,12 @@ async def create_student(student_data: StudentCreate, current_user=Depends(get_c
         raise HTTPException(status_code=403, detail="Only teachers can create students")
     
     # Check if username already exists
-    existing_student = await db.students.find_one({"username": student_data.username})
+    existing_student = await db.students.find_one({"username": student_data.username}, EXISTS_PROJECTION)
     if existing_student:
         raise HTTPException(status_code=400, detail="Username already exists")
     
     # Create student
-    hashed_password = hash_password(student_data.password)
+    hashed_password = await password_hasher.hash(student_data.password)
     student_dict = student_data.dict()
     student_dict.pop('password')
     student_dict['teacher_id'] = current_user["data"]["id"]
@@ -823,13 +1875,138 @@ async def create_student(student_data: StudentCreate, current_user=Depends(get_c
     
     return student
 
+def _validation_error_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc']) or 'row'}: {err['msg']}" for err in error.errors()
+    )
+
+async def _read_student_rows(request: Request) -> List[dict]:
+    """Roster rows from a JSON body, a text/csv body or a multipart `file` upload."""
+    content_type = request.headers.get("content-type", "")
+    
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Multipart uploads must include a CSV 'file' field")
+        csv_text = (await upload.read()).decode("utf-8-sig")
+    elif content_type.startswith("text/csv"):
+        csv_text = (await request.body()).decode("utf-8-sig")
+    else:
+        try:
+            payload = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be JSON or CSV")
+        rows = payload.get("students") if isinstance(payload, dict) else payload
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="Expected a list of students or {\"students\": [...]}")
+        return rows
+    
+    reader = csv.DictReader(io.StringIO(csv_text))
+    rows = [
+        {key.strip(): (value or "").strip() for key, value in row.items() if key}
+        for row in reader
+    ]
+    # Spreadsheet exports often end with blank or separator-only lines (",,,")
+    return [row for row in rows if any(row.values())]
+
+@api_router.post("/students/bulk")
+async def bulk_create_students(request: Request, current_user=Depends(get_current_user)):
+    if current_user["type"] != "teacher":
+        raise HTTPException(status_code=403, detail="Only teachers can create students")
+    
+    rows = await _read_student_rows(request)
+    if not rows:
+        raise HTTPException(status_code=400, detail="No students to import")
+    if len(rows) > BULK_STUDENT_IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_STUDENT_IMPORT_MAX_ROWS} students can be imported at once")
+    
+    # Validate every row and reject usernames repeated within the upload
+    results = [None] * len(rows)
+    candidates = []  # (index, StudentCreate)
+    seen_usernames = set()
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            results[index] = {"row": index + 1, "username": None, "status": "error", "error": "Row must be an object"}
+            continue
+        try:
+            student_data = StudentCreate(**row)
+        except ValidationError as e:
+            results[index] = {"row": index + 1, "username": row.get("username"), "status": "error", "error": _validation_error_message(e)}
+            continue
+        if not student_data.username.strip() or not student_data.password:
+            results[index] = {"row": index + 1, "username": student_data.username, "status": "error", "error": "Username and password are required"}
+            continue
+        if student_data.username in seen_usernames:
+            results[index] = {"row": index + 1, "username": student_data.username, "status": "error", "error": "Duplicate username in upload"}
+            continue
+        seen_usernames.add(student_data.username)
+        candidates.append((index, student_data))
+    
+    # One query for every username that already exists
+    existing = await db.students.find(
+        {"username": {"$in": [student_data.username for _, student_data in candidates]}},
+        USERNAME_PROJECTION
+    ).to_list(None)
+    taken = {doc["username"] for doc in existing}
+    
+    to_create = []
+    for index, student_data in candidates:
+        if student_data.username in taken:
+            results[index] = {"row": index + 1, "username": student_data.username, "status": "error", "error": "Username already exists"}
+        else:
+            to_create.append((index, student_data))
+    
+    # Hash in parallel across the password pool
+    hashed_passwords = await asyncio.gather(
+        *(password_hasher.hash(student_data.password) for _, student_data in to_create)
+    )
+    
+    students = []
+    documents = []
+    for (index, student_data), hashed_password in zip(to_create, hashed_passwords):
+        student_dict = student_data.dict()
+        student_dict.pop('password')
+        student_dict['teacher_id'] = current_user["data"]["id"]
+        student = Student(**student_dict)
+        student_with_password = student.dict()
+        student_with_password['password'] = hashed_password
+        students.append((index, student))
+        documents.append(student_with_password)
+    
+    # Unordered insert so one bad row (e.g. a username taken since the
+    # lookup above) doesn't stop the rest of the batch
+    failed_positions = {}
+    if documents:
+        try:
+            await db.students.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                message = "Username already exists" if write_error.get("code") == 11000 else write_error.get("errmsg", "Insert failed")
+                failed_positions[write_error["index"]] = message
+    
+    for position, (index, student) in enumerate(students):
+        if position in failed_positions:
+            results[index] = {"row": index + 1, "username": student.username, "status": "error", "error": failed_positions[position]}
+        else:
+            results[index] = {"row": index + 1, "username": student.username, "status": "created", "student": student.dict()}
+    
+    created = sum(1 for result in results if result["status"] == "created")
+    return {
+        "created": created,
+        "failed": len(results) - created,
+        "results": results
+    }
+
 @api_router.get("/students", response_model=List[Student])
-async def get_students(current_user=Depends(get_current_user)):
+async def get_students(page=Depends(page_params), current_user=Depends(get_current_user_readonly)):
     if current_user["type"] != "teacher":
         raise HTTPException(status_code=403, detail="Only teachers can view students")
     
-    students = await db.students.find({"teacher_id": current_user["data"]["id"]}).to_list(1000)
-    return [Student(**student) for student in students]
+    students, next_cursor = await fetch_page(
+        db.students, {"teacher_id": current_user["data"]["id"]}, STUDENT_PROJECTION, "created_at", page
+    )
+    return trusted_response(Student, students, next_cursor)
 
 @api_router.delete("/students/{student_id}")
 async def delete_student(student_id: str, current_user=Depends(get_current_user)):
@@ -844,66 +2021,71 @@ async def delete_student(student_id: str, current_user=Depends(get_current_user)
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Student not found")
     
+    principal_cache.invalidate(student_id)
+    await revoke_refresh_tokens({"user_id": student_id})
+    
     return {"message": "Student deleted successfully"}
 
 # Assignment Routes
-@api_router.post("/assignments/generate", response_model=Assignment)
-async def generate_assignment(assignment_data: AssignmentGenerate, current_user=Depends(get_current_user)):
-    if current_user["type"] != "teacher":
-        raise HTTPException(status_code=403, detail="Only teachers can generate assignments")
-    
-    # Generate assignment using AI
-    ai_result = await generate_assignment_with_ai(
+async def create_generated_assignment(assignment_data: AssignmentGenerate, teacher_id: str,
+                                      assignment_id: Optional[str] = None) -> Assignment:
+    """Generate (or reuse cached) content for a non-spelling assignment and save it."""
+    ai_result = await generation_cache.generate(
         assignment_data.subject,
         assignment_data.grade_level,
         assignment_data.topic,
         assignment_data.coding_level,
-        assignment_data.youtube_url
+        assignment_data.youtube_url,
+        force_regenerate=assignment_data.force_regenerate
     )
     
-    # Create assignment object
-    drag_drop_puzzle = None
-    if ai_result.get("drag_drop_puzzle"):
-        drag_drop_puzzle = DragDropPuzzle(**ai_result["drag_drop_puzzle"])
-    
-    learn_to_read_content = None
-    if ai_result.get("learn_to_read_content"):
-        learn_to_read_content = LearnToReadContent(**ai_result["learn_to_read_content"])
-    
-    # Handle Spelling assignments - they don't get created here
-    # They need to be created per-student because each student has their own word list
-    if assignment_data.subject.lower() == "spelling":
-        if not assignment_data.student_ids or len(assignment_data.student_ids) == 0:
-            raise HTTPException(status_code=400, detail="Spelling assignments require student_ids to be specified")
-        if not assignment_data.spelling_type or assignment_data.spelling_type not in ["practice", "test"]:
-            raise HTTPException(status_code=400, detail="Spelling assignments require spelling_type to be 'practice' or 'test'")
-        
-        # Return early - spelling assignments are created per-student in a special endpoint
-        return {"message": "Spelling assignment created per student", "student_ids": assignment_data.student_ids}
-    
+    # Create assignment object from the validated content
+    content = GeneratedAssignmentContent(**ai_result)
     assignment = Assignment(
         title=f"{assignment_data.subject} - {assignment_data.topic}" + (f" (Level {assignment_data.coding_level})" if assignment_data.coding_level else ""),
         subject=assignment_data.subject,
         grade_level=assignment_data.grade_level,
         topic=assignment_data.topic,
-        questions=[Question(**q) for q in ai_result["questions"]],
-        reading_passage=ai_result.get("reading_passage"),
+        questions=content.questions,
+        reading_passage=content.reading_passage,
         coding_level=assignment_data.coding_level,
-        coding_exercises=[CodingExercise(**ex) for ex in ai_result.get("coding_exercises", [])],
-        drag_drop_puzzle=drag_drop_puzzle,
-        learn_to_read_content=learn_to_read_content,
+        coding_exercises=content.coding_exercises,
+        drag_drop_puzzle=content.drag_drop_puzzle,
+        learn_to_read_content=content.learn_to_read_content,
         spelling_type=None,
         spelling_word_list_id=None,
         spelling_words=None,
         youtube_url=assignment_data.youtube_url,
-        teacher_id=current_user["data"]["id"]
+        teacher_id=teacher_id
     )
+    if assignment_id:
+        assignment.id = assignment_id
     
     # Save to database
     await db.assignments.insert_one(assignment.dict())
+    await bump_versions("assignments", teacher_id)
     
     return assignment
 
+@api_router.post("/assignments/generate", response_model=Assignment)
+async def generate_assignment(assignment_data: AssignmentGenerate, current_user=Depends(get_current_user)):
+    if current_user["type"] != "teacher":
+        raise HTTPException(status_code=403, detail="Only teachers can generate assignments")
+    
+    # Handle Spelling assignments - they don't get created here
+    # They need to be created per-student because each student has their own word list
+    if assignment_data.subject.lower() == "spelling":
+        if not assignment_data.student_ids or len(assignment_data.student_ids) == 0:
+            raise HTTPException(status_code=400, detail="Spelling assignments require student_ids to be specified")
+        if not assignment_data.spelling_type or assignment_data.spelling_type not in ["practice", "test"]:
+            raise HTTPException(status_code=400, detail="Spelling assignments require spelling_type to be 'practice' or 'test'")
+        
+        # Return early - spelling assignments are created per-student in a special endpoint
+        return {"message": "Spelling assignment created per student", "student_ids": assignment_data.student_ids}
+    
+    # Generate assignment using AI, reusing cached content for repeated requests
+    return await create_generated_assignment(assignment_data, current_user["data"]["id"])
+
 @api_router.post("/assignments/spelling/create-and-assign")
 async def create_and_assign_spelling(assignment_data: AssignmentGenerate, current_user=Depends(get_current_user)):
     if current_user["type"] != "teacher":
@@ -919,7 +2101,7 @@ async def create_and_assign_spelling(assignment_data: AssignmentGenerate, curren
     
     for student_id in assignment_data.student_ids:
         # Get student's active word list
-        word_list = await db.spelling_word_lists.find_one({"student_id": student_id, "active": True})
+        word_list = await db.spelling_word_lists.find_one({"student_id": student_id, "active": True}, SPELLING_WORDS_PROJECTION)
         if not word_list:
             continue  # Skip students without word lists
         
@@ -953,6 +2135,10 @@ async def create_and_assign_spelling(assignment_data: AssignmentGenerate, curren
             "student_assignment_id": student_assignment.id
         })
     
+    if created_assignments:
+        await bump_versions("assignments", current_user["data"]["id"])
+        await bump_versions("student_assignments", *(created["student_id"] for created in created_assignments))
+    
     return {
         "message": f"Created {len(created_assignments)} spelling assignments",
         "assignments": created_assignments
@@ -967,7 +2153,7 @@ async def assign_assignment(assign_data: AssignmentAssign, current_user=Depends(
     assignment = await db.assignments.find_one({
         "id": assign_data.assignment_id,
         "teacher_id": current_user["data"]["id"]
-    })
+    }, EXISTS_PROJECTION)
     
     if not assignment:
         raise HTTPException(status_code=404, detail="Assignment not found")
@@ -984,46 +2170,61 @@ async def assign_assignment(assign_data: AssignmentAssign, current_user=Depends(
     
     if student_assignments:
         await db.student_assignments.insert_many(student_assignments)
+        await bump_versions("student_assignments", *assign_data.student_ids)
     
     return {"message": f"Assignment assigned to {len(student_assignments)} students"}
 
 @api_router.get("/assignments", response_model=List[Assignment])
-async def get_assignments(current_user=Depends(get_current_user)):
+async def get_assignments(request: Request, page=Depends(page_params), current_user=Depends(get_current_user_readonly)):
     if current_user["type"] != "teacher":
         raise HTTPException(status_code=403, detail="Only teachers can view assignments")
     
-    assignments = await db.assignments.find({"teacher_id": current_user["data"]["id"]}).to_list(1000)
-    return [Assignment(**assignment) for assignment in assignments]
+    etag, not_modified = await check_not_modified(request, "assignments", current_user["data"]["id"])
+    if not_modified:
+        return not_modified
+    
+    assignments, next_cursor = await fetch_page(
+        db.assignments, {"teacher_id": current_user["data"]["id"]}, ASSIGNMENT_PROJECTION, "created_at", page
+    )
+    return with_etag(trusted_response(Assignment, assignments, next_cursor), etag)
 
 # Student Assignment Routes
 @api_router.get("/student/assignments", response_model=List[dict])
-async def get_student_assignments(current_user=Depends(get_current_user)):
+async def get_student_assignments(request: Request, page=Depends(page_params), current_user=Depends(get_current_user_readonly)):
     if current_user["type"] != "student":
         raise HTTPException(status_code=403, detail="Only students can view their assignments")
     
+    etag, not_modified = await check_not_modified(request, "student_assignments", current_user["data"]["id"])
+    if not_modified:
+        return not_modified
+    
     # Get student assignments
-    student_assignments = await db.student_assignments.find({
-        "student_id": current_user["data"]["id"]
-    }).to_list(1000)
+    student_assignments, next_cursor = await fetch_page(
+        db.student_assignments,
+        {"student_id": current_user["data"]["id"]},
+        STUDENT_ASSIGNMENT_SUMMARY_PROJECTION,
+        "assigned_at",
+        page
+    )
     
     # Get assignment details
     result = []
     for sa in student_assignments:
-        assignment = await db.assignments.find_one({"id": sa["assignment_id"]})
+        assignment = await db.assignments.find_one({"id": sa["assignment_id"]}, ASSIGNMENT_PROJECTION)
         if assignment:
             result.append({
                 "student_assignment_id": sa["id"],
-                "assignment": Assignment(**assignment).dict(),
+                "assignment": trusted_dump(Assignment, assignment),
                 "completed": sa["completed"],
                 "score": sa.get("score"),
                 "submitted_at": sa.get("submitted_at"),
                 "assigned_at": sa["assigned_at"]
             })
     
-    return result
+    return with_etag(ORJSONResponse(result, headers=page_headers(next_cursor)), etag)
 
 @api_router.get("/student/assignments/{student_assignment_id}", response_model=dict)
-async def get_student_assignment_by_id(student_assignment_id: str, current_user=Depends(get_current_user)):
+async def get_student_assignment_by_id(student_assignment_id: str, current_user=Depends(get_current_user_readonly)):
     if current_user["type"] != "student":
         raise HTTPException(status_code=403, detail="Only students can view their assignments")
     
@@ -1031,19 +2232,19 @@ async def get_student_assignment_by_id(student_assignment_id: str, current_user=
     student_assignment = await db.student_assignments.find_one({
         "id": student_assignment_id,
         "student_id": current_user["data"]["id"]
-    })
+    }, STUDENT_ASSIGNMENT_DETAIL_PROJECTION)
     
     if not student_assignment:
         raise HTTPException(status_code=404, detail="Assignment not found")
     
     # Get assignment details
-    assignment = await db.assignments.find_one({"id": student_assignment["assignment_id"]})
+    assignment = await db.assignments.find_one({"id": student_assignment["assignment_id"]}, ASSIGNMENT_PROJECTION)
     if not assignment:
         raise HTTPException(status_code=404, detail="Assignment details not found")
     
-    return {
+    return ORJSONResponse({
         "student_assignment_id": student_assignment["id"],
-        "assignment": Assignment(**assignment).dict(),
+        "assignment": trusted_dump(Assignment, assignment),
         "completed": student_assignment["completed"],
         "score": student_assignment.get("score"),
         "submitted_at": student_assignment.get("submitted_at"),
@@ -1054,37 +2255,21 @@ async def get_student_assignment_by_id(student_assignment_id: str, current_user=
         "interactive_word_answers": student_assignment.get("interactive_word_answers", []),
         "spelling_practice_answers": student_assignment.get("spelling_practice_answers", {}),
         "spelling_test_answers": student_assignment.get("spelling_test_answers", [])
-    }
-
-@api_router.post("/student/assignments/submit")
-async def submit_assignment(submission: SubmissionRequest, current_user=Depends(get_current_user)):
-    if current_user["type"] != "student":
-        raise HTTPException(status_code=403, detail="Only students can submit assignments")
-    
-    # Get student assignment
-    student_assignment = await db.student_assignments.find_one({
-        "id": submission.student_assignment_id,
-        "student_id": current_user["data"]["id"]
     })
-    
-    if not student_assignment:
-        raise HTTPException(status_code=404, detail="Assignment not found")
-    
-    if student_assignment["completed"]:
-        raise HTTPException(status_code=400, detail="Assignment already submitted")
-    
-    # Get assignment details for grading
-    assignment = await db.assignments.find_one({"id": student_assignment["assignment_id"]})
-    if not assignment:
-        raise HTTPException(status_code=404, detail="Assignment details not found")
-    
+
+# Grading
+def _normalize_code(code: str) -> str:
+    return code.strip().replace(" ", "").replace("\n", "")
+
+def grade_submission(assignment: dict, submission: SubmissionRequest) -> dict:
+    """Score a submission against its assignment. Pure: no I/O, no mutation."""
     # Calculate score for MCQ questions
     mcq_correct = 0
     total_mcq = len(assignment["questions"])
     
     if submission.answers:
-        for i, answer in enumerate(submission.answers):
-            if i < total_mcq and answer == assignment["questions"][i]["correct_answer"]:
+        for answer, question in zip(submission.answers, assignment["questions"]):
+            if answer == question["correct_answer"]:
                 mcq_correct += 1
     
     # Calculate score for coding exercises (simple string matching for now)
@@ -1092,12 +2277,10 @@ async def submit_assignment(submission: SubmissionRequest, current_user=Depends(
     total_coding = len(assignment.get("coding_exercises", []))
     
     if submission.coding_answers and total_coding > 0:
-        for i, code_answer in enumerate(submission.coding_answers):
-            if i < total_coding:
-                correct_code = assignment["coding_exercises"][i]["correct_answer"]
-                # Simple string matching (normalize whitespace)
-                if code_answer.strip().replace(" ", "").replace("\n", "") == correct_code.strip().replace(" ", "").replace("\n", ""):
-                    coding_correct += 1
+        for code_answer, exercise in zip(submission.coding_answers, assignment["coding_exercises"]):
+            # Simple string matching (normalize whitespace)
+            if _normalize_code(code_answer) == _normalize_code(exercise["correct_answer"]):
+                coding_correct += 1
     
     # Calculate score for drag-and-drop puzzle
     drag_drop_correct = 0
@@ -1124,11 +2307,10 @@ async def submit_assignment(submission: SubmissionRequest, current_user=Depends(
         activities = assignment["learn_to_read_content"]["activities"]
         total_learn_to_read = len(activities)
         
-        for i, activity in enumerate(activities):
-            if i < len(submission.interactive_word_answers):
-                # Check if student clicked the correct word
-                if submission.interactive_word_answers[i].lower() == activity["target_word"].lower():
-                    learn_to_read_correct += 1
+        for clicked_word, activity in zip(submission.interactive_word_answers, activities):
+            # Check if student clicked the correct word
+            if clicked_word.lower() == activity["target_word"].lower():
+                learn_to_read_correct += 1
     
     # Calculate score for NEW Spelling Practice/Test
     spelling_correct = 0
@@ -1151,17 +2333,55 @@ async def submit_assignment(submission: SubmissionRequest, current_user=Depends(
         words = assignment.get("spelling_words", [])
         total_spelling = len(words)
         
-        for i, word in enumerate(words):
-            if i < len(submission.spelling_test_answers):
-                student_answer = submission.spelling_test_answers[i].strip().lower()
-                if student_answer == word.lower():
-                    spelling_correct += 1
+        for answer, word in zip(submission.spelling_test_answers, words):
+            if answer.strip().lower() == word.lower():
+                spelling_correct += 1
     
     # Calculate overall score
     total_questions = total_mcq + total_coding + total_drag_drop + total_learn_to_read + total_spelling
     total_correct = mcq_correct + coding_correct + drag_drop_correct + learn_to_read_correct + spelling_correct
     score = (total_correct / total_questions) * 100 if total_questions > 0 else 0
     
+    return {
+        "score": score,
+        "mcq_correct": mcq_correct,
+        "coding_correct": coding_correct,
+        "drag_drop_correct": drag_drop_correct,
+        "learn_to_read_correct": learn_to_read_correct,
+        "spelling_correct": spelling_correct,
+        "total_mcq": total_mcq,
+        "total_coding": total_coding,
+        "total_drag_drop": total_drag_drop,
+        "total_learn_to_read": total_learn_to_read,
+        "total_spelling": total_spelling,
+        "total_questions": total_questions
+    }
+
+@api_router.post("/student/assignments/submit")
+async def submit_assignment(submission: SubmissionRequest, current_user=Depends(get_current_user)):
+    if current_user["type"] != "student":
+        raise HTTPException(status_code=403, detail="Only students can submit assignments")
+    
+    # Get student assignment
+    student_assignment = await db.student_assignments.find_one({
+        "id": submission.student_assignment_id,
+        "student_id": current_user["data"]["id"]
+    }, SUBMISSION_STATE_PROJECTION)
+    
+    if not student_assignment:
+        raise HTTPException(status_code=404, detail="Assignment not found")
+    
+    if student_assignment["completed"]:
+        raise HTTPException(status_code=400, detail="Assignment already submitted")
+    
+    # Get assignment details for grading
+    assignment = await db.assignments.find_one({"id": student_assignment["assignment_id"]}, GRADING_ASSIGNMENT_PROJECTION)
+    if not assignment:
+        raise HTTPException(status_code=404, detail="Assignment details not found")
+    
+    grade = grade_submission(assignment, submission)
+    score = grade["score"]
+    
     # Award points for grades 85% or higher
     points_earned = 0
     if score >= 85:
@@ -1194,36 +2414,36 @@ async def submit_assignment(submission: SubmissionRequest, current_user=Depends(
             }
         }
     )
+    await bump_versions("student_assignments", current_user["data"]["id"])
     
-    return {
-        "message": "Assignment submitted successfully",
-        "score": score,
-        "mcq_correct": mcq_correct,
-        "coding_correct": coding_correct,
-        "drag_drop_correct": drag_drop_correct,
-        "learn_to_read_correct": learn_to_read_correct,
-        "spelling_correct": spelling_correct,
-        "total_mcq": total_mcq,
-        "total_coding": total_coding,
-        "total_drag_drop": total_drag_drop,
-        "total_learn_to_read": total_learn_to_read,
-        "total_spelling": total_spelling,
-        "total_questions": total_questions
-    }
+    return {"message": "Assignment submitted successfully", **grade}
+
+# Server-Sent Events
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def sse_event(event: str, data) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+# Background tasks
+# Work that must finish even if the request that started it goes away (a
+# client closing a stream). Tasks are referenced here until done, and the
+# lifespan handler waits for them before closing Mongo.
+background_tasks = set()
+
+def spawn_background(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def drain_background_tasks(timeout: float) -> None:
+    if background_tasks:
+        logger.info(f"Waiting up to {timeout:.0f}s for {len(background_tasks)} background task(s)")
+        await asyncio.wait(set(background_tasks), timeout=timeout)
 
 # Lesson Plan Routes
-@api_router.post("/lesson-plans/generate", response_model=LessonPlan)
-async def generate_lesson_plan(lesson_data: LessonPlanGenerate, current_user=Depends(get_current_user)):
-    if current_user["type"] != "teacher":
-        raise HTTPException(status_code=403, detail="Only teachers can generate lesson plans")
-    
-    # Generate lesson plan using AI
-    content = await generate_lesson_plan_with_ai(
-        lesson_data.subject,
-        lesson_data.grade_level,
-        lesson_data.topic
-    )
-    
+async def save_lesson_plan(lesson_data: LessonPlanGenerate, teacher_id: str, content: str,
+                           lesson_plan_id: Optional[str] = None) -> LessonPlan:
     # Create lesson plan object
     lesson_plan = LessonPlan(
         title=f"{lesson_data.subject} - {lesson_data.topic}",
@@ -1231,30 +2451,435 @@ async def generate_lesson_plan(lesson_data: LessonPlanGenerate, current_user=Dep
         grade_level=lesson_data.grade_level,
         topic=lesson_data.topic,
         content=content,
-        teacher_id=current_user["data"]["id"]
+        teacher_id=teacher_id
     )
+    if lesson_plan_id:
+        lesson_plan.id = lesson_plan_id
     
     # Save to database
     await db.lesson_plans.insert_one(lesson_plan.dict())
     
     return lesson_plan
 
+async def create_generated_lesson_plan(lesson_data: LessonPlanGenerate, teacher_id: str,
+                                       lesson_plan_id: Optional[str] = None) -> LessonPlan:
+    # Generate lesson plan using AI
+    content = await generate_lesson_plan_with_ai(
+        lesson_data.subject,
+        lesson_data.grade_level,
+        lesson_data.topic
+    )
+    return await save_lesson_plan(lesson_data, teacher_id, content, lesson_plan_id)
+
+@api_router.post("/lesson-plans/generate", response_model=LessonPlan)
+async def generate_lesson_plan(lesson_data: LessonPlanGenerate, current_user=Depends(get_current_user)):
+    if current_user["type"] != "teacher":
+        raise HTTPException(status_code=403, detail="Only teachers can generate lesson plans")
+    
+    return await create_generated_lesson_plan(lesson_data, current_user["data"]["id"])
+
+class LessonPlanStreamStats:
+    """Per-process counters for /lesson-plans/generate/stream."""
+
+    def __init__(self):
+        self.started = 0
+        self.saved = 0
+        self.fallback = 0
+        self.save_errors = 0
+        self.client_disconnects = 0
+        self.first_chunk_seconds = 0.0
+        self.first_chunks = 0
+
+    def stats(self) -> dict:
+        return {
+            "started": self.started,
+            "saved": self.saved,
+            "fallback": self.fallback,
+            "save_errors": self.save_errors,
+            "client_disconnects": self.client_disconnects,
+            "avg_first_chunk_ms": round(self.first_chunk_seconds / self.first_chunks * 1000, 1) if self.first_chunks else 0.0,
+        }
+
+lesson_plan_stream_stats = LessonPlanStreamStats()
+
+async def produce_lesson_plan_stream(lesson_data: LessonPlanGenerate, teacher_id: str, events: asyncio.Queue) -> None:
+    """Run the generation and save the plan, publishing SSE events to `events`.
+
+    Runs as a background task, so the plan is saved even if the client
+    disconnects. None on the queue marks the end of the stream.
+    """
+    started = time.perf_counter()
+    chunks = []
+    try:
+        try:
+            chat = await create_llm_chat("lesson", LESSON_PLAN_SYSTEM_MESSAGE, "lesson-plan", streaming=True)
+            prompt = lesson_plan_prompt(lesson_data.subject, lesson_data.grade_level, lesson_data.topic)
+            async for chunk in stream_llm_message(chat, prompt):
+                if not chunks:
+                    lesson_plan_stream_stats.first_chunk_seconds += time.perf_counter() - started
+                    lesson_plan_stream_stats.first_chunks += 1
+                chunks.append(chunk)
+                events.put_nowait(sse_event("chunk", {"text": chunk}))
+            content = "".join(chunks)
+        except Exception as e:
+            print(f"Error generating lesson plan: {e}")
+            lesson_plan_stream_stats.fallback += 1
+            # The client discards what it has streamed so far and shows the saved plan from `done`
+            events.put_nowait(sse_event("error", {"detail": "Lesson plan generation failed; a basic plan was saved instead"}))
+            content = fallback_lesson_plan_content(lesson_data.subject, lesson_data.grade_level, lesson_data.topic)
+        
+        try:
+            lesson_plan = await save_lesson_plan(lesson_data, teacher_id, content)
+        except Exception:
+            logger.exception("Failed to save streamed lesson plan")
+            lesson_plan_stream_stats.save_errors += 1
+            events.put_nowait(sse_event("error", {"detail": "Lesson plan could not be saved"}))
+            return
+        lesson_plan_stream_stats.saved += 1
+        events.put_nowait(sse_event("done", lesson_plan.dict()))
+    finally:
+        events.put_nowait(None)
+
+@api_router.post("/lesson-plans/generate/stream")
+async def stream_lesson_plan(lesson_data: LessonPlanGenerate, current_user=Depends(get_current_user)):
+    """Server-Sent Events: `chunk` events with model output as it arrives, then
+    `done` with the saved lesson plan. An `error` event means the streamed
+    text was replaced by a basic plan (still sent in `done`) or not saved.
+    """
+    if current_user["type"] != "teacher":
+        raise HTTPException(status_code=403, detail="Only teachers can generate lesson plans")
+    
+    lesson_plan_stream_stats.started += 1
+    events = asyncio.Queue()
+    spawn_background(produce_lesson_plan_stream(lesson_data, current_user["data"]["id"], events))
+    
+    async def forward():
+        finished = False
+        try:
+            while (event := await events.get()) is not None:
+                yield event
+            finished = True
+        finally:
+            if not finished:
+                lesson_plan_stream_stats.client_disconnects += 1
+    
+    return StreamingResponse(forward(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @api_router.get("/lesson-plans", response_model=List[LessonPlan])
-async def get_lesson_plans(current_user=Depends(get_current_user)):
+async def get_lesson_plans(page=Depends(page_params), current_user=Depends(get_current_user_readonly)):
     if current_user["type"] != "teacher":
         raise HTTPException(status_code=403, detail="Only teachers can view lesson plans")
     
-    lesson_plans = await db.lesson_plans.find({"teacher_id": current_user["data"]["id"]}).to_list(1000)
-    return [LessonPlan(**lp) for lp in lesson_plans]
+    lesson_plans, next_cursor = await fetch_page(
+        db.lesson_plans, {"teacher_id": current_user["data"]["id"]}, LESSON_PLAN_PROJECTION, "created_at", page
+    )
+    return trusted_response(LessonPlan, lesson_plans, next_cursor)
+
+# Generation jobs
+# Generation requests can be queued instead of held open: the submit route
+# stores a job in db.generation_jobs and returns 202 with its id, and every
+# worker process runs a bounded pool of tasks that claim queued jobs. A
+# claim is a lease (lease_owner, lease_expires_at) renewed while the job
+# runs, so a job whose worker died is picked up again once the lease lapses.
+# Clients poll GET /generation-jobs/{id} or follow /generation-jobs/{id}/events.
+GENERATION_JOB_TERMINAL_STATUSES = ("succeeded", "failed")
+
+class GenerationJobRunner:
+    """Claims and runs generation jobs, at most `concurrency` at a time per process."""
+
+    def __init__(self, concurrency: int, lease_seconds: float, poll_seconds: float, max_attempts: int,
+                 retention_seconds: int):
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self.owner = None
+        self._tasks = []
+        self._wakeup = None
+        self._changed = None
+        # job id -> lease owner of the runner task working on it
+        self._running = {}
+        self.claimed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+        self.released = 0
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        # Set here rather than in __init__ so each forked worker gets its own pid;
+        # every runner task holds its leases under its own owner token
+        self.owner = f"{os.uname().nodename}:{os.getpid()}"
+        self._wakeup = asyncio.Event()
+        self._changed = asyncio.Condition()
+        self._tasks = [asyncio.create_task(self._work(f"{self.owner}:{index}")) for index in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Hand interrupted jobs straight back to the queue instead of waiting for their leases
+        if self._running:
+            result = await db.generation_jobs.update_many(
+                {"$or": [{"id": job_id, "lease_owner": owner} for job_id, owner in self._running.items()]},
+                {"$set": {"status": "queued", "lease_owner": None, "lease_expires_at": None}, "$inc": {"attempts": -1}}
+            )
+            self.released += result.modified_count
+            self._running.clear()
+
+    def wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def wait_for_change(self, timeout: float) -> None:
+        """Return when a job changes in this process, or after `timeout` seconds."""
+        if self._changed is None:
+            await asyncio.sleep(timeout)
+            return
+        async with self._changed:
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _notify(self) -> None:
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def claim(self, owner: str) -> Optional[dict]:
+        now = datetime.now(timezone.utc)
+        job = await db.generation_jobs.find_one_and_update(
+            {
+                "attempts": {"$lt": self.max_attempts},
+                "$or": [
+                    {"status": "queued"},
+                    {"status": "running", "lease_expires_at": {"$lt": now}}
+                ]
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "lease_owner": owner,
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "started_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            projection=GENERATION_JOB_CLAIM_PROJECTION,
+            sort=[("created_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+        if job is not None:
+            self.claimed += 1
+        return job
+
+    async def fail_abandoned(self) -> None:
+        # Jobs whose lease lapsed on their last allowed attempt are not claimable any more
+        now = datetime.now(timezone.utc)
+        result = await db.generation_jobs.update_many(
+            {"status": "running", "lease_expires_at": {"$lt": now}, "attempts": {"$gte": self.max_attempts}},
+            {"$set": {
+                "status": "failed",
+                "error": "Generation did not finish",
+                "finished_at": now,
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "expires_at": now + timedelta(seconds=self.retention_seconds)
+            }}
+        )
+        self.failed += result.modified_count
+
+    async def _work(self, owner: str) -> None:
+        while True:
+            try:
+                job = await self.claim(owner)
+                if job is None:
+                    await self.fail_abandoned()
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._run(job, owner)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Generation job runner error")
+                await asyncio.sleep(self.poll_seconds)
+
+    async def _renew_lease(self, job_id: str, owner: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            await db.generation_jobs.update_one(
+                {"id": job_id, "lease_owner": owner},
+                {"$set": {"lease_expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)}}
+            )
+
+    async def _finish(self, job_id: str, owner: str, fields: dict) -> None:
+        now = datetime.now(timezone.utc)
+        fields = {**fields, "lease_owner": None, "lease_expires_at": None}
+        if fields["status"] in GENERATION_JOB_TERMINAL_STATUSES:
+            fields.update(finished_at=now, expires_at=now + timedelta(seconds=self.retention_seconds))
+        # Only the current lease holder may record an outcome
+        await db.generation_jobs.update_one({"id": job_id, "lease_owner": owner}, {"$set": fields})
+
+    async def _run(self, job: dict, owner: str) -> None:
+        self._running[job["id"]] = owner
+        await self._notify()
+        renewal = asyncio.create_task(self._renew_lease(job["id"], owner))
+        try:
+            result_id = await run_generation_job(job["id"], job["kind"], job["params"], job["teacher_id"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"Generation job {job['id']} failed")
+            if job["attempts"] < self.max_attempts:
+                self.retried += 1
+                await self._finish(job["id"], owner, {"status": "queued", "error": str(e)})
+            else:
+                self.failed += 1
+                await self._finish(job["id"], owner, {"status": "failed", "error": str(e)})
+        else:
+            self.succeeded += 1
+            await self._finish(job["id"], owner, {"status": "succeeded", "error": None, "result_id": result_id})
+        finally:
+            renewal.cancel()
+        self._running.pop(job["id"], None)
+        await self._notify()
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "running": len(self._running),
+            "claimed": self.claimed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retried": self.retried,
+            "released": self.released,
+        }
+
+generation_job_runner = GenerationJobRunner(
+    GENERATION_JOB_WORKERS,
+    GENERATION_JOB_LEASE_SECONDS,
+    GENERATION_JOB_POLL_SECONDS,
+    GENERATION_JOB_MAX_ATTEMPTS,
+    GENERATION_JOB_RETENTION_SECONDS
+)
+
+def generation_job_result_id(job_id: str) -> str:
+    # Every attempt of a job saves under the same id, so a retry after a
+    # crash or lost lease finds the earlier attempt's result
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"generation-job:{job_id}"))
+
+async def run_generation_job(job_id: str, kind: str, params: dict, teacher_id: str) -> str:
+    result_id = generation_job_result_id(job_id)
+    try:
+        if kind == "assignment":
+            if not await db.assignments.find_one({"id": result_id}, EXISTS_PROJECTION):
+                await create_generated_assignment(AssignmentGenerate(**params), teacher_id, result_id)
+        elif kind == "lesson_plan":
+            if not await db.lesson_plans.find_one({"id": result_id}, EXISTS_PROJECTION):
+                await create_generated_lesson_plan(LessonPlanGenerate(**params), teacher_id, result_id)
+        else:
+            raise ValueError(f"Unknown generation job kind: {kind}")
+    except DuplicateKeyError:
+        # Another attempt of the same job saved it first
+        pass
+    return result_id
+
+async def submit_generation_job(kind: str, params: BaseModel, current_user: dict) -> ORJSONResponse:
+    if current_user["type"] != "teacher":
+        raise HTTPException(status_code=403, detail="Only teachers can generate content")
+    job = GenerationJob(kind=kind, params=params.dict(), teacher_id=current_user["data"]["id"])
+    await db.generation_jobs.insert_one(job.dict())
+    generation_job_runner.wake()
+    return ORJSONResponse(
+        job_status_body(job.dict()),
+        status_code=status.HTTP_202_ACCEPTED,
+        headers={"Location": f"/api/generation-jobs/{job.id}"}
+    )
+
+def job_status_body(job: dict, result: Optional[dict] = None) -> dict:
+    return {"job": trusted_dump(GenerationJob, job), "result": result}
+
+async def load_generation_job_result(job: dict) -> Optional[dict]:
+    if job["status"] != "succeeded" or not job.get("result_id"):
+        return None
+    if job["kind"] == "assignment":
+        document = await db.assignments.find_one({"id": job["result_id"]}, ASSIGNMENT_PROJECTION)
+        return trusted_dump(Assignment, document) if document else None
+    document = await db.lesson_plans.find_one({"id": job["result_id"]}, LESSON_PLAN_PROJECTION)
+    return trusted_dump(LessonPlan, document) if document else None
+
+@api_router.post("/generation-jobs/assignments", status_code=status.HTTP_202_ACCEPTED)
+async def submit_assignment_generation(assignment_data: AssignmentGenerate, current_user=Depends(get_current_user)):
+    if assignment_data.subject.lower() == "spelling":
+        raise HTTPException(status_code=400, detail="Spelling assignments are created with /assignments/spelling/create-and-assign")
+    return await submit_generation_job("assignment", assignment_data, current_user)
+
+@api_router.post("/generation-jobs/lesson-plans", status_code=status.HTTP_202_ACCEPTED)
+async def submit_lesson_plan_generation(lesson_data: LessonPlanGenerate, current_user=Depends(get_current_user)):
+    return await submit_generation_job("lesson_plan", lesson_data, current_user)
+
+@api_router.get("/generation-jobs/{job_id}")
+async def get_generation_job(job_id: str, current_user=Depends(get_current_user_readonly)):
+    if current_user["type"] != "teacher":
+        raise HTTPException(status_code=403, detail="Only teachers can view generation jobs")
+    
+    job = await db.generation_jobs.find_one({"id": job_id, "teacher_id": current_user["data"]["id"]}, GENERATION_JOB_PROJECTION)
+    if not job:
+        raise HTTPException(status_code=404, detail="Generation job not found")
+    return ORJSONResponse(job_status_body(job, await load_generation_job_result(job)))
+
+@api_router.get("/generation-jobs/{job_id}/events")
+async def stream_generation_job(job_id: str, request: Request, current_user=Depends(get_current_user_readonly)):
+    """Server-Sent Events: a `status` event on every change, ending with the finished job and its result."""
+    if current_user["type"] != "teacher":
+        raise HTTPException(status_code=403, detail="Only teachers can view generation jobs")
+    
+    query = {"id": job_id, "teacher_id": current_user["data"]["id"]}
+    job = await db.generation_jobs.find_one(query, GENERATION_JOB_PROJECTION)
+    if not job:
+        raise HTTPException(status_code=404, detail="Generation job not found")
+    
+    async def events():
+        current = job
+        last_sent = None
+        idle = 0.0
+        while current is not None:
+            snapshot = (current["status"], current["attempts"])
+            if snapshot != last_sent:
+                last_sent = snapshot
+                idle = 0.0
+                result = await load_generation_job_result(current)
+                yield sse_event("status", job_status_body(current, result))
+                if current["status"] in GENERATION_JOB_TERMINAL_STATUSES:
+                    return
+            elif idle >= GENERATION_JOB_SSE_KEEPALIVE_SECONDS:
+                idle = 0.0
+                yield b": keepalive\n\n"
+            if await request.is_disconnected():
+                return
+            # Woken early by jobs finishing in this process; jobs run elsewhere show up on the next poll
+            started = time.monotonic()
+            await generation_job_runner.wait_for_change(GENERATION_JOB_POLL_SECONDS)
+            idle += time.monotonic() - started
+            current = await db.generation_jobs.find_one(query, GENERATION_JOB_PROJECTION)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
 
 # Gradebook Routes
 @api_router.get("/gradebook")
-async def get_gradebook(current_user=Depends(get_current_user)):
+async def get_gradebook(current_user=Depends(get_current_user_readonly)):
     if current_user["type"] != "teacher":
         raise HTTPException(status_code=403, detail="Only teachers can view gradebook")
     
     # Get all students
-    students = await db.students.find({"teacher_id": current_user["data"]["id"]}).to_list(1000)
+    students = await db.students.find({"teacher_id": current_user["data"]["id"]}, STUDENT_PROJECTION).to_list(1000)
     
     # Get all completed assignments for each student
     gradebook = []
@@ -1262,11 +2887,11 @@ async def get_gradebook(current_user=Depends(get_current_user)):
         student_assignments = await db.student_assignments.find({
             "student_id": student["id"],
             "completed": True
-        }).to_list(1000)
+        }, GRADEBOOK_ENTRY_PROJECTION).to_list(1000)
         
         assignments_with_details = []
         for sa in student_assignments:
-            assignment = await db.assignments.find_one({"id": sa["assignment_id"]})
+            assignment = await db.assignments.find_one({"id": sa["assignment_id"]}, GRADEBOOK_ASSIGNMENT_PROJECTION)
             if assignment:
                 assignments_with_details.append({
                     "assignment_title": assignment["title"],
@@ -1295,13 +2920,19 @@ async def send_message(message_data: MessageCreate, current_user=Depends(get_cur
     return message
 
 @api_router.get("/messages/{contact_id}", response_model=List[Message])
-async def get_messages(contact_id: str, current_user=Depends(get_current_user)):
-    messages = await db.messages.find({
-        "$or": [
-            {"sender_id": current_user["data"]["id"], "recipient_id": contact_id},
-            {"sender_id": contact_id, "recipient_id": current_user["data"]["id"]}
-        ]
-    }).sort("sent_at", 1).to_list(1000)
+async def get_messages(contact_id: str, page=Depends(page_params), current_user=Depends(get_current_user)):
+    messages, next_cursor = await fetch_page(
+        db.messages,
+        {
+            "$or": [
+                {"sender_id": current_user["data"]["id"], "recipient_id": contact_id},
+                {"sender_id": contact_id, "recipient_id": current_user["data"]["id"]}
+            ]
+        },
+        MESSAGE_PROJECTION,
+        "sent_at",
+        page
+    )
     
     # Mark messages as read
     await db.messages.update_many(
@@ -1309,17 +2940,17 @@ async def get_messages(contact_id: str, current_user=Depends(get_current_user)):
         {"$set": {"read": True}}
     )
     
-    return [Message(**message) for message in messages]
+    return trusted_response(Message, messages, next_cursor)
 
 @api_router.get("/messages", response_model=List[dict])
-async def get_conversations(current_user=Depends(get_current_user)):
+async def get_conversations(current_user=Depends(get_current_user_readonly)):
     if current_user["type"] == "teacher":
         # Get all students for this teacher
-        students = await db.students.find({"teacher_id": current_user["data"]["id"]}).to_list(1000)
+        students = await db.students.find({"teacher_id": current_user["data"]["id"]}, CONTACT_PROJECTION).to_list(1000)
         contacts = [{"id": s["id"], "name": f"{s['first_name']} {s['last_name']}", "type": "student"} for s in students]
     else:
         # Get teacher for this student
-        teacher = await db.users.find_one({"id": current_user["data"]["teacher_id"]})
+        teacher = await db.users.find_one({"id": current_user["data"]["teacher_id"]}, CONTACT_PROJECTION)
         contacts = [{"id": teacher["id"], "name": f"{teacher['first_name']} {teacher['last_name']}", "type": "teacher"}] if teacher else []
     
     # Get last message with each contact
@@ -1332,36 +2963,151 @@ async def get_conversations(current_user=Depends(get_current_user)):
                     {"sender_id": contact["id"], "recipient_id": current_user["data"]["id"]}
                 ]
             },
+            MESSAGE_PROJECTION,
             sort=[("sent_at", -1)]
         )
         
         conversations.append({
             "contact": contact,
-            "last_message": Message(**last_message).dict() if last_message else None
+            "last_message": trusted_dump(Message, last_message) if last_message else None
         })
     
-    return conversations
+    return ORJSONResponse(conversations)
 
 # Health check
 @api_router.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "Homeschool Hub API"}
 
+class EventLoopLagMonitor:
+    """Samples how late the event loop wakes a periodic sleeper."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.current_lag = 0.0
+        self.max_lag = 0.0
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.current_lag = max(0.0, loop.time() - expected)
+            self.max_lag = max(self.max_lag, self.current_lag)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"current_lag_ms": self.current_lag * 1000, "max_lag_ms": self.max_lag * 1000}
+
+loop_lag_monitor = EventLoopLagMonitor(EVENT_LOOP_LAG_SAMPLE_SECONDS)
+
+def _check_level(value: float, degraded: float, unhealthy: Optional[float] = None) -> str:
+    if unhealthy is not None and value >= unhealthy:
+        return "unhealthy"
+    if value >= degraded:
+        return "degraded"
+    return "healthy"
+
+@api_router.get("/health/ready")
+async def readiness_check():
+    checks = {}
+    
+    # Mongo round trip
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(db.command("ping"), timeout=READINESS_MONGO_TIMEOUT_MS / 1000)
+        ping_ms = (time.perf_counter() - started) * 1000
+        checks["mongo"] = {"status": _check_level(ping_ms, READINESS_MONGO_DEGRADED_MS), "ping_ms": round(ping_ms, 2)}
+    except Exception as e:
+        checks["mongo"] = {"status": "unhealthy", "error": str(e) or type(e).__name__}
+    
+    lag_ms = loop_lag_monitor.current_lag * 1000
+    checks["event_loop"] = {
+        "status": _check_level(lag_ms, READINESS_LOOP_LAG_DEGRADED_MS, READINESS_LOOP_LAG_UNHEALTHY_MS),
+        "lag_ms": round(lag_ms, 2)
+    }
+    
+    queue_depth = password_hasher.queue_depth
+    checks["password_executor"] = {
+        "status": _check_level(queue_depth, READINESS_EXECUTOR_QUEUE_DEGRADED, READINESS_EXECUTOR_QUEUE_UNHEALTHY),
+        "queue_depth": queue_depth,
+        "in_flight": password_hasher.in_flight
+    }
+    
+    # An open LLM circuit only affects content generation, so it never makes the instance unhealthy
+    circuit_state = llm_circuit.state
+    checks["llm_provider"] = {
+        "status": "healthy" if circuit_state == "closed" else "degraded",
+        "circuit": circuit_state
+    }
+    
+    statuses = {check["status"] for check in checks.values()}
+    if "unhealthy" in statuses:
+        overall, status_code = "unhealthy", status.HTTP_503_SERVICE_UNAVAILABLE
+    elif "degraded" in statuses:
+        overall, status_code = "degraded", READINESS_DEGRADED_STATUS_CODE
+    else:
+        overall, status_code = "healthy", status.HTTP_200_OK
+    
+    return JSONResponse(
+        status_code=status_code,
+        content={"status": overall, "service": "Homeschool Hub API", "checks": checks}
+    )
+
+# Runtime stats
+def runtime_stats() -> dict:
+    return {
+        "principal_cache": principal_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "mongo_pool": mongo_pool_monitor.stats(),
+        "event_loop": loop_lag_monitor.stats(),
+        "llm_circuit": llm_circuit.stats(),
+        "llm_sdk": llm_sdk.stats(),
+        "genai_sdk": genai_sdk.stats(),
+        "generation_cache": generation_cache.stats(),
+        "generation_coalescing": generation_flights.stats(),
+        "generation_jobs": generation_job_runner.stats(),
+        "lesson_plan_streams": lesson_plan_stream_stats.stats(),
+        "compression": compression_stats.stats()
+    }
+
+@api_router.get("/stats")
+async def get_runtime_stats(current_user=Depends(get_current_user)):
+    if current_user["type"] != "teacher":
+        raise HTTPException(status_code=403, detail="Only teachers can view runtime stats")
+    return runtime_stats()
+
 # Include the router in the main app
 # Reward System Routes
 @api_router.get("/rewards", response_model=List[Reward])
-async def get_rewards(current_user=Depends(get_current_user)):
+async def get_rewards(request: Request, page=Depends(page_params), current_user=Depends(get_current_user_readonly)):
     # Both teachers and students can view rewards
     if current_user["type"] == "teacher":
-        rewards = await db.rewards.find({"teacher_id": current_user["data"]["id"]}).to_list(1000)
+        query = {"teacher_id": current_user["data"]["id"]}
     else:
         # Students see rewards from their teacher
-        student = await db.students.find_one({"id": current_user["data"]["id"]})
-        if not student:
-            raise HTTPException(status_code=404, detail="Student not found")
-        rewards = await db.rewards.find({"teacher_id": student["teacher_id"], "active": True}).to_list(1000)
+        query = {"teacher_id": current_user["data"]["teacher_id"], "active": True}
+    
+    # Versioned per teacher; students get a different (active-only) representation
+    etag, not_modified = await check_not_modified(request, "rewards", query["teacher_id"], current_user["type"])
+    if not_modified:
+        return not_modified
     
-    return [Reward(**reward) for reward in rewards]
+    rewards, next_cursor = await fetch_page(db.rewards, query, REWARD_PROJECTION, "created_at", page)
+    return with_etag(trusted_response(Reward, rewards, next_cursor), etag)
 
 @api_router.post("/rewards", response_model=Reward)
 async def create_reward(reward_data: RewardCreate, current_user=Depends(get_current_user)):
@@ -1376,6 +3122,7 @@ async def create_reward(reward_data: RewardCreate, current_user=Depends(get_curr
     )
     
     await db.rewards.insert_one(reward.dict())
+    await bump_versions("rewards", current_user["data"]["id"])
     return reward
 
 @api_router.put("/rewards/{reward_id}", response_model=Reward)
@@ -1383,7 +3130,7 @@ async def update_reward(reward_id: str, reward_data: RewardCreate, current_user=
     if current_user["type"] != "teacher":
         raise HTTPException(status_code=403, detail="Only teachers can update rewards")
     
-    reward = await db.rewards.find_one({"id": reward_id, "teacher_id": current_user["data"]["id"]})
+    reward = await db.rewards.find_one({"id": reward_id, "teacher_id": current_user["data"]["id"]}, EXISTS_PROJECTION)
     if not reward:
         raise HTTPException(status_code=404, detail="Reward not found")
     
@@ -1395,8 +3142,9 @@ async def update_reward(reward_id: str, reward_data: RewardCreate, current_user=
             "points_cost": reward_data.points_cost
         }}
     )
+    await bump_versions("rewards", current_user["data"]["id"])
     
-    updated_reward = await db.rewards.find_one({"id": reward_id})
+    updated_reward = await db.rewards.find_one({"id": reward_id}, REWARD_PROJECTION)
     return Reward(**updated_reward)
 
 @api_router.delete("/rewards/{reward_id}")
@@ -1408,27 +3156,52 @@ async def delete_reward(reward_id: str, current_user=Depends(get_current_user)):
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Reward not found")
     
+    await bump_versions("rewards", current_user["data"]["id"])
     return {"message": "Reward deleted successfully"}
 
 @api_router.get("/student/points")
-async def get_student_points(current_user=Depends(get_current_user)):
+async def get_student_points(
+    page=Depends(page_params),
+    redemptions_cursor: Optional[str] = None,
+    current_user=Depends(get_current_user_readonly)
+):
     if current_user["type"] != "student":
         raise HTTPException(status_code=403, detail="Only students can view their points")
     
-    # Get all transactions
-    transactions = await db.point_transactions.find({"student_id": current_user["data"]["id"]}).to_list(1000)
+    student_id = current_user["data"]["id"]
+    if page is None and redemptions_cursor is not None:
+        page = PageRequest(PAGE_SIZE_DEFAULT)
     
-    # Calculate total points
-    total_points = sum(t["points"] for t in transactions)
+    # Transactions and redemptions page independently: `cursor` pages the
+    # transactions, `redemptions_cursor` the redemptions
+    transactions, next_transactions_cursor = await fetch_page(
+        db.point_transactions, {"student_id": student_id}, POINT_TRANSACTION_PROJECTION, "created_at", page
+    )
+    redemptions_page = PageRequest(page.limit, redemptions_cursor) if page else None
+    redemptions, next_redemptions_cursor = await fetch_page(
+        db.reward_redemptions, {"student_id": student_id}, REWARD_REDEMPTION_PROJECTION, "redeemed_at", redemptions_page
+    )
     
-    # Get redemption history
-    redemptions = await db.reward_redemptions.find({"student_id": current_user["data"]["id"]}).to_list(1000)
+    # Calculate total points
+    if page is None:
+        total_points = sum(t["points"] for t in transactions)
+    else:
+        # A page only holds some of the transactions; total them in Mongo
+        totals = await db.point_transactions.aggregate([
+            {"$match": {"student_id": student_id}},
+            {"$group": {"_id": None, "total": {"$sum": "$points"}}}
+        ]).to_list(1)
+        total_points = totals[0]["total"] if totals else 0
     
-    return {
+    result = {
         "total_points": total_points,
-        "transactions": [PointTransaction(**t) for t in transactions],
-        "redemptions": [RewardRedemption(**r) for r in redemptions]
+        "transactions": [trusted_dump(PointTransaction, t) for t in transactions],
+        "redemptions": [trusted_dump(RewardRedemption, r) for r in redemptions]
     }
+    if page is not None:
+        result["next_transactions_cursor"] = next_transactions_cursor
+        result["next_redemptions_cursor"] = next_redemptions_cursor
+    return ORJSONResponse(result)
 
 @api_router.post("/student/redeem")
 async def redeem_reward(reward_id: str, current_user=Depends(get_current_user)):
@@ -1436,12 +3209,12 @@ async def redeem_reward(reward_id: str, current_user=Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Only students can redeem rewards")
     
     # Get reward
-    reward = await db.rewards.find_one({"id": reward_id, "active": True})
+    reward = await db.rewards.find_one({"id": reward_id, "active": True}, REDEEMABLE_REWARD_PROJECTION)
     if not reward:
         raise HTTPException(status_code=404, detail="Reward not found or inactive")
     
     # Calculate current points
-    transactions = await db.point_transactions.find({"student_id": current_user["data"]["id"]}).to_list(1000)
+    transactions = await db.point_transactions.find({"student_id": current_user["data"]["id"]}, POINTS_ONLY_PROJECTION).to_list(1000)
     total_points = sum(t["points"] for t in transactions)
     
     # Check if student has enough points
@@ -1480,7 +3253,7 @@ async def adjust_student_points(adjustment: ManualPointsAdjustment, current_user
         raise HTTPException(status_code=403, detail="Only teachers can adjust points")
     
     # Verify student belongs to teacher
-    student = await db.students.find_one({"id": adjustment.student_id, "teacher_id": current_user["data"]["id"]})
+    student = await db.students.find_one({"id": adjustment.student_id, "teacher_id": current_user["data"]["id"]}, EXISTS_PROJECTION)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
@@ -1495,7 +3268,7 @@ async def adjust_student_points(adjustment: ManualPointsAdjustment, current_user
     await db.point_transactions.insert_one(point_transaction.dict())
     
     # Get new total
-    transactions = await db.point_transactions.find({"student_id": adjustment.student_id}).to_list(1000)
+    transactions = await db.point_transactions.find({"student_id": adjustment.student_id}, POINTS_ONLY_PROJECTION).to_list(1000)
     total_points = sum(t["points"] for t in transactions)
     
     return {
@@ -1505,21 +3278,21 @@ async def adjust_student_points(adjustment: ManualPointsAdjustment, current_user
     }
 
 @api_router.get("/teacher/student-points")
-async def get_all_students_points(current_user=Depends(get_current_user)):
+async def get_all_students_points(current_user=Depends(get_current_user_readonly)):
     if current_user["type"] != "teacher":
         raise HTTPException(status_code=403, detail="Only teachers can view student points")
     
     # Get all students for this teacher
-    students = await db.students.find({"teacher_id": current_user["data"]["id"]}).to_list(1000)
+    students = await db.students.find({"teacher_id": current_user["data"]["id"]}, STUDENT_POINTS_SUMMARY_PROJECTION).to_list(1000)
     
     result = []
     for student in students:
         # Get transactions
-        transactions = await db.point_transactions.find({"student_id": student["id"]}).to_list(1000)
+        transactions = await db.point_transactions.find({"student_id": student["id"]}, POINT_TRANSACTION_PROJECTION).to_list(1000)
         total_points = sum(t["points"] for t in transactions)
         
         # Get redemptions
-        redemptions = await db.reward_redemptions.find({"student_id": student["id"]}).to_list(1000)
+        redemptions = await db.reward_redemptions.find({"student_id": student["id"]}, REWARD_REDEMPTION_PROJECTION).to_list(1000)
         
         result.append({
             "student_id": student["id"],
@@ -1538,7 +3311,7 @@ async def initialize_default_rewards(current_user=Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Only teachers can initialize rewards")
     
     # Check if teacher already has rewards
-    existing_rewards = await db.rewards.find({"teacher_id": current_user["data"]["id"]}).to_list(1)
+    existing_rewards = await db.rewards.find({"teacher_id": current_user["data"]["id"]}, EXISTS_PROJECTION).to_list(1)
     if existing_rewards:
         return {"message": "Rewards already initialized"}
     
@@ -1562,17 +3335,24 @@ async def initialize_default_rewards(current_user=Depends(get_current_user)):
         rewards_to_insert.append(reward.dict())
     
     await db.rewards.insert_many(rewards_to_insert)
+    await bump_versions("rewards", current_user["data"]["id"])
     
     return {"message": "Default rewards initialized successfully", "count": len(rewards_to_insert)}
 
 # Spelling Word List Routes
 @api_router.get("/spelling-word-lists", response_model=List[SpellingWordList])
-async def get_spelling_word_lists(current_user=Depends(get_current_user)):
+async def get_spelling_word_lists(request: Request, page=Depends(page_params), current_user=Depends(get_current_user_readonly)):
     if current_user["type"] != "teacher":
         raise HTTPException(status_code=403, detail="Only teachers can view word lists")
     
-    word_lists = await db.spelling_word_lists.find({"teacher_id": current_user["data"]["id"]}).to_list(1000)
-    return [SpellingWordList(**wl) for wl in word_lists]
+    etag, not_modified = await check_not_modified(request, "spelling_word_lists", current_user["data"]["id"])
+    if not_modified:
+        return not_modified
+    
+    word_lists, next_cursor = await fetch_page(
+        db.spelling_word_lists, {"teacher_id": current_user["data"]["id"]}, SPELLING_WORD_LIST_PROJECTION, "created_at", page
+    )
+    return with_etag(trusted_response(SpellingWordList, word_lists, next_cursor), etag)
 
 @api_router.post("/spelling-word-lists", response_model=SpellingWordList)
 async def create_spelling_word_list(word_list_data: SpellingWordListCreate, current_user=Depends(get_current_user)):
@@ -1596,6 +3376,7 @@ async def create_spelling_word_list(word_list_data: SpellingWordListCreate, curr
     )
     
     await db.spelling_word_lists.insert_one(word_list.dict())
+    await bump_versions("spelling_word_lists", current_user["data"]["id"])
     return word_list
 
 @api_router.put("/spelling-word-lists/{word_list_id}", response_model=SpellingWordList)
@@ -1606,7 +3387,7 @@ async def update_spelling_word_list(word_list_id: str, word_list_data: SpellingW
     if len(word_list_data.words) != 10:
         raise HTTPException(status_code=400, detail="Word list must contain exactly 10 words")
     
-    word_list = await db.spelling_word_lists.find_one({"id": word_list_id, "teacher_id": current_user["data"]["id"]})
+    word_list = await db.spelling_word_lists.find_one({"id": word_list_id, "teacher_id": current_user["data"]["id"]}, EXISTS_PROJECTION)
     if not word_list:
         raise HTTPException(status_code=404, detail="Word list not found")
     
@@ -1618,8 +3399,9 @@ async def update_spelling_word_list(word_list_id: str, word_list_data: SpellingW
             "student_id": word_list_data.student_id
         }}
     )
+    await bump_versions("spelling_word_lists", current_user["data"]["id"])
     
-    updated_list = await db.spelling_word_lists.find_one({"id": word_list_id})
+    updated_list = await db.spelling_word_lists.find_one({"id": word_list_id}, SPELLING_WORD_LIST_PROJECTION)
     return SpellingWordList(**updated_list)
 
 @api_router.delete("/spelling-word-lists/{word_list_id}")
@@ -1631,28 +3413,444 @@ async def delete_spelling_word_list(word_list_id: str, current_user=Depends(get_
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Word list not found")
     
+    await bump_versions("spelling_word_lists", current_user["data"]["id"])
     return {"message": "Word list deleted successfully"}
 
 @api_router.get("/student/{student_id}/spelling-word-list", response_model=SpellingWordList)
-async def get_student_active_word_list(student_id: str, current_user=Depends(get_current_user)):
+async def get_student_active_word_list(student_id: str, current_user=Depends(get_current_user_readonly)):
     if current_user["type"] != "teacher":
         raise HTTPException(status_code=403, detail="Only teachers can view student word lists")
     
-    word_list = await db.spelling_word_lists.find_one({"student_id": student_id, "active": True})
+    word_list = await db.spelling_word_lists.find_one({"student_id": student_id, "active": True}, SPELLING_WORD_LIST_PROJECTION)
     if not word_list:
         raise HTTPException(status_code=404, detail="No active word list for this student")
     
     return SpellingWordList(**word_list)
 
+# Database instrumentation
+class DbRequestStats:
+    __slots__ = ("operations", "seconds")
+
+    def __init__(self):
+        self.operations = 0
+        self.seconds = 0.0
+
+_db_request_stats: ContextVar[Optional[DbRequestStats]] = ContextVar("db_request_stats", default=None)
+
+def _record_db_operation(started: float) -> None:
+    stats = _db_request_stats.get()
+    if stats is not None:
+        stats.operations += 1
+        stats.seconds += time.perf_counter() - started
+
+def _timed(method):
+    async def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            _record_db_operation(started)
+    return timed
+
+class InstrumentedCursor:
+    """Counts a cursor as one operation, timed from first fetch to exhaustion."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if not callable(attr):
+            return attr
+        def chained(*args, **kwargs):
+            # Keep the wrapper on builder calls like sort()/limit() that return the cursor
+            result = attr(*args, **kwargs)
+            return self if result is self._cursor else result
+        return chained
+
+    async def to_list(self, length=None):
+        started = time.perf_counter()
+        try:
+            return await self._cursor.to_list(length)
+        finally:
+            _record_db_operation(started)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        started = time.perf_counter()
+        try:
+            async for document in self._cursor:
+                yield document
+        finally:
+            _record_db_operation(started)
+
+_TIMED_COLLECTION_METHODS = frozenset({
+    "find_one", "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "find_one_and_update", "find_one_and_replace",
+    "find_one_and_delete", "count_documents", "estimated_document_count", "distinct",
+    "bulk_write", "create_index", "create_indexes", "index_information", "drop",
+})
+_CURSOR_COLLECTION_METHODS = frozenset({"find", "aggregate"})
+
+class InstrumentedCollection:
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name in _TIMED_COLLECTION_METHODS:
+            return _timed(attr)
+        if name in _CURSOR_COLLECTION_METHODS:
+            return lambda *args, **kwargs: InstrumentedCursor(attr(*args, **kwargs))
+        return attr
+
+class InstrumentedDatabase:
+    """Wraps a Motor database so each request can count its DB operations."""
+
+    def __init__(self, database):
+        self._database = database
+        self._collections = {}
+
+    def __getitem__(self, name):
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = InstrumentedCollection(self._database[name])
+        return collection
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        # Anything the database class doesn't define is a collection name
+        if not hasattr(type(self._database), name):
+            return self[name]
+        attr = getattr(self._database, name)
+        if name == "command":
+            return _timed(attr)
+        return attr
+
+# Response compression
+_COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+
+def _compress_gzip(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+def _compress_brotli(body: bytes) -> bytes:
+    return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+
+# In server preference order
+COMPRESSORS = {"br": _compress_brotli, "gzip": _compress_gzip} if brotli else {"gzip": _compress_gzip}
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the server's most preferred encoding the client accepts (q > 0)."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in COMPRESSORS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+def _strip_encoding_suffix(etag: str) -> str:
+    for encoding in COMPRESSORS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+class CompressionStats:
+    def __init__(self):
+        self.compressed = 0
+        self.skipped_small = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+        self.by_encoding = {}
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int, seconds: float) -> None:
+        self.compressed += 1
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        self.seconds += seconds
+        self.by_encoding[encoding] = self.by_encoding.get(encoding, 0) + 1
+
+    def stats(self) -> dict:
+        return {
+            "compressed": self.compressed,
+            "skipped_small": self.skipped_small,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+            "cpu_ms": round(self.seconds * 1000, 2),
+            **{f"responses_{encoding}": count for encoding, count in self.by_encoding.items()}
+        }
+
+compression_stats = CompressionStats()
+
+class CompressionMiddleware:
+    """Negotiated gzip/brotli for complete response bodies above COMPRESSION_MIN_BYTES.
+
+    Streaming responses (more_body), already-encoded bodies, non-text types and
+    excluded path prefixes pass through untouched. Strong ETags get the
+    negotiated encoding as a suffix, on 304s as well as full responses, so
+    each representation has its own validator.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(COMPRESSION_EXCLUDED_PATHS):
+            await self.app(scope, receive, send)
+            return
+        
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate_encoding(accept_encoding) if accept_encoding else None
+        
+        start_message = None
+        passthrough = False
+        
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            
+            headers = MutableHeaders(raw=list(start_message.get("headers", [])))
+            body = message.get("body", b"")
+            not_modified = start_message["status"] == 304
+            if not not_modified and (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or not headers.get("content-type", "").startswith(_COMPRESSIBLE_TYPES)
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+            
+            # Every compressible response varies on Accept-Encoding, compressed or not
+            headers.add_vary_header("Accept-Encoding")
+            # The suffix follows the negotiated encoding, not whether this body
+            # was big enough to compress, so a 304 carries the same ETag as the
+            # full response it stands for
+            etag = headers.get("etag")
+            if encoding is not None and etag and not etag.startswith("W/"):
+                headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+            if not_modified or encoding is None or len(body) < COMPRESSION_MIN_BYTES:
+                if encoding is not None and not not_modified:
+                    compression_stats.skipped_small += 1
+                start_message["headers"] = headers.raw
+                await send(start_message)
+                await send(message)
+                return
+            
+            started = time.perf_counter()
+            compressed = COMPRESSORS[encoding](body)
+            compression_stats.record(encoding, len(body), len(compressed), time.perf_counter() - started)
+            
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            start_message["headers"] = headers.raw
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+        
+        await self.app(scope, receive, send_compressed)
+
+# Request metrics
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RESPONSE_SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+DB_OPERATION_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+def _label_string(labels: dict) -> str:
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in labels.values())
+    return ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped))
+
+def _render_histogram(lines: List[str], name: str, labels: dict, histogram: Histogram) -> None:
+    base = _label_string(labels)
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{base},le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{base},le="+Inf"}} {histogram.count}')
+    lines.append(f'{name}_sum{{{base}}} {histogram.sum}')
+    lines.append(f'{name}_count{{{base}}} {histogram.count}')
+
+class RequestMetrics:
+    """Per-route request metrics, labelled by route template rather than raw path."""
+
+    def __init__(self):
+        self.latency = {}
+        self.response_size = {}
+        self.db_operations = {}
+        self.db_seconds = {}
+        self.status_counts = {}
+        self.over_query_budget = {}
+        self.in_flight = 0
+
+    def observe(self, method: str, route: str, status_code: int, seconds: float, size: int, db_stats: DbRequestStats) -> None:
+        key = (method, route)
+        if key not in self.latency:
+            self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.response_size[key] = Histogram(RESPONSE_SIZE_BUCKETS)
+            self.db_operations[key] = Histogram(DB_OPERATION_BUCKETS)
+            self.db_seconds[key] = Histogram(LATENCY_BUCKETS)
+        self.latency[key].observe(seconds)
+        self.response_size[key].observe(size)
+        self.db_operations[key].observe(db_stats.operations)
+        self.db_seconds[key].observe(db_stats.seconds)
+        if db_stats.operations > DB_QUERY_BUDGET:
+            self.over_query_budget[key] = self.over_query_budget.get(key, 0) + 1
+        status_key = (method, route, status_code)
+        self.status_counts[status_key] = self.status_counts.get(status_key, 0) + 1
+
+    def render(self, lines: List[str]) -> None:
+        lines.append("# HELP http_request_duration_seconds Request latency by route")
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        for (method, route), histogram in sorted(self.latency.items()):
+            _render_histogram(lines, "http_request_duration_seconds", {"method": method, "route": route}, histogram)
+        lines.append("# HELP http_response_size_bytes Response body size by route")
+        lines.append("# TYPE http_response_size_bytes histogram")
+        for (method, route), histogram in sorted(self.response_size.items()):
+            _render_histogram(lines, "http_response_size_bytes", {"method": method, "route": route}, histogram)
+        lines.append("# HELP http_request_db_operations Database operations per request by route")
+        lines.append("# TYPE http_request_db_operations histogram")
+        for (method, route), histogram in sorted(self.db_operations.items()):
+            _render_histogram(lines, "http_request_db_operations", {"method": method, "route": route}, histogram)
+        lines.append("# HELP http_request_db_seconds Time spent in database operations per request by route")
+        lines.append("# TYPE http_request_db_seconds histogram")
+        for (method, route), histogram in sorted(self.db_seconds.items()):
+            _render_histogram(lines, "http_request_db_seconds", {"method": method, "route": route}, histogram)
+        lines.append("# HELP http_requests_over_query_budget_total Requests that exceeded DB_QUERY_BUDGET")
+        lines.append("# TYPE http_requests_over_query_budget_total counter")
+        for (method, route), count in sorted(self.over_query_budget.items()):
+            lines.append(f'http_requests_over_query_budget_total{{{_label_string({"method": method, "route": route})}}} {count}')
+        lines.append("# HELP http_requests_total Requests by route and status code")
+        lines.append("# TYPE http_requests_total counter")
+        for (method, route, code), count in sorted(self.status_counts.items()):
+            lines.append(f'http_requests_total{{{_label_string({"method": method, "route": route, "status": code})}}} {count}')
+        lines.append("# HELP http_requests_in_flight Requests currently being served")
+        lines.append("# TYPE http_requests_in_flight gauge")
+        lines.append(f"http_requests_in_flight {self.in_flight}")
+
+request_metrics = RequestMetrics()
+
+def route_label(scope) -> str:
+    # FastAPI records the matched route in the scope; its path is the template
+    # (e.g. /api/students/{student_id}), which keeps label cardinality bounded
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        status_code = 500
+        size = 0
+        db_stats = DbRequestStats()
+        
+        async def send_with_metrics(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if DB_QUERY_DEBUG_HEADERS:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-db-query-count", str(db_stats.operations).encode()),
+                        (b"x-db-query-time-ms", f"{db_stats.seconds * 1000:.2f}".encode()),
+                    ]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+        
+        request_metrics.in_flight += 1
+        db_stats_token = _db_request_stats.set(db_stats)
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _db_request_stats.reset(db_stats_token)
+            request_metrics.in_flight -= 1
+            route = route_label(scope)
+            request_metrics.observe(scope["method"], route, status_code, time.perf_counter() - started, size, db_stats)
+            if db_stats.operations > DB_QUERY_BUDGET:
+                logger.warning(
+                    f"{scope['method']} {route} made {db_stats.operations} database operations "
+                    f"in {db_stats.seconds * 1000:.1f}ms (budget {DB_QUERY_BUDGET})"
+                )
+
+def render_runtime_stats(lines: List[str]) -> None:
+    for component, values in runtime_stats().items():
+        for key, value in values.items():
+            name = f"keystone_{component}_{key}"
+            if isinstance(value, bool):
+                value = int(value)
+            if isinstance(value, (int, float)):
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+            elif isinstance(value, str):
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f'{name}{{{_label_string({key: value})}}} 1')
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    lines = []
+    request_metrics.render(lines)
+    render_runtime_stats(lines)
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
 app.include_router(api_router)
 
+# The per-request query headers are only sent with DB_QUERY_DEBUG_HEADERS on
+cors_expose_headers = ["X-Next-Cursor", "ETag", "Location"]
+if DB_QUERY_DEBUG_HEADERS:
+    cors_expose_headers += ["X-DB-Query-Count", "X-DB-Query-Time-Ms"]
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=cors_expose_headers,
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Configure logging
 logging.basicConfig(
@@ -1661,6 +3859,288 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+# Indexes backing every hot query, declared per collection
+MONGO_INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    "students": [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # List pages are ordered by (created_at, id) within the owner, see fetch_page
+        IndexModel([("teacher_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], name="teacher_id_created_at_id"),
+    ],
+    "assignments": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("teacher_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], name="teacher_id_created_at_id"),
+    ],
+    "student_assignments": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("student_id", ASCENDING), ("completed", ASCENDING)], name="student_id_completed"),
+        IndexModel([("student_id", ASCENDING), ("assigned_at", ASCENDING), ("id", ASCENDING)], name="student_id_assigned_at_id"),
+    ],
+    "point_transactions": [
+        IndexModel([("student_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], name="student_id_created_at_id"),
+    ],
+    "reward_redemptions": [
+        IndexModel([("student_id", ASCENDING), ("redeemed_at", ASCENDING), ("id", ASCENDING)], name="student_id_redeemed_at_id"),
+    ],
+    "rewards": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("teacher_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], name="teacher_id_created_at_id"),
+        IndexModel([("teacher_id", ASCENDING), ("active", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], name="teacher_id_active_created_at_id"),
+    ],
+    "lesson_plans": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("teacher_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], name="teacher_id_created_at_id"),
+    ],
+    "messages": [
+        # Serves both branches of the conversation $or plus the (sent_at, id) order;
+        # walked backwards for the latest message per conversation
+        IndexModel([("sender_id", ASCENDING), ("recipient_id", ASCENDING), ("sent_at", ASCENDING), ("id", ASCENDING)], name="sender_recipient_sent_at_id"),
+    ],
+    "spelling_word_lists": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("student_id", ASCENDING), ("active", ASCENDING)], name="student_id_active"),
+        IndexModel([("teacher_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], name="teacher_id_created_at_id"),
+    ],
+    "refresh_tokens": [
+        IndexModel([("token_hash", ASCENDING)], name="token_hash_unique", unique=True),
+        IndexModel([("family_id", ASCENDING)], name="family_id"),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+        # Expired refresh tokens are removed by Mongo's TTL monitor
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "generation_cache": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+        # Size-based eviction removes the least recently used entries first
+        IndexModel([("last_used_at", ASCENDING)], name="last_used_at"),
+    ],
+    "generation_jobs": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # Claims take the oldest queued (or lease-expired) job
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at"),
+        # Finished jobs are removed by Mongo's TTL monitor after GENERATION_JOB_RETENTION_SECONDS
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+_INDEX_OPTIONS = ("unique", "expireAfterSeconds")
+
+async def ensure_indexes(database, dry_run: bool = False) -> List[dict]:
+    """Create any declared index that is missing; safe to run on every start.
+
+    Existing indexes are matched on their key pattern, so an index created by
+    hand under another name counts as present. One with the same keys but
+    different unique/TTL options is reported as a conflict and left alone.
+    """
+    report = []
+    for collection_name, indexes in MONGO_INDEXES.items():
+        collection = database[collection_name]
+        existing = await collection.index_information()
+        by_keys = {tuple(tuple(k) for k in info["key"]): info for info in existing.values()}
+        
+        for index in indexes:
+            spec = index.document
+            keys = tuple(spec["key"].items())
+            entry = {"collection": collection_name, "name": spec["name"], "keys": dict(keys)}
+            current = by_keys.get(keys)
+            
+            if current is not None:
+                mismatched = [opt for opt in _INDEX_OPTIONS if current.get(opt) != spec.get(opt)]
+                entry["status"] = "conflict" if mismatched else "exists"
+                if mismatched:
+                    entry["error"] = f"Existing index differs on {', '.join(mismatched)}"
+            elif dry_run:
+                entry["status"] = "missing"
+            else:
+                started = time.perf_counter()
+                try:
+                    await collection.create_indexes([index])
+                    entry["status"] = "created"
+                except PyMongoError as e:
+                    # e.g. duplicate values blocking a unique index
+                    entry["status"] = "failed"
+                    entry["error"] = str(e)
+                entry["seconds"] = round(time.perf_counter() - started, 3)
+            report.append(entry)
+    return report
+
+def log_index_report(report: List[dict], dry_run: bool = False) -> None:
+    for entry in report:
+        if entry["status"] == "exists":
+            continue
+        line = f"Index {entry['collection']}.{entry['name']} {entry['keys']}: {entry['status']}"
+        if "seconds" in entry:
+            line += f" in {entry['seconds']}s"
+        if entry.get("error"):
+            logger.warning(f"{line} ({entry['error']})")
+        else:
+            logger.info(line)
+    counts = {}
+    for entry in report:
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    build_seconds = sum(entry.get("seconds", 0) for entry in report)
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    logger.info(f"Index bootstrap{' (dry run)' if dry_run else ''}: {summary}; {build_seconds:.3f}s building")
+
+# MongoDB client lifecycle
+class MongoPoolMonitor(monitoring.ConnectionPoolListener):
+    """Connection pool telemetry: open/in-use connections and checkout waits.
+
+    pymongo calls these hooks from Motor's worker threads, and the checkout
+    started/finished events for one operation arrive on the same thread, so
+    the wait start is kept thread-local.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.open_connections = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.peak_in_use = 0
+        self.peak_waiting = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checkout_timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.pool_clears = 0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+        with self._lock:
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+
+    def _finish_wait(self) -> float:
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def connection_checked_out(self, event):
+        waited = self._finish_wait()
+        with self._lock:
+            self.waiting -= 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self.checkouts += 1
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def connection_check_out_failed(self, event):
+        self._finish_wait()
+        with self._lock:
+            self.waiting -= 1
+            self.checkout_failures += 1
+            if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+                self.checkout_timeouts += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_pool_size": MONGO_MAX_POOL_SIZE,
+                "min_pool_size": MONGO_MIN_POOL_SIZE,
+                "open_connections": self.open_connections,
+                "in_use": self.in_use,
+                "waiting": self.waiting,
+                "peak_in_use": self.peak_in_use,
+                "peak_waiting": self.peak_waiting,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "checkout_timeouts": self.checkout_timeouts,
+                "avg_checkout_wait_ms": (self.total_wait_seconds / self.checkouts * 1000) if self.checkouts else 0.0,
+                "max_checkout_wait_ms": self.max_wait_seconds * 1000,
+                "pool_clears": self.pool_clears,
+            }
+
+mongo_pool_monitor = MongoPoolMonitor()
+
+async def connect_to_mongo(warm_connections: int = MONGO_WARM_CONNECTIONS):
+    """Create the Motor client, ping the server and open a few pooled connections."""
+    global client, db
+    client = AsyncIOMotorClient(
+        mongo_url,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        event_listeners=[mongo_pool_monitor],
+    )
+    db = InstrumentedDatabase(client[MONGO_DB_NAME])
+    
+    started = time.perf_counter()
+    await client.admin.command("ping")
+    # Concurrent pings each need their own connection, which fills the pool
+    if warm_connections > 1:
+        await asyncio.gather(*(client.admin.command("ping") for _ in range(warm_connections)))
+    logger.info(
+        f"Connected to MongoDB in {(time.perf_counter() - started) * 1000:.1f}ms "
+        f"({mongo_pool_monitor.open_connections} warm connections, max pool {MONGO_MAX_POOL_SIZE})"
+    )
+
+async def close_mongo() -> None:
+    global client, db
+    if client is not None:
+        client.close()
+    client = None
+    db = None
+
+# Process lifespan
+# Everything that owns sockets, threads or tasks is created here, inside the
+# worker process and its event loop, and torn down in reverse order. Importing
+# server.py creates none of it, so a process manager can import then fork
+# (gunicorn --preload) or spawn workers (uvicorn --workers) safely.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    password_hasher.start()
+    principal_cache.clear()
+    await connect_to_mongo()
+    loop_lag_monitor.start()
+    try:
+        if LLM_PRELOAD and LLM_PROVIDER != "fake":
+            await llm_sdk.load_async()
+            await genai_sdk.load_async()
+        if MONGO_INDEX_BOOTSTRAP != "off":
+            dry_run = MONGO_INDEX_BOOTSTRAP == "dry-run"
+            log_index_report(await ensure_indexes(db, dry_run=dry_run), dry_run=dry_run)
+        generation_job_runner.start()
+        logger.info(f"Worker {os.getpid()} started")
+        yield
+    finally:
+        await drain_background_tasks(BACKGROUND_TASK_DRAIN_SECONDS)
+        await generation_job_runner.stop()
+        await loop_lag_monitor.stop()
+        await close_mongo()
+        password_hasher.shutdown()
+        logger.info(f"Worker {os.getpid()} stopped")
@@ -0,0 +1,126 @@
+"""
+Shared setup for the runtime tests.
+
+backend/server.py reads its Mongo settings at import but only connects in
+the app's lifespan, so the tests import it with placeholder settings and
+swap `server.db` for the in-memory FakeDatabase below where a route needs
+storage.
+"""
+
+import copy
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "homeschool_hub_test")
+
+
+def matches(document: dict, query: dict) -> bool:
+    for key, condition in query.items():
+        value = document.get(key)
+        if isinstance(condition, dict):
+            for operator, operand in condition.items():
+                if operator == "$gt" and not (value is not None and value > operand):
+                    return False
+                if operator == "$in" and value not in operand:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+def apply_update(document: dict, update: dict) -> None:
+    document.update(update.get("$set", {}))
+    for key, amount in update.get("$inc", {}).items():
+        document[key] = document.get(key, 0) + amount
+
+
+class FakeCursor:
+    def __init__(self, documents: list):
+        self.documents = documents
+
+    def sort(self, order: list) -> "FakeCursor":
+        for key, direction in reversed(order):
+            self.documents.sort(key=lambda document: document[key], reverse=direction < 0)
+        return self
+
+    def limit(self, count: int) -> "FakeCursor":
+        self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self, length: int) -> list:
+        return self.documents[:length]
+
+
+class FakeCollection:
+    """The handful of Motor collection methods the tested routes call.
+
+    Supports equality, $gt and $in filters, $set / $inc updates and
+    UpdateOne bulk writes; projections are ignored and whole documents are
+    returned.
+    """
+
+    def __init__(self):
+        self.documents = []
+
+    async def insert_one(self, document: dict) -> None:
+        self.documents.append(copy.deepcopy(document))
+
+    async def insert_many(self, documents: list, ordered: bool = True) -> None:
+        self.documents.extend(copy.deepcopy(document) for document in documents)
+
+    def find(self, query: dict, projection=None) -> FakeCursor:
+        return FakeCursor([copy.deepcopy(document) for document in self.documents if matches(document, query)])
+
+    async def find_one(self, query: dict, projection=None):
+        for document in self.documents:
+            if matches(document, query):
+                return copy.deepcopy(document)
+        return None
+
+    async def find_one_and_update(self, query: dict, update: dict, projection=None):
+        for document in self.documents:
+            if matches(document, query):
+                before = copy.deepcopy(document)
+                apply_update(document, update)
+                return before
+        return None
+
+    async def update_many(self, query: dict, update: dict) -> None:
+        for document in self.documents:
+            if matches(document, query):
+                apply_update(document, update)
+
+    async def bulk_write(self, requests: list, ordered: bool = True) -> None:
+        for request in requests:
+            document = next((doc for doc in self.documents if matches(doc, request._filter)), None)
+            if document is None and request._upsert:
+                document = dict(request._filter)
+                self.documents.append(document)
+            if document is not None:
+                apply_update(document, request._doc)
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.collections = {}
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        return self[name]
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        return self.collections.setdefault(name, FakeCollection())
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    import server
+
+    database = FakeDatabase()
+    monkeypatch.setattr(server, "db", database)
+    return database
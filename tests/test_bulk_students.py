@@ -0,0 +1,44 @@
+"""
+Bulk roster import: blank CSV lines are ignored and rows without
+credentials are reported, never inserted.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+TEACHER_ID = "teacher-1"
+
+
+@pytest.fixture
+def api(fake_db):
+    fake_db.users.documents.append({"id": TEACHER_ID, "email": "t@example.com", "name": "Teacher"})
+    token = server.create_access_token({"sub": TEACHER_ID, "role": "teacher"})
+    client = TestClient(server.app)
+    client.headers["Authorization"] = f"Bearer {token}"
+    return client
+
+
+def import_csv(api, csv_text: str) -> dict:
+    response = api.post("/api/students/bulk", content=csv_text, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_blank_csv_rows_are_skipped(api, fake_db):
+    body = import_csv(api, "first_name,last_name,username,password\nAda,Lovelace,ada,secret1\n,,,\n\n")
+
+    assert body["created"] == 1
+    assert body["failed"] == 0
+    assert [student["username"] for student in fake_db.students.documents] == ["ada"]
+
+
+def test_rows_without_credentials_are_rejected(api, fake_db):
+    body = import_csv(api, "first_name,last_name,username,password\nAda,Lovelace,ada,secret1\nBob,Smith,,\nCy,Young,cy,\n")
+
+    assert body["created"] == 1
+    assert [(result["row"], result["status"]) for result in body["results"]] == [(1, "created"), (2, "error"), (3, "error")]
+    assert body["results"][1]["error"] == "Username and password are required"
+    assert not any(student["username"] == "" for student in fake_db.students.documents)
+    assert [student["username"] for student in fake_db.students.documents] == ["ada"]
@@ -0,0 +1,96 @@
+"""
+Response compression: Accept-Encoding negotiation and which responses
+CompressionMiddleware leaves alone.
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+import server
+
+LARGE = "lesson " * 1000
+SMALL = "ok"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(server, "compression_stats", server.CompressionStats())
+    app = FastAPI()
+
+    @app.get("/api/large")
+    async def large():
+        return PlainTextResponse(LARGE)
+
+    @app.get("/api/small")
+    async def small():
+        return PlainTextResponse(SMALL)
+
+    @app.get("/api/stream")
+    async def stream():
+        return StreamingResponse(iter([LARGE, LARGE]), media_type="text/plain")
+
+    @app.get("/api/health/large")
+    async def excluded():
+        return PlainTextResponse(LARGE)
+
+    return TestClient(server.CompressionMiddleware(app))
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip", "gzip"),
+    ("gzip, deflate, br", "br"),
+    ("br;q=0, gzip;q=0.5", "gzip"),
+    ("*", "br"),
+    ("*;q=0", None),
+    ("identity", None),
+    ("deflate, gzip;q=bogus", None),
+])
+def test_negotiate_encoding(accept_encoding, expected, monkeypatch):
+    # Pin the server preference so the cases hold with or without Brotli installed
+    monkeypatch.setattr(server, "COMPRESSORS", {"br": server._compress_brotli, "gzip": server._compress_gzip})
+    assert server.negotiate_encoding(accept_encoding) == expected
+
+
+def test_large_body_is_compressed(client):
+    response = client.get("/api/large", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.text == LARGE
+    assert int(response.headers["Content-Length"]) < len(LARGE)
+    assert server.compression_stats.compressed == 1
+
+
+def test_body_below_threshold_is_sent_as_is(client):
+    response = client.get("/api/small", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.text == SMALL
+    assert server.compression_stats.skipped_small == 1
+    assert server.compression_stats.compressed == 0
+
+
+def test_threshold_is_configurable(client, monkeypatch):
+    monkeypatch.setattr(server, "COMPRESSION_MIN_BYTES", 1)
+
+    response = client.get("/api/small", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+
+
+def test_client_without_accept_encoding_gets_identity(client):
+    response = client.get("/api/large", headers={"Accept-Encoding": ""})
+
+    assert "Content-Encoding" not in response.headers
+    assert server.compression_stats.skipped_small == 0
+
+
+@pytest.mark.parametrize("path", ["/api/stream", "/api/health/large"])
+def test_streaming_and_excluded_paths_pass_through(client, path):
+    response = client.get(path, headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+    assert server.compression_stats.compressed == 0
@@ -0,0 +1,73 @@
+"""
+Conditional GET on versioned lists: an unchanged list answers If-None-Match
+with 304, a version bump changes the ETag, and compressed representations
+keep their encoding suffix on the 304 too.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+TEACHER_ID = "teacher-1"
+
+
+@pytest.fixture
+def api(fake_db):
+    fake_db.users.documents.append({"id": TEACHER_ID, "email": "t@example.com", "name": "Teacher"})
+    fake_db.rewards.documents.append({
+        "id": "reward-1", "teacher_id": TEACHER_ID, "title": "Extra recess", "description": "Ten more minutes outside",
+        "points_cost": 50, "active": True, "created_at": datetime(2024, 5, 1, tzinfo=timezone.utc),
+    })
+    token = server.create_access_token({"sub": TEACHER_ID, "role": "teacher"})
+    client = TestClient(server.app)
+    client.headers["Authorization"] = f"Bearer {token}"
+    return client
+
+
+def test_unchanged_list_is_not_modified(api):
+    first = api.get("/api/rewards", headers={"Accept-Encoding": "identity"})
+    etag = first.headers["ETag"]
+
+    again = api.get("/api/rewards", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+
+    assert first.status_code == 200
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert again.content == b""
+
+
+def test_version_bump_changes_the_etag(api):
+    etag = api.get("/api/rewards", headers={"Accept-Encoding": "identity"}).headers["ETag"]
+
+    asyncio.run(server.bump_versions("rewards", TEACHER_ID))
+    changed = api.get("/api/rewards", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()[0]["id"] == "reward-1"
+    assert api.get("/api/rewards", headers={"Accept-Encoding": "identity", "If-None-Match": changed.headers["ETag"]}).status_code == 304
+
+
+def test_not_modified_keeps_the_encoding_suffix(api):
+    first = api.get("/api/rewards", headers={"Accept-Encoding": "gzip"})
+    etag = first.headers["ETag"]
+
+    again = api.get("/api/rewards", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+
+    assert etag.endswith('-gzip"')
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert "Accept-Encoding" in again.headers["Vary"]
+
+
+def test_bare_etag_still_matches_a_compressed_representation(api):
+    bare = api.get("/api/rewards", headers={"Accept-Encoding": "identity"}).headers["ETag"]
+
+    again = api.get("/api/rewards", headers={"Accept-Encoding": "gzip", "If-None-Match": bare})
+
+    assert again.status_code == 304
+    assert again.headers["ETag"] == bare[:-1] + '-gzip"'
@@ -0,0 +1,92 @@
+"""
+LLM circuit breaker: a half-open trial call that is cancelled or abandoned
+mid-stream frees the trial slot instead of blocking every later call.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+import server
+
+
+class SlowChat:
+    async def send_message(self, message) -> str:
+        await asyncio.sleep(60)
+        return "never"
+
+    async def stream_message(self, message):
+        yield "first "
+        await asyncio.sleep(60)
+        yield "never"
+
+
+@pytest.fixture
+def circuit(monkeypatch):
+    breaker = server.CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    # Opened long enough ago that the next call is the half-open trial
+    breaker.opened_at = time.monotonic() - 60
+    monkeypatch.setattr(server, "llm_circuit", breaker)
+    monkeypatch.setattr(server, "_llm_message", lambda chat, prompt: prompt)
+    return breaker
+
+
+def test_cancelled_stream_frees_the_trial(circuit):
+    async def scenario():
+        async def consume():
+            async for _ in server.stream_llm_message(SlowChat(), "plan"):
+                pass
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        assert circuit.trial_in_flight
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+    assert not circuit.trial_in_flight
+    assert circuit.allow_request()
+
+
+def test_stream_closed_early_frees_the_trial(circuit):
+    async def scenario():
+        stream = server.stream_llm_message(SlowChat(), "plan")
+        assert await stream.__anext__() == "first "
+        await stream.aclose()
+
+    asyncio.run(scenario())
+
+    assert not circuit.trial_in_flight
+    assert circuit.allow_request()
+
+
+def test_cancelled_send_frees_the_trial(circuit):
+    async def scenario():
+        task = asyncio.create_task(server.send_llm_message(SlowChat(), "plan"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+    assert circuit.allow_request()
+
+
+def test_failed_trial_reopens_the_circuit(circuit):
+    class BrokenChat:
+        async def stream_message(self, message):
+            raise RuntimeError("provider down")
+            yield
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            async for _ in server.stream_llm_message(BrokenChat(), "plan"):
+                pass
+
+    asyncio.run(scenario())
+
+    assert circuit.state == "open"
+    assert not circuit.allow_request()
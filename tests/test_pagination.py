@@ -0,0 +1,61 @@
+"""
+Keyset pagination cursors: they round-trip the sort position, and anything
+that does not decode to a position in the same list is a 400.
+"""
+
+import base64
+import json
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import server
+
+CREATED_AT = datetime(2024, 5, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+
+
+def raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trips_the_sort_position():
+    cursor = server.encode_cursor("created_at", {"created_at": CREATED_AT, "id": "student-7", "name": "Ada"})
+
+    assert "=" not in cursor
+    assert server.decode_cursor(cursor, "created_at") == (CREATED_AT, "student-7")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    "bm90LWpzb24",
+    raw_cursor(5),
+    raw_cursor(["created_at", "yesterday", "student-7"]),
+    raw_cursor(["created_at", CREATED_AT.isoformat()]),
+])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        server.decode_cursor(cursor, "created_at")
+    assert error.value.status_code == 400
+    assert error.value.detail == "Invalid pagination cursor"
+
+
+def test_cursor_from_another_sort_field_is_rejected():
+    cursor = server.encode_cursor("sent_at", {"sent_at": CREATED_AT, "id": "message-1"})
+
+    with pytest.raises(HTTPException) as error:
+        server.decode_cursor(cursor, "created_at")
+    assert error.value.status_code == 400
+
+
+def test_list_route_answers_an_invalid_cursor_with_400(fake_db):
+    fake_db.users.documents.append({"id": "teacher-1", "email": "t@example.com", "name": "Teacher"})
+    token = server.create_access_token({"sub": "teacher-1", "role": "teacher"})
+
+    response = TestClient(server.app).get(
+        "/api/students", params={"cursor": "not a cursor"}, headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid pagination cursor"}
@@ -0,0 +1,293 @@
+"""
+Static checks on the Mongo read paths in backend/server.py.
+
+Every find / find_one / find_one_and_update on `db.<collection>`, and every
+fetch_page(db.<collection>, ...) list read, in a module function or a class
+method, must pass one of the module's *_PROJECTION constants. Every field a
+projection asks for must actually be read from the variable the result is
+bound to (directly, through a model built from the document, through a
+function or method it hands the document to, or by the caller it is
+returned to). Parses the source, so it needs no database or
+backend dependencies.
+"""
+
+import ast
+from pathlib import Path
+
+SERVER = Path(__file__).resolve().parent.parent / "backend" / "server.py"
+READ_METHODS = {"find", "find_one", "find_one_and_update"}
+# Module helpers that run a find for the caller: name -> projection argument index
+READ_HELPERS = {"fetch_page": 2}
+# Functions that build models or responses from the documents they are given
+MODEL_CONSUMERS = {"trusted_dump", "trusted_response"}
+
+tree = ast.parse(SERVER.read_text())
+functions = {
+    node.name: node
+    for node in tree.body
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+}
+methods = {
+    node.name: {
+        stmt.name: stmt
+        for stmt in node.body
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef))
+    }
+    for node in tree.body
+    if isinstance(node, ast.ClassDef)
+}
+models = {
+    node.name: {
+        stmt.target.id
+        for stmt in node.body
+        if isinstance(stmt, ast.AnnAssign) and isinstance(stmt.target, ast.Name)
+    }
+    for node in tree.body
+    if isinstance(node, ast.ClassDef)
+}
+
+
+def projection_fields(node, constants):
+    if isinstance(node, ast.Dict):
+        fields = {}
+        for key, value in zip(node.keys, node.values):
+            if key is None:
+                fields.update(projection_fields(value, constants))
+            else:
+                fields[key.value] = value.value
+        return fields
+    if isinstance(node, ast.Name):
+        return constants[node.id]
+    if isinstance(node, ast.Call) and node.func.id == "model_projection":
+        model, *extra = node.args
+        fields = {name: 1 for name in models[model.id]}
+        fields.update({arg.value: 1 for arg in extra})
+        fields["_id"] = 0
+        return fields
+    raise AssertionError(f"unsupported projection expression: {ast.dump(node)}")
+
+
+projections = {}
+for node in tree.body:
+    if isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name) and node.targets[0].id.endswith("_PROJECTION"):
+        projections[node.targets[0].id] = projection_fields(node.value, projections)
+
+
+def principal_keys():
+    """Keys handlers read from current_user["data"], which resolve_principal fills."""
+    keys = set()
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Subscript)
+            and isinstance(node.value, ast.Subscript)
+            and isinstance(node.value.value, ast.Name)
+            and node.value.value.id == "current_user"
+            and isinstance(node.slice, ast.Constant)
+        ):
+            keys.add(node.slice.value)
+    return keys
+
+
+def bindings(source, target):
+    """(source, target) pairs for `target = source`, unpacking zip() and enumerate()."""
+    if isinstance(source, ast.Call) and isinstance(source.func, ast.Name) and isinstance(target, ast.Tuple):
+        if source.func.id == "zip":
+            return list(zip(source.args, target.elts))
+        if source.func.id == "enumerate" and len(target.elts) == 2:
+            return [(source.args[0], target.elts[1])]
+    if isinstance(source, ast.Subscript) and isinstance(source.slice, ast.Constant) and isinstance(source.slice.value, int):
+        source = source.value
+    return [(source, target)]
+
+
+def aliases(function, names):
+    """`names` plus variables bound to their elements or sub-documents (loops, comprehensions, x[0], x["key"])."""
+    names = set(names)
+    while True:
+        found = set(names)
+        for node in ast.walk(function):
+            if isinstance(node, (ast.For, ast.AsyncFor, ast.comprehension)):
+                pairs = bindings(node.iter, node.target)
+            elif isinstance(node, ast.Assign) and len(node.targets) == 1:
+                pairs = bindings(node.value, node.targets[0])
+            else:
+                continue
+            for source, target in pairs:
+                if isinstance(target, ast.Name) and key_path(source)[0] in names:
+                    found.add(target.id)
+        if found == names:
+            return names
+        names = found
+
+
+def key_path(node):
+    """(root variable, keys) for d["a"]["b"] and d.get("a", {}).get("b") chains."""
+    keys = []
+    while True:
+        if isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Constant) and isinstance(node.slice.value, str):
+            keys.append(node.slice.value)
+            node = node.value
+        elif (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr == "get"
+            and node.args
+            and isinstance(node.args[0], ast.Constant)
+        ):
+            keys.append(node.args[0].value)
+            node = node.func.value
+        else:
+            return (node.id if isinstance(node, ast.Name) else None), keys
+
+
+def callee(func, owner):
+    """The module function or same-class method a call goes to, and how many leading parameters to skip."""
+    if isinstance(func, ast.Name) and func.id in functions:
+        return functions[func.id], 0
+    if (
+        owner
+        and isinstance(func, ast.Attribute)
+        and isinstance(func.value, ast.Name)
+        and func.value.id == "self"
+        and func.attr in methods[owner]
+    ):
+        return methods[owner][func.attr], 1
+    return None, 0
+
+
+def read_keys(function, names, owner=None, seen=()):
+    """Keys read from the documents bound to `names`: subscripts, .get(), models and the functions they are passed to."""
+    names = aliases(function, names)
+    keys = set()
+    for node in ast.walk(function):
+        root, path = key_path(node)
+        if root in names:
+            keys.update(path)
+        if not isinstance(node, ast.Call):
+            continue
+        func = node.func
+        if isinstance(func, ast.Name) and func.id in models:
+            if any(kw.arg is None and isinstance(kw.value, ast.Name) and kw.value.id in names for kw in node.keywords):
+                keys |= models[func.id]
+        elif isinstance(func, ast.Name) and func.id in MODEL_CONSUMERS:
+            if len(node.args) > 1 and isinstance(node.args[1], ast.Name) and node.args[1].id in names:
+                keys |= models[node.args[0].id]
+        else:
+            target, skip = callee(func, owner)
+            if target is None or target.name in seen:
+                continue
+            parameters = [arg.arg for arg in target.args.args][skip:]
+            bound = {parameters[index] for index, arg in enumerate(node.args)
+                     if index < len(parameters) and isinstance(arg, ast.Name) and arg.id in names}
+            bound |= {kw.arg for kw in node.keywords if kw.arg and isinstance(kw.value, ast.Name) and kw.value.id in names}
+            if bound:
+                keys |= read_keys(target, bound, owner if skip else None, seen + (function.name,))
+    if any(isinstance(node, ast.Return) and isinstance(node.value, ast.Name) and node.value.id in names
+           for node in ast.walk(function)):
+        keys |= caller_keys(function, owner, seen + (function.name,))
+    if function.name == "resolve_principal":
+        keys |= principal_keys()
+    return keys
+
+
+def caller_keys(function, owner, seen):
+    """Keys read from a document `function` returns, by the code that calls it."""
+    keys = set()
+    for caller, caller_owner in scopes():
+        if caller.name in seen:
+            continue
+        for node in ast.walk(caller):
+            if isinstance(node, ast.Call) and callee(node.func, caller_owner)[0] is function:
+                keys |= read_keys(caller, bound_names(caller, node), caller_owner, seen)
+    return keys
+
+
+def bound_names(function, call):
+    """Variables the result of `call` is assigned to (the first item for `docs, cursor = await ...`)."""
+    for node in ast.walk(function):
+        if isinstance(node, ast.Assign) and any(child is call for child in ast.walk(node.value)):
+            target = node.targets[0]
+            if isinstance(target, ast.Tuple):
+                target = target.elts[0]
+            if isinstance(target, ast.Name):
+                return {target.id}
+    return set()
+
+
+def is_collection(node):
+    return isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "db"
+
+
+def scopes():
+    """Module functions and class methods, with the class each method belongs to."""
+    for function in functions.values():
+        yield function, None
+    for owner, members in methods.items():
+        for function in members.values():
+            yield function, owner
+
+
+def read_calls():
+    for function, owner in scopes():
+        for node in ast.walk(function):
+            if not isinstance(node, ast.Call):
+                continue
+            if isinstance(node.func, ast.Attribute) and node.func.attr in READ_METHODS and is_collection(node.func.value):
+                yield function, owner, node
+            elif isinstance(node.func, ast.Name) and node.func.id in READ_HELPERS and is_collection(node.args[0]):
+                yield function, owner, node
+
+
+def label(function, owner):
+    return f"{owner}.{function.name}" if owner else function.name
+
+
+def describe(call):
+    if isinstance(call.func, ast.Name):
+        return f"{call.func.id}(db.{call.args[0].attr})"
+    return f"db.{call.func.value.attr}.{call.func.attr}"
+
+
+def projection_argument(call):
+    if isinstance(call.func, ast.Name):
+        index = READ_HELPERS[call.func.id]
+        return call.args[index] if len(call.args) > index else None
+    keywords = {kw.arg: kw.value for kw in call.keywords}
+    if "projection" in keywords:
+        return keywords["projection"]
+    if call.func.attr in ("find", "find_one") and len(call.args) > 1:
+        return call.args[1]
+    return None
+
+
+def test_read_calls_are_found():
+    assert len(list(read_calls())) > 30
+
+
+def test_every_read_names_a_projection_constant():
+    missing = []
+    for function, owner, call in read_calls():
+        projection = projection_argument(call)
+        if not (isinstance(projection, ast.Name) and projection.id in projections):
+            missing.append(f"{label(function, owner)} (line {call.lineno}): {describe(call)}")
+    assert not missing, "reads without a *_PROJECTION constant:\n" + "\n".join(missing)
+
+
+def test_projections_are_inclusive():
+    for name, fields in projections.items():
+        excluded = [field for field, value in fields.items() if field != "_id" and not value]
+        assert not excluded, f"{name} excludes {excluded}; list the fields to fetch instead"
+
+
+def test_projected_fields_are_used():
+    unused = []
+    for function, owner, call in read_calls():
+        projection = projection_argument(call)
+        used = read_keys(function, bound_names(function, call), owner)
+        for field in projections[projection.id]:
+            if field == "_id":
+                continue
+            missing = [part for part in field.split(".") if part not in used]
+            if missing:
+                unused.append(f"{label(function, owner)} (line {call.lineno}): {projection.id} fetches {field!r}")
+    assert not unused, "projected fields never read:\n" + "\n".join(unused)
@@ -0,0 +1,69 @@
+"""
+Refresh-token rotation: every refresh revokes the presented token, and
+presenting a revoked token again revokes its whole family.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+CLAIMS = {"sub": "teacher-1", "role": "teacher"}
+
+
+def refresh(token: str) -> dict:
+    return asyncio.run(server.refresh_access_token(server.RefreshRequest(refresh_token=token)))
+
+
+def stored(fake_db, token: str) -> dict:
+    token_hash = server._hash_refresh_token(token)
+    return next(doc for doc in fake_db.refresh_tokens.documents if doc["token_hash"] == token_hash)
+
+
+def test_refresh_rotates_the_token(fake_db):
+    first = asyncio.run(server.issue_refresh_token(CLAIMS))
+
+    body = refresh(first)
+
+    second = body["refresh_token"]
+    assert second != first
+    assert server.decode_access_token(body["access_token"])["sub"] == "teacher-1"
+    old, new = stored(fake_db, first), stored(fake_db, second)
+    assert old["revoked"] and old["replaced_by"] == new["id"]
+    assert not new["revoked"]
+    assert new["family_id"] == old["family_id"]
+    assert new["claims"] == CLAIMS
+
+
+def test_reusing_a_rotated_token_revokes_the_family(fake_db):
+    first = asyncio.run(server.issue_refresh_token(CLAIMS))
+    second = refresh(first)["refresh_token"]
+
+    with pytest.raises(HTTPException) as reused:
+        refresh(first)
+    assert reused.value.status_code == 401
+    assert stored(fake_db, second)["revoked"]
+
+    with pytest.raises(HTTPException) as revoked:
+        refresh(second)
+    assert revoked.value.status_code == 401
+
+
+def test_reuse_leaves_other_families_alone(fake_db):
+    first = asyncio.run(server.issue_refresh_token(CLAIMS))
+    other_device = asyncio.run(server.issue_refresh_token(CLAIMS))
+    refresh(first)
+
+    with pytest.raises(HTTPException):
+        refresh(first)
+
+    assert not stored(fake_db, other_device)["revoked"]
+    assert refresh(other_device)["refresh_token"]
+
+
+def test_unknown_token_is_rejected(fake_db):
+    with pytest.raises(HTTPException) as unknown:
+        refresh("not-a-token")
+    assert unknown.value.status_code == 401
@@ -0,0 +1,95 @@
+"""
+SingleFlight: concurrent calls with the same key share one execution and
+its outcome, and a finished key starts a fresh call.
+"""
+
+import asyncio
+
+import pytest
+
+import server
+
+
+class Generator:
+    def __init__(self, error: Exception = None):
+        self.calls = 0
+        self.error = error
+        self.release = asyncio.Event()
+
+    async def __call__(self, topic: str) -> dict:
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return {"topic": topic, "call": self.calls}
+
+
+async def start_callers(flights, key, func, count):
+    callers = [asyncio.ensure_future(flights.run(key, func, "fractions")) for _ in range(count)]
+    await asyncio.sleep(0)
+    return callers
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flights, generate = server.SingleFlight(), Generator()
+        callers = await start_callers(flights, "math", generate, 10)
+        assert flights.stats() == {"in_flight": 1, "calls": 1, "coalesced": 9}
+        generate.release.set()
+        return flights, generate, await asyncio.gather(*callers)
+
+    flights, generate, results = asyncio.run(scenario())
+
+    assert generate.calls == 1
+    assert results == [{"topic": "fractions", "call": 1}] * 10
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flights, generate = server.SingleFlight(), Generator()
+        first = await start_callers(flights, "math", generate, 2)
+        second = await start_callers(flights, "science", generate, 2)
+        generate.release.set()
+        await asyncio.gather(*first, *second)
+        return flights, generate
+
+    flights, generate = asyncio.run(scenario())
+
+    assert generate.calls == 2
+    assert flights.stats() == {"in_flight": 0, "calls": 2, "coalesced": 2}
+
+
+def test_error_reaches_every_caller_and_is_not_kept():
+    async def scenario():
+        flights, failing = server.SingleFlight(), Generator(RuntimeError("provider down"))
+        callers = await start_callers(flights, "math", failing, 3)
+        failing.release.set()
+        outcomes = await asyncio.gather(*callers, return_exceptions=True)
+
+        retry = Generator()
+        retry.release.set()
+        return outcomes, await flights.run("math", retry, "fractions"), failing
+
+    outcomes, retried, failing = asyncio.run(scenario())
+
+    assert failing.calls == 1
+    assert all(isinstance(outcome, RuntimeError) and str(outcome) == "provider down" for outcome in outcomes)
+    assert retried == {"topic": "fractions", "call": 1}
+
+
+def test_cancelled_caller_leaves_the_call_running():
+    async def scenario():
+        flights, generate = server.SingleFlight(), Generator()
+        leader, follower = await start_callers(flights, "math", generate, 2)
+        leader.cancel()
+        await asyncio.sleep(0)
+        generate.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return generate, await follower
+
+    generate, result = asyncio.run(scenario())
+
+    assert generate.calls == 1
+    assert result == {"topic": "fractions", "call": 1}